@@ -0,0 +1,53 @@
+import copy
+import time
+from typing import Dict, List
+from multi_agent_orchestrator.agents import Agent
+from multi_agent_orchestrator.classifiers import Classifier, ClassifierResult
+from multi_agent_orchestrator.types import ConversationMessage
+from ..llm_cache import response_cache_key, log_cache_hit
+
+class CachedClassifier(Classifier):
+    """
+    Wraps an LLM classifier with a response cache. The key covers the model, the filled-in system prompt
+    (agent descriptions and the formatted history) and the normalized input, so the same question in the
+    same conversational context is classified once. Only the selected agent id and confidence are stored.
+    """
+
+    def __init__(self, classifier: Classifier, response_cache):
+        super().__init__()
+        self.classifier = classifier
+        self.response_cache = response_cache
+
+    def set_agents(self, agents: Dict[str, Agent]) -> None:
+        super().set_agents(agents)
+        self.classifier.set_agents(agents)
+
+    async def classify(self, input_text: str, chat_history: List[ConversationMessage]) -> ClassifierResult:
+        # The LLM classifier keeps the history and filled-in prompt on itself; a shallow copy per request
+        # keeps concurrent sessions from overwriting each other's prompt (the client is shared)
+        classifier = copy.copy(self.classifier)
+        classifier.set_history(chat_history)
+        classifier.update_system_prompt()
+        cache_key = response_cache_key(
+            getattr(classifier, 'model_id', type(classifier).__name__),
+            classifier.system_prompt,
+            [input_text]
+        )
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            value, latency_ms = cached
+            agent = self.get_agent_by_id(value['agent_id']) if value['agent_id'] else None
+            if agent is not None or value['agent_id'] is None:
+                log_cache_hit('classifier', self.response_cache, latency_ms)
+                return ClassifierResult(selected_agent=agent, confidence=value['confidence'])
+
+        started = time.perf_counter()
+        result = await classifier.classify(input_text, chat_history)
+        self.response_cache.set(cache_key, {
+            'agent_id': result.selected_agent.id if result.selected_agent else None,
+            'confidence': result.confidence
+        }, (time.perf_counter() - started) * 1000)
+        return result
+
+    async def process_request(self, input_text: str, chat_history: List[ConversationMessage]) -> ClassifierResult:
+        return await self.classify(input_text, chat_history)
@@ -1,10 +1,42 @@
 from typing import List, Dict, Any, AsyncIterable, Optional, Union
+from dataclasses import dataclass
+from anthropic import Anthropic
+from anthropic.types import Message
 from multi_agent_orchestrator.agents import AnthropicAgent, AnthropicAgentOptions
 from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
 from multi_agent_orchestrator.utils import Logger
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import json
+import os
+import time
+from ..tracing import span, run_in_executor
+from ..streaming import emit_text, emit_status
+from ..llm_cache import response_cache_key, log_cache_hit
+from ..llm_scheduler import scheduler, estimate_call_tokens, PRIORITY_GENERATION
+
+# The Anthropic SDK call is blocking, so it runs on this pool instead of on the event loop. The pool
+# size caps how many requests the process has in flight; calls beyond it queue here.
+ANTHROPIC_MAX_CONCURRENCY = int(os.getenv('ANTHROPIC_MAX_CONCURRENCY', '8'))
+anthropic_executor = ThreadPoolExecutor(max_workers=ANTHROPIC_MAX_CONCURRENCY, thread_name_prefix='anthropic')
+
+@dataclass
+class CustomAnthropicAgentOptions(AnthropicAgentOptions):
+    # Optional llm_cache response cache; only set it for agents whose answers are deterministic
+    response_cache: Optional[Any] = None
+    # llm_scheduler priority of this agent's model calls
+    priority: int = PRIORITY_GENERATION
 
 class CustomAnthropicAgent(AnthropicAgent):
+    def __init__(self, options: AnthropicAgentOptions):
+        super().__init__(options)
+        self.response_cache = getattr(options, 'response_cache', None)
+        self.priority = getattr(options, 'priority', PRIORITY_GENERATION)
+        if self.streaming and not options.client:
+            # The base class builds an AsyncAnthropic client for streaming, which is bound to the event
+            # loop it first runs on; the sync client is streamed on the executor instead
+            self.client = Anthropic(api_key=options.api_key)
+
     async def process_request(
         self,
         input_text: str,
@@ -43,10 +75,11 @@ class CustomAnthropicAgent(AnthropicAgent):
             recursions = 3
             while tool_use and recursions > 0:
                 
-                if self.streaming:
-                    response = await self.handle_streaming_response(input)
-                else:
-                    response = await self.handle_single_response(input)
+                with span("llm", model=self.model_id, messages=len(input['messages'])):
+                    if self.streaming:
+                        response = await self.handle_streaming_response(input)
+                    else:
+                        response = await self.handle_single_response(input)
 
                 tool_use_blocks = [content for content in response.content if content.type == 'tool_use']
                 if tool_use_blocks:
@@ -55,7 +88,11 @@ class CustomAnthropicAgent(AnthropicAgent):
                     if not self.tool_config or not self.tool_config.get('useToolHandler'):
                         raise ValueError("No tools available for tool use")
                     
-                    tool_response = await self.tool_config['useToolHandler'](response, input['messages'])
+                    if any(block.type == 'text' for block in response.content):
+                        emit_text("\n\n")
+                    emit_status(f"Running {', '.join(block.name for block in tool_use_blocks)}...")
+                    with span("tool_handler", tools=[block.name for block in tool_use_blocks]):
+                        tool_response = await self.tool_config['useToolHandler'](response, input['messages'])
                     
                     input['messages'].append(tool_response)
                     tool_use = True
@@ -76,7 +113,58 @@ class CustomAnthropicAgent(AnthropicAgent):
 
     async def handle_single_response(self, input_data: Dict) -> Any:
         try:
-            response = self.client.messages.create(**input_data)
+            cache_key = None
+            if self.response_cache is not None:
+                settings = {key: value for key, value in input_data.items() if key not in ('model', 'system', 'messages')}
+                cache_key = response_cache_key(input_data['model'], input_data.get('system'), input_data['messages'], **settings)
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    message, latency_ms = cached
+                    log_cache_hit(self.name, self.response_cache, latency_ms)
+                    return Message.model_validate(message)
+
+            async with await scheduler.acquire('anthropic', self.priority, self._estimate_tokens(input_data)) as slot:
+                started = time.perf_counter()
+                response = await run_in_executor(
+                    functools.partial(self.client.messages.create, **input_data),
+                    executor=anthropic_executor
+                )
+                slot.used_tokens = self._used_tokens(response)
+            if cache_key is not None:
+                self.response_cache.set(cache_key, response.model_dump(mode='json'), (time.perf_counter() - started) * 1000)
             return response
         except Exception as error:
-            raise error
\ No newline at end of file
+            raise error
+
+    async def handle_streaming_response(self, input_data: Dict) -> Any:
+        """Stream on the executor, forwarding text deltas to the request's token stream"""
+        try:
+            async with await scheduler.acquire('anthropic', self.priority, self._estimate_tokens(input_data)) as slot:
+                message = await run_in_executor(
+                    functools.partial(self._stream_message, input_data),
+                    executor=anthropic_executor
+                )
+                slot.used_tokens = self._used_tokens(message)
+                return message
+        except Exception as error:
+            Logger.error(f"Error getting stream from Anthropic model: {str(error)}")
+            raise error
+
+    @staticmethod
+    def _estimate_tokens(input_data: Dict) -> float:
+        prompt_chars = len(json.dumps(input_data['messages'], default=str)) + len(str(input_data.get('system') or ''))
+        return estimate_call_tokens(prompt_chars, input_data.get('max_tokens'))
+
+    @staticmethod
+    def _used_tokens(message: Message) -> Optional[float]:
+        """Tokens the call actually used, if the response reports it (None leaves the estimate charged)"""
+        usage = getattr(message, 'usage', None)
+        if usage is None:
+            return None
+        return usage.input_tokens + usage.output_tokens
+
+    def _stream_message(self, input_data: Dict) -> Message:
+        with self.client.messages.stream(**input_data) as stream:
+            for text in stream.text_stream:
+                emit_text(text)
+            return stream.get_final_message()
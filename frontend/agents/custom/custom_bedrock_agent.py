@@ -1,18 +1,29 @@
-from typing import List, Dict, Any, AsyncIterable, Optional, Union
+from typing import List, Dict, Any, AsyncIterable, Optional, Tuple, Union
 from dataclasses import dataclass
 from multi_agent_orchestrator.agents import BedrockLLMAgent, BedrockLLMAgentOptions
 from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
 from multi_agent_orchestrator.utils import conversation_to_dict, Logger
 from datetime import datetime
+import functools
 import json
+import time
+from ..tracing import span, run_in_executor
+from ..streaming import emit_text, emit_status
+from ..llm_cache import response_cache_key, log_cache_hit
+from ..llm_scheduler import scheduler, estimate_call_tokens, PRIORITY_GENERATION
 
 @dataclass 
 class CustomBedrockLLMAgentOptions(BedrockLLMAgentOptions):
-    pass
+    # Optional llm_cache response cache; only set it for agents whose answers are deterministic
+    response_cache: Optional[Any] = None
+    # llm_scheduler priority of this agent's model calls
+    priority: int = PRIORITY_GENERATION
 
 class CustomBedrockLLMAgent(BedrockLLMAgent):
     def __init__(self, options: CustomBedrockLLMAgentOptions):
         super().__init__(options)
+        self.response_cache = getattr(options, 'response_cache', None)
+        self.priority = getattr(options, 'priority', PRIORITY_GENERATION)
 
     async def process_request(
         self,
@@ -57,43 +68,8 @@ class CustomBedrockLLMAgent(BedrockLLMAgent):
             while continue_with_tools and max_recursions > 0:
                 Logger.info(recursion_count)
                 recursion_count += 1
-                
-                if self.streaming:
-                    bedrock_response = await self.handle_streaming_response(converse_cmd)
-                else:
-                    Logger.info("Sending a msg")
-                    bedrock_response = await self.handle_single_response(converse_cmd)
-
-                conversation.append(bedrock_response)
-
-                if any('toolUse' in content for content in bedrock_response.content):
-                    Logger.info(bedrock_response.content)
-                    
-                    # Find the content item that contains toolUse
-                    tool_use_content = next(
-                        content for content in bedrock_response.content 
-                        if 'toolUse' in content
-                    )
-                    
-                    tool_result = await self.tool_config['useToolHandler'](bedrock_response, conversation)
-                    json_str = tool_result
-                    tool_data = json.loads(json_str)
-                    Logger.info(tool_data)
-                    tool_response = ConversationMessage(
-                        role=ParticipantRole.USER.value,
-                        content=[{
-                            'toolResult': {
-                                'toolUseId': tool_use_content['toolUse']['toolUseId'],
-                                'content': [{
-                                    'json': tool_data
-                                }]
-                            }
-                        }]
-                    )
-                    conversation.append(tool_response)
-                else:
-                    continue_with_tools = False
-                    final_message = bedrock_response
+                with span("agent_recursion", agent=self.name, recursion=recursion_count):
+                    continue_with_tools, final_message = await self._run_recursion(converse_cmd, conversation, final_message)
 
                 max_recursions -= 1
                 converse_cmd['messages'] = conversation_to_dict(conversation)
@@ -106,17 +82,139 @@ class CustomBedrockLLMAgent(BedrockLLMAgent):
 
         return await self.handle_single_response(converse_cmd)
 
+    async def _run_recursion(self, converse_cmd: Dict[str, Any], conversation: List[ConversationMessage],
+                             final_message: ConversationMessage):
+        """
+        One model call plus, if the model asked for a tool, the tool call. Appends to conversation and
+        returns (continue_with_tools, final_message).
+        """
+        with span("llm", model=self.model_id, messages=len(conversation)):
+            if self.streaming:
+                bedrock_response = await self.handle_streaming_response(converse_cmd)
+            else:
+                Logger.info("Sending a msg")
+                bedrock_response = await self.handle_single_response(converse_cmd)
+
+        conversation.append(bedrock_response)
+
+        tool_uses = [content['toolUse'] for content in bedrock_response.content if 'toolUse' in content]
+        if tool_uses:
+            Logger.info(bedrock_response.content)
+
+            if any('text' in content for content in bedrock_response.content):
+                emit_text("\n\n")
+            emit_status(f"Running {', '.join(tool_use.get('name', 'tool') for tool_use in tool_uses)}...")
+
+            # The handler answers every toolUse block of the turn in one message
+            with span("tool_handler", tools=[tool_use.get('name') for tool_use in tool_uses]):
+                tool_response = await self.tool_config['useToolHandler'](bedrock_response, conversation)
+
+            if isinstance(tool_response, str):
+                # Handlers that return a single JSON result answer the first toolUse block
+                tool_data = json.loads(tool_response)
+                tool_response = ConversationMessage(
+                    role=ParticipantRole.USER.value,
+                    content=[{
+                        'toolResult': {
+                            'toolUseId': tool_uses[0]['toolUseId'],
+                            'content': [{
+                                'json': tool_data
+                            }]
+                        }
+                    }]
+                )
+            Logger.info(tool_response.content)
+            conversation.append(tool_response)
+            return True, final_message
+
+        return False, bedrock_response
+
     async def handle_single_response(self, converse_input: Dict[str, Any]) -> ConversationMessage:
         try:
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = response_cache_key(
+                    converse_input['modelId'], json.dumps(converse_input.get('system')), converse_input['messages'],
+                    inference_config=converse_input.get('inferenceConfig'), tool_config=converse_input.get('toolConfig')
+                )
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    message, latency_ms = cached
+                    log_cache_hit(self.name, self.response_cache, latency_ms)
+                    return ConversationMessage(role=message['role'], content=message['content'])
+
             Logger.info("About to send to Bedrock with input:")
             Logger.info(converse_input)
-            response = self.client.converse(**converse_input)
+            async with await scheduler.acquire('bedrock', self.priority, self._estimate_tokens(converse_input)) as slot:
+                started = time.perf_counter()
+                response = await run_in_executor(functools.partial(self.client.converse, **converse_input))
+                slot.used_tokens = response.get('usage', {}).get('totalTokens')
             if 'output' not in response:
                 raise ValueError("No output received from Bedrock model")
+            message = response['output']['message']
+            if cache_key is not None:
+                self.response_cache.set(cache_key, {'role': message['role'], 'content': message['content']},
+                                        (time.perf_counter() - started) * 1000)
             return ConversationMessage(
-                role=response['output']['message']['role'],
-                content=response['output']['message']['content']
+                role=message['role'],
+                content=message['content']
             )
         except Exception as error:
             Logger.error(f"Error invoking Bedrock model:{str(error)}")
             raise error
+
+    async def handle_streaming_response(self, converse_input: Dict[str, Any]) -> ConversationMessage:
+        """
+        converse_stream on an executor thread; text deltas go to the request's token stream as they
+        arrive and the assembled message (text and toolUse blocks) is returned
+        """
+        try:
+            Logger.info("About to stream from Bedrock with input:")
+            Logger.info(converse_input)
+            async with await scheduler.acquire('bedrock', self.priority, self._estimate_tokens(converse_input)) as slot:
+                message, slot.used_tokens = await run_in_executor(self._converse_stream, converse_input)
+                return message
+        except Exception as error:
+            Logger.error(f"Error getting stream from Bedrock model: {str(error)}")
+            raise error
+
+    @staticmethod
+    def _estimate_tokens(converse_input: Dict[str, Any]) -> float:
+        prompt_chars = len(json.dumps(converse_input['messages'], default=str)) + len(json.dumps(converse_input.get('system')))
+        return estimate_call_tokens(prompt_chars, (converse_input.get('inferenceConfig') or {}).get('maxTokens'))
+
+    def _converse_stream(self, converse_input: Dict[str, Any]) -> Tuple[ConversationMessage, Optional[float]]:
+        """Returns the assembled message and the totalTokens the stream's metadata reported (None if it did not)"""
+        response = self.client.converse_stream(**converse_input)
+        role = ParticipantRole.ASSISTANT.value
+        content = []
+        text = ''
+        tool_use = None
+        used_tokens = None
+
+        for chunk in response['stream']:
+            if 'messageStart' in chunk:
+                role = chunk['messageStart']['role']
+            elif 'contentBlockStart' in chunk:
+                start = chunk['contentBlockStart']['start']
+                if 'toolUse' in start:
+                    tool_use = {'toolUseId': start['toolUse']['toolUseId'], 'name': start['toolUse']['name'], 'input': ''}
+            elif 'contentBlockDelta' in chunk:
+                delta = chunk['contentBlockDelta']['delta']
+                if 'toolUse' in delta and tool_use is not None:
+                    tool_use['input'] += delta['toolUse']['input']
+                elif 'text' in delta:
+                    text += delta['text']
+                    emit_text(delta['text'])
+            elif 'contentBlockStop' in chunk:
+                if tool_use is not None:
+                    tool_use['input'] = json.loads(tool_use['input'] or '{}')
+                    content.append({'toolUse': tool_use})
+                    tool_use = None
+                elif text:
+                    content.append({'text': text})
+                    text = ''
+            elif 'metadata' in chunk:
+                used_tokens = chunk['metadata'].get('usage', {}).get('totalTokens')
+
+        return ConversationMessage(role=role, content=content), used_tokens
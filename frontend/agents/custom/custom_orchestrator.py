@@ -1,4 +1,5 @@
-from typing import Dict, Any, AsyncIterable, Optional, Union
+import time
+from typing import Dict, Any, AsyncIterable, AsyncIterator, Optional, Union
 from multi_agent_orchestrator.orchestrator import MultiAgentOrchestrator
 from multi_agent_orchestrator.agents import (Agent,
                         AgentResponse,
@@ -8,14 +9,63 @@ from multi_agent_orchestrator.agents import (Agent,
 from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole, OrchestratorConfig
 from multi_agent_orchestrator.utils import conversation_to_dict, Logger
 from multi_agent_orchestrator.classifiers import ClassifierResult
+from ..tracing import span
+from ..streaming import stream_events
+from .history_manager import HistoryManager
+
+# Span names for the phases the base orchestrator times with measure_execution_time
+TIMER_SPANS = {
+    "Classifying user intent": "classifier",
+}
 
 class CustomMultiAgentOrchestrator(MultiAgentOrchestrator):
+    def __init__(self, *args, history_manager: Optional[HistoryManager] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.history_manager = history_manager or HistoryManager()
+
+    async def route_request(self,
+                            user_input: str,
+                            user_id: str,
+                            session_id: str,
+                            additional_params: Dict[str, str] = {}) -> AgentResponse:
+        """Route a request inside a root span so every span it causes lands in one trace"""
+        with span("route_request", user_id=user_id, session_id=session_id) as request_span:
+            response = await super().route_request(user_input, user_id, session_id, additional_params)
+            request_span.set_attribute("agent", response.metadata.agent_name)
+            return response
+
+    async def route_request_stream(self,
+                                   user_input: str,
+                                   user_id: str,
+                                   session_id: str,
+                                   additional_params: Dict[str, str] = {}) -> AsyncIterator[Dict[str, Any]]:
+        """
+        route_request that yields the selected agent's output while it is generated: "text" and "status"
+        events, then a "done" event whose result is the AgentResponse. History is saved as usual.
+        """
+        started = time.perf_counter()
+        first_token = None
+        async for event in stream_events(self.route_request(user_input, user_id, session_id, additional_params)):
+            if first_token is None and event["type"] == "text":
+                first_token = time.perf_counter() - started
+                self.logger.info(f"Time to first token: {first_token * 1000:.0f} ms")
+            elif event["type"] == "done":
+                self.logger.info(f"Streamed response complete in {(time.perf_counter() - started) * 1000:.0f} ms")
+            yield event
+
+    async def measure_execution_time(self, timer_name: str, fn):
+        """Keep the base timing log and also record the phase as a span"""
+        name = TIMER_SPANS.get(timer_name, "agent")
+        with span(name, timer=timer_name):
+            return await super().measure_execution_time(timer_name, fn)
+
     async def dispatch_to_agent(self,
                               params: Dict[str, Any]) -> Union[
                                   ConversationMessage, AsyncIterable[Any]
                               ]:
         """
-        Enhanced version of dispatch_to_agent that maintains full conversation history
+        Enhanced version of dispatch_to_agent that passes the session's conversation history
+        (shaped by the history manager) to the selected agent
         """
         user_input = params['user_input']
         user_id = params['user_id']
@@ -37,6 +87,10 @@ class CustomMultiAgentOrchestrator(MultiAgentOrchestrator):
             # Get the full conversation history
             chat_history = await self.storage.fetch_all_chats(user_id, session_id) or []
             self.logger.info(f"Fetched full chat history: {len(chat_history)} messages")
+
+            # Recent turns verbatim, older ones summarized, within the agent's token budget
+            with span("history", agent=selected_agent.name):
+                chat_history = self.history_manager.prepare(selected_agent.id, chat_history)
             
             if hasattr(self.logger, 'print_chat_history'):
                 self.logger.print_chat_history(chat_history, "Full History")
@@ -0,0 +1,95 @@
+import copy
+import logging
+from typing import Any, AsyncIterable, Dict, List, Optional, Tuple, Union
+from multi_agent_orchestrator.agents import Agent, AgentOptions
+from multi_agent_orchestrator.classifiers import Classifier, ClassifierResult
+from multi_agent_orchestrator.types import ConversationMessage
+from ..llm_scheduler import scheduler, ProviderUnavailable, PRIORITY_CLASSIFIER, estimate_call_tokens, track_calls
+from ..streaming import text_emitted
+from ..tracing import current_span
+
+logger = logging.getLogger()
+
+def _record_failover(kind: str, name: str, error: ProviderUnavailable, fallback: str):
+    logger.warning(f"{kind} {name}: {error}, failing over to {fallback}")
+    active = current_span()
+    if active is not None:
+        active.set_attribute('failover', f"{error.provider}->{fallback}")
+
+class FailoverAgent(Agent):
+    """
+    The same agent built for each provider, tried in order. A request moves to the next provider when
+    the llm_scheduler has no budget for it in time or the provider throttles it; other errors propagate.
+    It only moves while nothing has happened yet: once a model call completed (so tools may have run) or
+    text reached the user, retrying elsewhere would repeat them, and ProviderUnavailable propagates.
+
+    Args:
+        agents (List[Tuple[str, Agent]]): (provider, agent) pairs in order of preference
+    """
+
+    def __init__(self, agents: List[Tuple[str, Agent]]):
+        primary = agents[0][1]
+        super().__init__(AgentOptions(name=primary.name, description=primary.description, save_chat=primary.save_chat))
+        self.agents = agents
+
+    def is_streaming_enabled(self) -> bool:
+        return self.agents[0][1].is_streaming_enabled()
+
+    async def process_request(
+        self,
+        input_text: str,
+        user_id: str,
+        session_id: str,
+        chat_history: List[ConversationMessage],
+        additional_params: Optional[Dict[str, str]] = None
+    ) -> Union[ConversationMessage, AsyncIterable[Any]]:
+        for index, (provider, agent) in enumerate(self.agents):
+            emitted = text_emitted()
+            with track_calls() as calls:
+                try:
+                    return await agent.process_request(input_text, user_id, session_id, chat_history, additional_params)
+                except ProviderUnavailable as e:
+                    if index == len(self.agents) - 1:
+                        raise
+                    if calls.completed or text_emitted() != emitted:
+                        logger.warning(f"Agent {self.name}: {e} after the request made progress, not failing over")
+                        raise
+                    _record_failover('Agent', self.name, e, self.agents[index + 1][0])
+
+class FailoverClassifier(Classifier):
+    """
+    LLM classifiers for each provider, tried in order. Classification calls are scheduled ahead of
+    every other model call (PRIORITY_CLASSIFIER).
+
+    Args:
+        classifiers (List[Tuple[str, Classifier]]): (provider, classifier) pairs in order of preference
+    """
+
+    def __init__(self, classifiers: List[Tuple[str, Classifier]]):
+        super().__init__()
+        self.classifiers = classifiers
+        self.model_id = getattr(classifiers[0][1], 'model_id', None)
+
+    def set_agents(self, agents: Dict[str, Agent]) -> None:
+        super().set_agents(agents)
+        for _, classifier in self.classifiers:
+            classifier.set_agents(agents)
+
+    async def classify(self, input_text: str, chat_history: List[ConversationMessage]) -> ClassifierResult:
+        for index, (provider, classifier) in enumerate(self.classifiers):
+            # The LLM classifiers keep the filled-in prompt on themselves; copy per request for concurrent sessions
+            classifier = copy.copy(classifier)
+            try:
+                classifier.set_history(chat_history)
+                classifier.update_system_prompt()
+                estimated = estimate_call_tokens(len(classifier.system_prompt) + len(input_text),
+                                                 classifier.inference_config.get('maxTokens') or classifier.inference_config.get('max_tokens'))
+                async with await scheduler.acquire(provider, PRIORITY_CLASSIFIER, estimated):
+                    return await classifier.process_request(input_text, chat_history)
+            except ProviderUnavailable as e:
+                if index == len(self.classifiers) - 1:
+                    raise
+                _record_failover('Classifier', type(classifier).__name__, e, self.classifiers[index + 1][0])
+
+    async def process_request(self, input_text: str, chat_history: List[ConversationMessage]) -> ClassifierResult:
+        return await self.classify(input_text, chat_history)
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
+from ..tracing import current_span
+
+logger = logging.getLogger()
+
+HISTORY_KEEP_TURNS = int(os.getenv('HISTORY_KEEP_TURNS', '3'))
+HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', '8000'))
+# Older text blocks longer than this many characters are cut down to it
+HISTORY_SUMMARY_CHARS = int(os.getenv('HISTORY_SUMMARY_CHARS', '600'))
+SUMMARY_CACHE_SIZE = 1024
+
+def estimate_tokens(content) -> int:
+    """Rough token count (4 characters per token) of message content"""
+    return len(json.dumps(content, default=str)) // 4
+
+def _block_key(block: Dict) -> str:
+    return hashlib.sha1(json.dumps(block, sort_keys=True, default=str).encode()).hexdigest()
+
+class HistoryManager:
+    """
+    Shapes the chat history handed to an agent: the last keep_turns turns are passed verbatim; in older
+    turns tool calls and tool results become one-line summaries and long texts are shortened (summaries
+    are cached, so a turn is summarized once per process). If the history is still over the agent's
+    token budget, the oldest turns are dropped.
+
+    Args:
+        keep_turns (int): Most recent turns (a user message and the replies to it) kept verbatim
+        token_budget (int): Default estimated-token budget for the history of one agent call
+        agent_budgets (dict): Budget overrides by agent id
+    """
+
+    def __init__(self, keep_turns: int = HISTORY_KEEP_TURNS, token_budget: int = HISTORY_TOKEN_BUDGET,
+                 agent_budgets: Optional[Dict[str, int]] = None, summary_chars: int = HISTORY_SUMMARY_CHARS):
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.agent_budgets = dict(agent_budgets or {})
+        self.summary_chars = summary_chars
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {}
+
+    def budget_for(self, agent_id: str) -> int:
+        return self.agent_budgets.get(agent_id, self.token_budget)
+
+    @staticmethod
+    def split_turns(messages: List[ConversationMessage]) -> List[List[ConversationMessage]]:
+        """Group messages into turns, each starting at a user message that is not a tool result"""
+        turns = []
+        for message in messages:
+            content = message.content or []
+            is_tool_result = bool(content) and all('toolResult' in block for block in content)
+            if not turns or (message.role == ParticipantRole.USER.value and not is_tool_result):
+                turns.append([])
+            turns[-1].append(message)
+        return turns
+
+    def _summarize_block(self, block: Dict) -> Dict:
+        if 'toolUse' in block:
+            tool_use = block['toolUse']
+            return {'text': f"[Called tool {tool_use.get('name')} with {json.dumps(tool_use.get('input'), default=str)}]"}
+        if 'toolResult' in block:
+            size = len(json.dumps(block['toolResult'].get('content'), default=str))
+            status = block['toolResult'].get('status', 'success')
+            return {'text': f"[Tool result ({status}, {size} characters) omitted from earlier turn]"}
+        text = block.get('text')
+        if isinstance(text, str) and len(text) > self.summary_chars:
+            omitted = len(text) - self.summary_chars
+            return {'text': f"{text[:self.summary_chars]} [... {omitted} characters omitted from earlier turn]"}
+        return block
+
+    def summarize_block(self, block: Dict) -> Dict:
+        """Cached short form of one content block from an older turn"""
+        key = _block_key(block)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+                return summary
+        summary = self._summarize_block(block)
+        with self._lock:
+            self._summaries[key] = summary
+            if len(self._summaries) > SUMMARY_CACHE_SIZE:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def _summarize_turn(self, turn: List[ConversationMessage]) -> List[ConversationMessage]:
+        summarized = []
+        for message in turn:
+            content = [self.summarize_block(block) for block in message.content or []]
+            # A tool result message becomes plain text; merge it into the previous message of the same role
+            if summarized and summarized[-1].role == message.role:
+                summarized[-1].content.extend(content)
+            else:
+                summarized.append(ConversationMessage(role=message.role, content=content))
+        return summarized
+
+    def prepare(self, agent_id: str, messages: List[ConversationMessage]) -> List[ConversationMessage]:
+        """The history to pass to agent_id in place of messages"""
+        turns = self.split_turns(messages)
+        split = max(len(turns) - self.keep_turns, 0)
+        older, recent = turns[:split], turns[split:]
+
+        turns = [self._summarize_turn(turn) for turn in older] + recent
+        costs = [sum(estimate_tokens(message.content) for message in turn) for turn in turns]
+
+        budget = self.budget_for(agent_id)
+        dropped = 0
+        while len(turns) > 1 and sum(costs) > budget:
+            turns.pop(0)
+            costs.pop(0)
+            dropped += 1
+
+        history = [message for turn in turns for message in turn]
+        self._record(agent_id, messages, history, len(older), dropped, sum(costs))
+        return history
+
+    def _record(self, agent_id, messages, history, summarized_turns, dropped_turns, tokens_out):
+        tokens_in = sum(estimate_tokens(message.content) for message in messages)
+        with self._lock:
+            metrics = self.metrics.setdefault(agent_id, {
+                'calls': 0, 'messages_in': 0, 'messages_out': 0, 'tokens_in': 0, 'tokens_out': 0,
+                'summarized_turns': 0, 'dropped_turns': 0
+            })
+            metrics['calls'] += 1
+            metrics['messages_in'] += len(messages)
+            metrics['messages_out'] += len(history)
+            metrics['tokens_in'] += tokens_in
+            metrics['tokens_out'] += tokens_out
+            metrics['summarized_turns'] += summarized_turns
+            metrics['dropped_turns'] += dropped_turns
+
+        logger.info(f"History for {agent_id}: {len(messages)} -> {len(history)} messages, "
+                    f"~{tokens_in} -> ~{tokens_out} tokens (budget {self.budget_for(agent_id)}), "
+                    f"{summarized_turns} turns summarized, {dropped_turns} dropped")
+        active = current_span()
+        if active is not None:
+            active.set_attribute('history_messages', len(history))
+            active.set_attribute('history_tokens_before', tokens_in)
+            active.set_attribute('history_tokens_after', tokens_out)
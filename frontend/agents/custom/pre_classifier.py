@@ -0,0 +1,145 @@
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+from multi_agent_orchestrator.agents import Agent
+from multi_agent_orchestrator.classifiers import Classifier, ClassifierResult
+from multi_agent_orchestrator.types import ConversationMessage
+from ..player_resolver import player_resolver
+from ..tracing import current_span
+
+logger = logging.getLogger()
+
+# Local decisions below this confidence go to the LLM classifier instead
+PRE_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv('PRE_CLASSIFIER_MIN_CONFIDENCE', '0.8'))
+
+# A build verb directly before the team noun, with at most a few filler words in between ("build me a
+# new team"); "the"/"this" would refer to a team that already exists
+TEAM_BUILD_PATTERNS = [
+    r"\b(build|make|create|construct|assemble|form|draft|put together|give me|suggest)\s+"
+    r"(?:(?:me|us|a|an|new|full|whole|optimal|balanced|strong|competitive|valorant|vct|5-man|five-man|"
+    r"game|changers|game-changers|gc|challengers|international|mixed|dream)\s+){0,3}"
+    r"(team|roster|lineup|line-up|squad)\b",
+    r"\bteam\s+(composition|comp|building|builder)\b",
+    r"\b(5|five)[- ]?(stack|man|player)s?\b",
+]
+PLAYER_INTENT_PATTERNS = [
+    r"\b(stats?|statistics|kda|acs|combat score|performance|how good|how well|tell me (more )?about|who is|compare|play(s|ed)?|main(s)?|agents?|maps?)\b",
+]
+# Asking about a team that was already built goes to the analyst (see its agent description)
+FOLLOW_UP_PATTERNS = [
+    r"\bwhy (did you|was|were|is|are)\b.{0,40}\b(pick|picked|choose|chose|chosen|select|selected|included?|make|made|build|built)\b",
+    r"\b(swap|replace|instead of)\b",
+    r"\b(the|this|that|your)\s+(team|roster|lineup|line-up|squad)\b",
+]
+# Questions and possessives ("TenZ's team") are never build requests, even with a build verb in them
+QUESTION_PATTERNS = [
+    r"^\s*(why|what|how|which|who|when|where)\b",
+    r"\w['’]s\s+(team|roster|lineup|line-up|squad)\b",
+]
+# Handles that are also everyday words are only trusted together with a player intent keyword
+COMMON_WORD_HANDLES = {'ace', 'the', 'team', 'best', 'top', 'good', 'build', 'player', 'players', 'map', 'maps'}
+
+_word_pattern = re.compile(r"[\w.\-]+")
+
+def _matches(patterns: List[str], text: str) -> bool:
+    return any(re.search(pattern, text, re.IGNORECASE) for pattern in patterns)
+
+class PreClassifier(Classifier):
+    """
+    Routes unambiguous inputs locally with keyword rules and a dictionary of known player handles, and
+    falls back to the LLM classifier when the local decision is not confident enough.
+
+    Args:
+        fallback (Classifier): LLM classifier for everything the rules do not settle
+        team_agent_id (str): Agent for team building requests
+        analyst_agent_id (str): Agent for player questions and follow-ups on a built team
+        min_confidence (float): Lowest local confidence that skips the fallback
+    """
+
+    def __init__(self, fallback: Classifier, team_agent_id: str, analyst_agent_id: str,
+                 min_confidence: float = PRE_CLASSIFIER_MIN_CONFIDENCE, resolver=player_resolver):
+        super().__init__()
+        self.fallback = fallback
+        self.team_agent_id = team_agent_id
+        self.analyst_agent_id = analyst_agent_id
+        self.min_confidence = min_confidence
+        self.resolver = resolver
+        self._lock = threading.Lock()
+        self.stats = {'local': 0, 'fallback': 0}
+
+    def set_agents(self, agents: Dict[str, Agent]) -> None:
+        super().set_agents(agents)
+        self.fallback.set_agents(agents)
+
+    def _mentioned_handles(self, text: str) -> List[str]:
+        try:
+            handles = self.resolver.known_handles()
+        except Exception as e:
+            logger.warning(f"Player handles unavailable for pre-classification: {str(e)}")
+            return []
+        if not handles:
+            return []
+        words = [word.strip('.-').lower() for word in _word_pattern.findall(text)]
+        candidates = set(words) | {f"{first} {second}" for first, second in zip(words, words[1:])}
+        return sorted(word for word in candidates if len(word) >= 2 and word in handles)
+
+    def rule_based(self, input_text: str) -> Tuple[Optional[str], float, str]:
+        """(agent id or None, confidence, reason) from the local rules alone"""
+        text = input_text.strip()
+        if not text:
+            return None, 0.0, "empty input"
+
+        follow_up = _matches(FOLLOW_UP_PATTERNS, text)
+        team_build = not _matches(QUESTION_PATTERNS, text) and _matches(TEAM_BUILD_PATTERNS, text)
+        if team_build and follow_up:
+            return None, 0.5, "team building and follow-up keywords"
+        if team_build:
+            return self.team_agent_id, 0.95, "team building request"
+        if follow_up:
+            return self.analyst_agent_id, 0.85, "follow-up on a team"
+
+        handles = self._mentioned_handles(text)
+        player_intent = _matches(PLAYER_INTENT_PATTERNS, text)
+        if handles:
+            trusted = [handle for handle in handles if handle not in COMMON_WORD_HANDLES]
+            if trusted and player_intent:
+                return self.analyst_agent_id, 0.95, f"player question about {', '.join(trusted)}"
+            if trusted:
+                return self.analyst_agent_id, 0.85, f"mentions player {', '.join(trusted)}"
+            if player_intent:
+                return self.analyst_agent_id, 0.7, f"player question mentioning {', '.join(handles)}"
+            return self.analyst_agent_id, 0.5, f"mentions {', '.join(handles)}"
+
+        if player_intent:
+            return self.analyst_agent_id, 0.6, "player keywords without a known player"
+        return None, 0.0, "no rule matched"
+
+    def _record(self, route: str, input_text: str, agent_id: Optional[str], confidence: float, reason: str):
+        with self._lock:
+            self.stats[route] += 1
+            local = self.stats['local']
+            total = local + self.stats['fallback']
+        logger.info(f"Routing decision: route={route} agent={agent_id} confidence={confidence:.2f} "
+                    f"reason={reason!r} local_hit_rate={local / total:.2f} ({local}/{total}) input={input_text[:80]!r}")
+        active = current_span()
+        if active is not None:
+            active.set_attribute('route', route)
+            active.set_attribute('route_reason', reason)
+
+    async def classify(self, input_text: str, chat_history: List[ConversationMessage]) -> ClassifierResult:
+        agent_id, confidence, reason = self.rule_based(input_text)
+        if agent_id is not None and confidence >= self.min_confidence:
+            agent = self.get_agent_by_id(agent_id)
+            if agent is not None:
+                self._record('local', input_text, agent_id, confidence, reason)
+                return ClassifierResult(selected_agent=agent, confidence=confidence)
+
+        result = await self.fallback.classify(input_text, chat_history)
+        selected = result.selected_agent.id if result.selected_agent else None
+        self._record('fallback', input_text, selected, result.confidence, f"{reason} (local confidence {confidence:.2f})")
+        return result
+
+    async def process_request(self, input_text: str, chat_history: List[ConversationMessage]) -> ClassifierResult:
+        return await self.classify(input_text, chat_history)
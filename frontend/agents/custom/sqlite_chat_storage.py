@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+from multi_agent_orchestrator.storage import ChatStorage, InMemoryChatStorage
+from multi_agent_orchestrator.types import ConversationMessage
+
+logger = logging.getLogger()
+
+# Sessions idle for longer than this are deleted
+CHAT_STORAGE_MAX_AGE = float(os.getenv('CHAT_STORAGE_MAX_AGE', str(7 * 86400)))
+# Upper bound on stored messages; the least recently active sessions are deleted beyond it
+CHAT_STORAGE_MAX_MESSAGES = int(os.getenv('CHAT_STORAGE_MAX_MESSAGES', '50000'))
+# Eviction runs once every this many saved messages
+EVICT_EVERY = 100
+
+class SQLiteChatStorage(ChatStorage):
+    """
+    Chat history in a SQLite database, kept across restarts and shared by every session in the process.
+    Messages are indexed by (user, session, agent). Whole sessions are evicted, when idle for longer
+    than max_age_seconds or when the table holds more than max_messages, so a conversation never loses
+    its opening turns.
+
+    Args:
+        path (str): Database file, or ':memory:'
+        max_age_seconds (float): Idle time after which a session is deleted
+        max_messages (int): Most messages kept across all sessions
+    """
+
+    def __init__(self, path: str, max_age_seconds: float = CHAT_STORAGE_MAX_AGE,
+                 max_messages: int = CHAT_STORAGE_MAX_MESSAGES):
+        super().__init__()
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        self._saves = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS chat_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    agent_id TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS chat_messages_conversation ON chat_messages (user_id, session_id, agent_id, id)"
+            )
+        self.evict()
+
+    @staticmethod
+    def _to_messages(rows) -> List[ConversationMessage]:
+        return [ConversationMessage(role=role, content=json.loads(content)) for role, content in rows]
+
+    def _fetch(self, user_id: str, session_id: str, agent_id: str) -> List[ConversationMessage]:
+        rows = self._conn.execute(
+            "SELECT role, content FROM chat_messages WHERE user_id = ? AND session_id = ? AND agent_id = ? ORDER BY id",
+            (user_id, session_id, agent_id)
+        ).fetchall()
+        return self._to_messages(rows)
+
+    async def save_chat_message(self,
+                                user_id: str,
+                                session_id: str,
+                                agent_id: str,
+                                new_message: ConversationMessage,
+                                max_history_size: Optional[int] = None) -> List[ConversationMessage]:
+        with self._lock, self._conn:
+            last = self._conn.execute(
+                "SELECT role FROM chat_messages WHERE user_id = ? AND session_id = ? AND agent_id = ? ORDER BY id DESC LIMIT 1",
+                (user_id, session_id, agent_id)
+            ).fetchone()
+            if last is not None and last[0] == new_message.role:
+                logger.debug(f"Consecutive {new_message.role} message for agent {agent_id}, not saving")
+                return self._fetch(user_id, session_id, agent_id)
+
+            self._conn.execute(
+                "INSERT INTO chat_messages (user_id, session_id, agent_id, role, content, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, session_id, agent_id, new_message.role, json.dumps(new_message.content, default=str), time.time())
+            )
+            if max_history_size is not None:
+                # Same rule as ChatStorage.trim_conversation: keep an even number of messages
+                keep = max_history_size - (max_history_size % 2)
+                self._conn.execute(
+                    "DELETE FROM chat_messages WHERE user_id = ? AND session_id = ? AND agent_id = ? AND id NOT IN "
+                    "(SELECT id FROM chat_messages WHERE user_id = ? AND session_id = ? AND agent_id = ? ORDER BY id DESC LIMIT ?)",
+                    (user_id, session_id, agent_id, user_id, session_id, agent_id, keep)
+                )
+            conversation = self._fetch(user_id, session_id, agent_id)
+            self._saves += 1
+            evict = self._saves % EVICT_EVERY == 0
+
+        if evict:
+            self.evict()
+        return conversation
+
+    async def fetch_chat(self,
+                         user_id: str,
+                         session_id: str,
+                         agent_id: str,
+                         max_history_size: Optional[int] = None) -> List[ConversationMessage]:
+        with self._lock:
+            conversation = self._fetch(user_id, session_id, agent_id)
+        return self.trim_conversation(conversation, max_history_size)
+
+    async def fetch_all_chats(self, user_id: str, session_id: str) -> List[ConversationMessage]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM chat_messages WHERE user_id = ? AND session_id = ? ORDER BY id",
+                (user_id, session_id)
+            ).fetchall()
+        return self._to_messages(rows)
+
+    def evict(self) -> int:
+        """Delete idle sessions, then the least recently active ones while over max_messages. Returns rows deleted."""
+        cutoff = time.time() - self.max_age_seconds
+        deleted = 0
+        try:
+            with self._lock, self._conn:
+                deleted += self._conn.execute(
+                    "DELETE FROM chat_messages WHERE (user_id, session_id) IN "
+                    "(SELECT user_id, session_id FROM chat_messages GROUP BY user_id, session_id HAVING MAX(created_at) < ?)",
+                    (cutoff,)
+                ).rowcount
+
+                excess = self._conn.execute("SELECT COUNT(*) FROM chat_messages").fetchone()[0] - self.max_messages
+                if excess > 0:
+                    sessions = self._conn.execute(
+                        "SELECT user_id, session_id, COUNT(*) FROM chat_messages "
+                        "GROUP BY user_id, session_id ORDER BY MAX(id)"
+                    ).fetchall()
+                    for user_id, session_id, count in sessions:
+                        if excess <= 0:
+                            break
+                        self._conn.execute(
+                            "DELETE FROM chat_messages WHERE user_id = ? AND session_id = ?", (user_id, session_id)
+                        )
+                        excess -= count
+                        deleted += count
+        except sqlite3.Error as e:
+            logger.warning(f"Chat storage eviction failed: {str(e)}")
+        if deleted:
+            logger.info(f"Evicted {deleted} chat messages from {self.path}")
+        return deleted
+
+def create_chat_storage() -> ChatStorage:
+    """
+    Create the chat storage. CHAT_STORAGE_BACKEND picks 'sqlite' (default, stored at CHAT_STORAGE_PATH,
+    default chat_history.sqlite3) or 'memory' (the library's unbounded InMemoryChatStorage).
+    """
+    if os.getenv('CHAT_STORAGE_BACKEND', 'sqlite') == 'sqlite':
+        path = os.getenv('CHAT_STORAGE_PATH', 'chat_history.sqlite3')
+        try:
+            return SQLiteChatStorage(path)
+        except sqlite3.Error as e:
+            logger.warning(f"Falling back to in-memory chat storage, could not open {path}: {str(e)}")
+    return InMemoryChatStorage()
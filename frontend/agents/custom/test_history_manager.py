@@ -0,0 +1,97 @@
+"""
+    cd frontend && python -m pytest agents/custom/test_history_manager.py
+"""
+import copy
+from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
+from agents.custom.history_manager import HistoryManager
+
+USER = ParticipantRole.USER.value
+ASSISTANT = ParticipantRole.ASSISTANT.value
+
+def text(role, value):
+    return ConversationMessage(role=role, content=[{'text': value}])
+
+def tool_turn(question, answer):
+    """A user question, a tool call, its result and the final answer"""
+    return [
+        text(USER, question),
+        ConversationMessage(role=ASSISTANT, content=[
+            {'text': 'Let me look that up.'},
+            {'toolUse': {'toolUseId': 't1', 'name': 'build_team', 'input': {'count': 2}}}
+        ]),
+        ConversationMessage(role=USER, content=[
+            {'toolResult': {'toolUseId': 't1', 'content': [{'json': {'players': ['TenZ'] * 50}}]}}
+        ]),
+        text(ASSISTANT, answer),
+    ]
+
+def content_of(messages):
+    return [(message.role, message.content) for message in messages]
+
+def test_last_turns_are_kept_verbatim():
+    manager = HistoryManager(keep_turns=2, token_budget=10**6)
+    messages = tool_turn("first", "a" * 2000) + tool_turn("second", "b") + tool_turn("third", "c")
+
+    history = manager.prepare('analyst', messages)
+    assert content_of(history[-8:]) == content_of(messages[-8:])
+
+def test_older_tool_blocks_become_summaries_without_changing_stored_messages():
+    manager = HistoryManager(keep_turns=1, token_budget=10**6, summary_chars=100)
+    messages = tool_turn("first", "a" * 2000) + [text(USER, "second"), text(ASSISTANT, "b")]
+    stored = copy.deepcopy(content_of(messages))
+
+    history = manager.prepare('analyst', messages)
+    older = history[:-2]
+    blocks = [block for message in older for block in message.content]
+    assert all(set(block) == {'text'} for block in blocks)
+    assert any(block['text'].startswith('[Called tool build_team') for block in blocks)
+    assert any(block['text'].startswith('[Tool result (success') for block in blocks)
+    assert any('characters omitted from earlier turn' in block['text'] for block in blocks)
+    assert [message.role for message in older] == [USER, ASSISTANT, USER, ASSISTANT]
+    assert content_of(messages) == stored
+
+    # Summaries come from the cache the second time and still leave the stored messages alone
+    manager.prepare('analyst', messages)
+    assert content_of(messages) == stored
+
+def test_same_role_messages_are_merged_into_a_new_message():
+    manager = HistoryManager(keep_turns=1, token_budget=10**6)
+    first_reply = ConversationMessage(role=ASSISTANT, content=[
+        {'toolUse': {'toolUseId': 't1', 'name': 'get_player_stats', 'input': {'handle': 'TenZ'}}}
+    ])
+    messages = [text(USER, "first"), first_reply, text(ASSISTANT, "done"), text(USER, "second"), text(ASSISTANT, "b")]
+    stored = copy.deepcopy(content_of(messages))
+
+    history = manager.prepare('analyst', messages)
+    assert [message.role for message in history[:-2]] == [USER, ASSISTANT]
+    assert [block['text'][:13] for block in history[1].content] == ['[Called tool ', 'done']
+    assert history[1] is not first_reply
+    assert content_of(messages) == stored
+
+def test_over_budget_drops_oldest_turns_but_keeps_one():
+    manager = HistoryManager(keep_turns=3, token_budget=300)
+    messages = [text(USER, "q1"), text(ASSISTANT, "x" * 2000),
+                text(USER, "q2"), text(ASSISTANT, "y" * 400),
+                text(USER, "q3"), text(ASSISTANT, "z")]
+
+    history = manager.prepare('analyst', messages)
+    assert content_of(history) == content_of(messages[2:])
+
+    history = HistoryManager(keep_turns=3, token_budget=1).prepare('analyst', messages)
+    assert content_of(history) == content_of(messages[-2:])
+
+def test_metrics_are_recorded_per_agent():
+    manager = HistoryManager(keep_turns=1, token_budget=10**6, agent_budgets={'chain': 1})
+    messages = tool_turn("first", "a") + [text(USER, "second"), text(ASSISTANT, "b")]
+
+    manager.prepare('analyst', messages)
+    manager.prepare('analyst', messages)
+    manager.prepare('chain', messages)
+
+    assert manager.budget_for('chain') == 1 and manager.budget_for('analyst') == 10**6
+    analyst, chain = manager.metrics['analyst'], manager.metrics['chain']
+    assert analyst['calls'] == 2 and chain['calls'] == 1
+    assert analyst['messages_in'] == 2 * len(messages)
+    assert analyst['summarized_turns'] == 2 and analyst['dropped_turns'] == 0
+    assert chain['dropped_turns'] == 1 and chain['messages_out'] == 2
+    assert chain['tokens_out'] < chain['tokens_in']
@@ -0,0 +1,52 @@
+"""
+Local routing rules with a stub handle dictionary:
+    cd frontend && python -m pytest agents/custom/test_pre_classifier.py
+"""
+import pytest
+from multi_agent_orchestrator.classifiers import Classifier
+from agents.custom.pre_classifier import PreClassifier
+
+class NoFallback(Classifier):
+    async def process_request(self, input_text, chat_history):
+        raise AssertionError("rule_based never calls the fallback")
+
+class StubResolver:
+    def known_handles(self):
+        return {'tenz', 'aspas', 'ace'}
+
+@pytest.fixture
+def pre_classifier(monkeypatch):
+    # The library's Classifier base builds a default Bedrock agent, which needs a region
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    return PreClassifier(NoFallback(), team_agent_id='chain', analyst_agent_id='analyst', resolver=StubResolver())
+
+@pytest.mark.parametrize("text, agent_id", [
+    ("Build a team using players from VCT International.", 'chain'),
+    ("build me a new team with 2 from each", 'chain'),
+    ("Make a team of game changers players", 'chain'),
+    ("Build a game changers team", 'chain'),
+    ("give me a roster", 'chain'),
+    ("what's the best team composition for ascent", None),
+    ("why did you make this team?", 'analyst'),
+    ("Why did you pick aspas?", 'analyst'),
+    ("Make the team more aggressive", 'analyst'),
+    ("swap the duelist for someone else", 'analyst'),
+    ("Give me TenZ's team history", 'analyst'),
+    ("What team would TenZ build?", 'analyst'),
+])
+def test_routes(pre_classifier, text, agent_id):
+    routed, confidence, reason = pre_classifier.rule_based(text)
+    if agent_id is None:
+        assert routed != 'chain', reason
+    else:
+        assert routed == agent_id, reason
+        assert confidence >= pre_classifier.min_confidence, reason
+
+@pytest.mark.parametrize("text", [
+    "why did you make this team?",
+    "Give me TenZ's team history",
+    "Make the team more aggressive",
+    "What team would you build?",
+])
+def test_questions_and_follow_ups_never_start_a_team_build(pre_classifier, text):
+    assert pre_classifier.rule_based(text)[0] != 'chain'
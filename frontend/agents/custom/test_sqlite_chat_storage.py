@@ -0,0 +1,54 @@
+"""
+    cd frontend && python -m pytest agents/custom/test_sqlite_chat_storage.py
+"""
+import asyncio
+import time
+from multi_agent_orchestrator.types import ConversationMessage
+from agents.custom.sqlite_chat_storage import SQLiteChatStorage
+
+def message(role, text):
+    return ConversationMessage(role=role, content=[{'text': text}])
+
+def texts(messages):
+    return [(m.role, m.content[0]['text']) for m in messages]
+
+def test_round_trip_by_user_session_and_agent():
+    storage = SQLiteChatStorage(':memory:')
+
+    async def run():
+        await storage.save_chat_message('u', 's', 'analyst', message('user', 'who is tenz'))
+        await storage.save_chat_message('u', 's', 'analyst', message('assistant', 'a player'))
+        await storage.save_chat_message('u', 's', 'chain', message('user', 'build a team'))
+        await storage.save_chat_message('u', 'other', 'analyst', message('user', 'elsewhere'))
+        # a second user message in a row is not stored
+        await storage.save_chat_message('u', 's', 'chain', message('user', 'build a team again'))
+        return (await storage.fetch_chat('u', 's', 'analyst'), await storage.fetch_all_chats('u', 's'))
+
+    chat, all_chats = asyncio.run(run())
+    assert texts(chat) == [('user', 'who is tenz'), ('assistant', 'a player')]
+    assert texts(all_chats) == [('user', 'who is tenz'), ('assistant', 'a player'), ('user', 'build a team')]
+
+def test_max_history_size_keeps_the_latest_pairs():
+    storage = SQLiteChatStorage(':memory:')
+
+    async def run():
+        for turn in range(4):
+            await storage.save_chat_message('u', 's', 'a', message('user', f'q{turn}'), max_history_size=5)
+            await storage.save_chat_message('u', 's', 'a', message('assistant', f'a{turn}'), max_history_size=5)
+        return await storage.fetch_chat('u', 's', 'a')
+
+    assert [m.content[0]['text'] for m in asyncio.run(run())] == ['q2', 'a2', 'q3', 'a3']
+
+def test_evicts_idle_and_least_recent_sessions():
+    storage = SQLiteChatStorage(':memory:', max_age_seconds=60, max_messages=4)
+
+    async def run():
+        for session in ('old', 'idle', 'recent', 'latest'):
+            await storage.save_chat_message('u', session, 'a', message('user', 'q'))
+            await storage.save_chat_message('u', session, 'a', message('assistant', 'a'))
+        with storage._conn:
+            storage._conn.execute("UPDATE chat_messages SET created_at = ? WHERE session_id = 'old'", (time.time() - 120,))
+        storage.evict()
+        return {session: len(await storage.fetch_all_chats('u', session)) for session in ('old', 'idle', 'recent', 'latest')}
+
+    assert asyncio.run(run()) == {'old': 0, 'idle': 0, 'recent': 2, 'latest': 2}
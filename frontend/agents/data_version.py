@@ -0,0 +1,68 @@
+import logging
+import os
+import threading
+import time
+import psycopg2
+from .tracing import TracedCursor
+
+logger = logging.getLogger()
+
+DATA_VERSION_POLL_SECONDS = float(os.getenv('DATA_VERSION_POLL_SECONDS', '30'))
+
+_lock = threading.Lock()
+_cached_version = 0
+_checked_at = 0.0
+
+def get_db_connection():
+    db_url = os.getenv('RDS_DATABASE_URL')
+    return psycopg2.connect(db_url, cursor_factory=TracedCursor)
+
+def _read_data_version(conn) -> int:
+    with conn.cursor(cursor_factory=TracedCursor) as cur:
+        cur.execute("SELECT to_regclass('data_version') IS NOT NULL AS present")
+        if not cur.fetchone()['present']:
+            return 0
+        cur.execute("SELECT version FROM data_version WHERE id = 1")
+        row = cur.fetchone()
+        return int(row['version']) if row else 0
+
+def get_data_version(conn=None) -> int:
+    """
+    Get the data version bumped by the ingest scripts (backend/scripts/bump_data_version.py).
+    The value is re-read at most once every DATA_VERSION_POLL_SECONDS; if the read fails the
+    last known version is returned so callers keep serving from their caches.
+
+    Args:
+        conn (optional): Open connection to reuse instead of opening a new one
+    """
+    global _cached_version, _checked_at
+
+    with _lock:
+        if time.monotonic() - _checked_at < DATA_VERSION_POLL_SECONDS:
+            return _cached_version
+
+    try:
+        if conn is not None:
+            version = _read_data_version(conn)
+        else:
+            new_conn = get_db_connection()
+            try:
+                version = _read_data_version(new_conn)
+            finally:
+                new_conn.close()
+    except Exception as e:
+        logger.warning(f"Could not read data version, keeping {_cached_version}: {str(e)}")
+        version = _cached_version
+
+    with _lock:
+        if version != _cached_version:
+            logger.info(f"Data version changed from {_cached_version} to {version}")
+        _cached_version = version
+        _checked_at = time.monotonic()
+        return _cached_version
+
+def reset_data_version_check():
+    """Force the next get_data_version call to re-read the version from the database"""
+    global _checked_at
+    with _lock:
+        _checked_at = 0.0
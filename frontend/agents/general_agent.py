@@ -1,20 +1,31 @@
 from typing import Dict, Optional, Union
 import psycopg2
-from psycopg2.extras import RealDictCursor
 import logging
 import os
-import json
-import asyncio
 from .custom.custom_bedrock_agent import CustomBedrockLLMAgent
 from .custom.custom_anthropic_agent import CustomAnthropicAgent
+from .data_version import get_data_version
+from .result_cache import create_result_cache
+from .player_resolver import player_resolver
+from .tracing import run_in_executor, TracedCursor
+from .streaming import STREAM_RESPONSES
+from .tool_dispatch import dispatch_bedrock_tool_uses, dispatch_anthropic_tool_uses
 from multi_agent_orchestrator.agents import BedrockLLMAgent, BedrockLLMAgentOptions, AnthropicAgentOptions
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Stats only change when the ingest pipeline runs, so entries live until the data version moves
+# (or the TTL passes as a safety net)
+player_stats_cache = create_result_cache(
+    'player_stats',
+    max_entries=int(os.getenv('PLAYER_STATS_CACHE_SIZE', '512')),
+    ttl_seconds=float(os.getenv('PLAYER_STATS_CACHE_TTL', '3600'))
+)
+
 def get_db_connection():
     db_url = os.getenv('RDS_DATABASE_URL')
-    return psycopg2.connect(db_url, cursor_factory=RealDictCursor)
+    return psycopg2.connect(db_url, cursor_factory=TracedCursor)
 
 def get_player_comprehensive_stats(player_identifier: Optional[str] = None,
                                  first_name: Optional[str] = None,
@@ -31,58 +42,75 @@ def get_player_comprehensive_stats(player_identifier: Optional[str] = None,
         search_type (str): Type of search to perform ('handle' or 'name')
     """
     try:
+        if search_type == 'handle':
+            if not player_identifier:
+                return {"status": "error", "message": "Player identifier required for handle search"}
+        elif not first_name and not last_name:
+            return {"status": "error", "message": "Either first_name or last_name required for name search"}
+
+        # Resolve the player from the in-memory trigram index; a cached result then needs no DB round trip
+        player_id = None
+        candidates = player_resolver.resolve(player_identifier, first_name, last_name, search_type, k=1)
+        if candidates:
+            player_id = candidates[0]['player_id']
+            data_version = get_data_version()
+            cached_stats = player_stats_cache.get(player_id, data_version)
+            if cached_stats is not None:
+                logger.info(f"Serving cached stats for player {player_id} (data version {data_version})")
+                return cached_stats
+
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # First, get the correct player_id using fuzzy matching if needed
-                if search_type == 'handle':
-                    if not player_identifier:
-                        return {"status": "error", "message": "Player identifier required for handle search"}
-                    
-                    player_query = """
-                    SELECT player_id, similarity(LOWER(handle), LOWER(%s)) AS sim
-                    FROM (
-                        SELECT DISTINCT ON (LOWER(handle)) *
-                        FROM players
-                        WHERE similarity(LOWER(handle), LOWER(%s)) > 0.3
-                        ORDER BY LOWER(handle), updated_at DESC
-                    ) subquery
-                    ORDER BY sim DESC
-                    LIMIT 1;
-                    """ 
-                    cur.execute(player_query, (player_identifier, player_identifier))
-                else:  # search_type == 'name'
-                    if not first_name and not last_name:
-                        return {"status": "error", "message": "Either first_name or last_name required for name search"}
-                    
-                    player_query = """
-                    SELECT player_id, greatest_sim
-                    FROM (
-                        SELECT DISTINCT ON (COALESCE(LOWER(first_name), '') || COALESCE(LOWER(last_name), '')) 
-                            player_id,
-                            greatest(
-                                similarity(LOWER(first_name), LOWER(%s)),
-                                similarity(LOWER(last_name), LOWER(%s))
-                            ) AS greatest_sim
-                        FROM players
-                        WHERE similarity(LOWER(first_name), LOWER(%s)) > 0.3
-                        OR similarity(LOWER(last_name), LOWER(%s)) > 0.3
-                        ORDER BY COALESCE(LOWER(first_name), '') || COALESCE(LOWER(last_name), ''), 
-                                updated_at DESC
-                    ) subquery
-                    ORDER BY greatest_sim DESC
-                    LIMIT 1;
-                    """
-                    params = [first_name or '', last_name or '', first_name or '', last_name or '']
-                    cur.execute(player_query, params)
-                
-                player_result = cur.fetchone()
-                if not player_result:
-                    return {
-                        "status": "error",
-                        "message": f"Player not found using {'handle' if search_type == 'handle' else 'name'} search"
-                    }
+            with conn.cursor(cursor_factory=TracedCursor) as cur:
+                # Fall back to fuzzy matching in SQL if the resolver is unavailable or found nothing
+                if player_id is None:
+                    if search_type == 'handle':
+                        player_query = """
+                        SELECT player_id, similarity(LOWER(handle), LOWER(%s)) AS sim
+                        FROM (
+                            SELECT DISTINCT ON (LOWER(handle)) *
+                            FROM players
+                            WHERE similarity(LOWER(handle), LOWER(%s)) > 0.3
+                            ORDER BY LOWER(handle), updated_at DESC
+                        ) subquery
+                        ORDER BY sim DESC
+                        LIMIT 1;
+                        """ 
+                        cur.execute(player_query, (player_identifier, player_identifier))
+                    else:  # search_type == 'name'
+                        player_query = """
+                        SELECT player_id, greatest_sim
+                        FROM (
+                            SELECT DISTINCT ON (COALESCE(LOWER(first_name), '') || COALESCE(LOWER(last_name), '')) 
+                                player_id,
+                                greatest(
+                                    similarity(LOWER(first_name), LOWER(%s)),
+                                    similarity(LOWER(last_name), LOWER(%s))
+                                ) AS greatest_sim
+                            FROM players
+                            WHERE similarity(LOWER(first_name), LOWER(%s)) > 0.3
+                            OR similarity(LOWER(last_name), LOWER(%s)) > 0.3
+                            ORDER BY COALESCE(LOWER(first_name), '') || COALESCE(LOWER(last_name), ''), 
+                                    updated_at DESC
+                        ) subquery
+                        ORDER BY greatest_sim DESC
+                        LIMIT 1;
+                        """
+                        params = [first_name or '', last_name or '', first_name or '', last_name or '']
+                        cur.execute(player_query, params)
                 
-                player_id = player_result['player_id']
+                    player_result = cur.fetchone()
+                    if not player_result:
+                        return {
+                            "status": "error",
+                            "message": f"Player not found using {'handle' if search_type == 'handle' else 'name'} search"
+                        }
+                    player_id = player_result['player_id']
+
+                data_version = get_data_version(conn)
+                cached_stats = player_stats_cache.get(player_id, data_version)
+                if cached_stats is not None:
+                    logger.info(f"Serving cached stats for player {player_id} (data version {data_version})")
+                    return cached_stats
 
                 # Now execute our comprehensive stats query
                 stats_query = """
@@ -124,6 +152,7 @@ def get_player_comprehensive_stats(player_identifier: Optional[str] = None,
                         GROUP BY player_id, agent_name, agent_role
                     ),
 
+                    -- Event aggregates are precomputed per (player, map) by backend/scripts/insert_map_data.py
                     map_stats AS (
                         SELECT 
                             pmp.player_id,
@@ -133,14 +162,12 @@ def get_player_comprehensive_stats(player_identifier: Optional[str] = None,
                             pmp.total_deaths,
                             pmp.total_assists,
                             pmp.average_kda,
-                            COUNT(DISTINCT pd.platform_game_id) as matches_with_first_blood,
-                            COUNT(pd.event_id) FILTER (WHERE pd.killer_id = pmp.player_id) as total_kills_on_map,
-                            COUNT(pd.event_id) FILTER (WHERE pd.deceased_id = pmp.player_id) as total_deaths_on_map
+                            COALESCE(pmp.matches_with_first_blood, 0) as matches_with_first_blood,
+                            COALESCE(pmp.first_bloods, 0) as total_first_bloods_on_map,
+                            COALESCE(pmp.kills_on_map, 0) as total_kills_on_map,
+                            COALESCE(pmp.deaths_on_map, 0) as total_deaths_on_map
                         FROM player_map_performance pmp
-                        LEFT JOIN player_died pd ON pmp.player_id = pd.killer_id OR pmp.player_id = pd.deceased_id
                         WHERE pmp.player_id = %s
-                        GROUP BY pmp.player_id, pmp.map, pmp.games_played, pmp.total_kills, 
-                                pmp.total_deaths, pmp.total_assists, pmp.average_kda
                     ),
 
                     tournament_stats AS (
@@ -315,10 +342,12 @@ def get_player_comprehensive_stats(player_identifier: Optional[str] = None,
                 result = cur.fetchone()
                 
                 if result and result['player_complete_stats']:
-                    return {
+                    stats = {
                         "status": "success",
                         "data": result['player_complete_stats']
                     }
+                    player_stats_cache.set(player_id, stats, data_version)
+                    return stats
                 else:
                     return {
                         "status": "error",
@@ -329,86 +358,24 @@ def get_player_comprehensive_stats(player_identifier: Optional[str] = None,
         logger.error(f"Error in get_player_comprehensive_stats: {str(e)}", exc_info=True)
         return {"status": "error", "message": str(e)}
 
-async def bedrock_stats_handler(response, conversation):
-    """Handler for Bedrock LLM responses"""
-    try:
-        if isinstance(response.content, list) and len(response.content) > 0:
-            # Find the content item that contains toolUse
-            tool_use = None
-            for content_item in response.content:
-                if 'toolUse' in content_item:
-                    tool_use = content_item['toolUse']
-                    break
-            
-            if not tool_use:
-                return json.dumps({
-                    "status": "error",
-                    "message": "No tool use found in response"
-                })
-
-            input_data = tool_use.get('input', {})
-
-            # Add some debug logging
-            logger.info(f"Found input data: {input_data}")
-
-            result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                get_player_comprehensive_stats,
-                input_data.get('player_identifier'),
-                input_data.get('first_name'),
-                input_data.get('last_name'),
-                input_data.get('search_type', 'handle')
-            )
-
-            return json.dumps(result, default=str)
-        else:
-            return json.dumps({
-                "status": "error",
-                "message": "Unexpected response format"
-            })
+async def run_stats_tool(tool_name: str, tool_input: Dict) -> Dict:
+    """Run one get_player_stats call off the event loop"""
+    logger.info(f"Found input data: {tool_input}")
+    return await run_in_executor(
+        get_player_comprehensive_stats,
+        tool_input.get('player_identifier'),
+        tool_input.get('first_name'),
+        tool_input.get('last_name'),
+        tool_input.get('search_type', 'handle')
+    )
 
-    except Exception as e:
-        logger.error(f"Error in bedrock_stats_handler: {str(e)}", exc_info=True)
-        return json.dumps({"status": "error", "message": str(e)})
+async def bedrock_stats_handler(response, conversation):
+    """Handler for Bedrock LLM responses; every player lookup in the turn runs concurrently"""
+    return await dispatch_bedrock_tool_uses(response, run_stats_tool)
 
 async def anthropic_stats_handler(response, conversation):
-    """Handler for Anthropic responses"""
-    try:
-        tool_use_blocks = [content for content in response.content if content.type == 'tool_use']
-        if tool_use_blocks:
-            tool_block = tool_use_blocks[0]
-            tool_input = tool_block.input
-            
-            result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                get_player_comprehensive_stats,
-                tool_input.get('player_identifier'),
-                tool_input.get('first_name'),
-                tool_input.get('last_name'),
-                tool_input.get('search_type', 'handle')
-            )
-
-            return {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "tool_result",
-                        "tool_use_id": tool_block.id,
-                        "content": json.dumps(result, default=str)
-                    }
-                ]
-            }
-        else:
-            return {
-                "role": "assistant",
-                "content": "No tool use block found in the response"
-            }
-    except Exception as e:
-        logger.error(f"Error in anthropic_stats_handler: {str(e)}", exc_info=True)
-        return {
-            "role": "assistant",
-            "content": f"Error occurred while processing tool: {str(e)}"
-        }
+    """Handler for Anthropic responses; every player lookup in the turn runs concurrently"""
+    return await dispatch_anthropic_tool_uses(response, run_stats_tool)
 
 def setup_player_analyst_agent(use_anthropic=False, 
                              anthropic_api_key=None):
@@ -499,7 +466,7 @@ def setup_player_analyst_agent(use_anthropic=False,
             description='An agent for comprehensive player analysis and statistics. Use this agent when the user asks about specific players or asks follow up questions to a team building prompt.',
             model_id='claude-3-5-sonnet-20240620',
             api_key=anthropic_api_key,
-            streaming=False,
+            streaming=STREAM_RESPONSES,
             save_chat=True,
             inference_config={
                 'maxTokens': 4096,
@@ -516,6 +483,7 @@ def setup_player_analyst_agent(use_anthropic=False,
             description='An agent for comprehensive player analysis and statistics. Use this agent when the user asks about specific players or asks follow up questions to a team building prompt.',
             model_id='anthropic.claude-3-5-sonnet-20240620-v1:0',
             region='us-west-2',
+            streaming=STREAM_RESPONSES,
             save_chat=True,
             inference_config={
                 'maxTokens': 4096,
@@ -1,8 +1,54 @@
-from multi_agent_orchestrator.agents import BedrockLLMAgent, BedrockLLMAgentOptions, AnthropicAgent, AnthropicAgentOptions
-
-def create_vct_input_parser(use_anthropic=False, anthropic_api_key=None):
+import logging
+import threading
+from typing import Any, AsyncIterable, Dict, List, Optional, Union
+from multi_agent_orchestrator.agents import Agent, AgentOptions
+from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
+from .custom.custom_bedrock_agent import CustomBedrockLLMAgent, CustomBedrockLLMAgentOptions
+from .custom.custom_anthropic_agent import CustomAnthropicAgent, CustomAnthropicAgentOptions
+from .team_request_parser import parse_team_request
+from .tracing import current_span
+from .llm_scheduler import PRIORITY_PARSER
+
+logger = logging.getLogger()
+
+class VCTInputParserAgent(Agent):
+    """
+    First link of the team building chain. Requests the local rules settle are answered without a model
+    call; everything else goes to the LLM parser agent.
+    """
+
+    def __init__(self, llm_parser: Agent):
+        super().__init__(AgentOptions(name=llm_parser.name, description=llm_parser.description, save_chat=False))
+        self.llm_parser = llm_parser
+        self._lock = threading.Lock()
+        self.stats = {'local': 0, 'llm': 0}
+
+    async def process_request(
+        self,
+        input_text: str,
+        user_id: str,
+        session_id: str,
+        chat_history: List[ConversationMessage],
+        additional_params: Optional[Dict[str, str]] = None
+    ) -> Union[ConversationMessage, AsyncIterable[Any]]:
+        parsed = parse_team_request(input_text)
+        route = 'local' if parsed else 'llm'
+        with self._lock:
+            self.stats[route] += 1
+            local, llm = self.stats['local'], self.stats['llm']
+        logger.info(f"Team request parsed by {route} parser ({local} local / {llm} llm): {input_text[:80]!r}")
+        active = current_span()
+        if active is not None:
+            active.set_attribute('input_parser', route)
+
+        if parsed:
+            return ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{'text': parsed['output']}])
+        return await self.llm_parser.process_request(input_text, user_id, session_id, chat_history, additional_params)
+
+def create_vct_input_parser(use_anthropic=False, anthropic_api_key=None, response_cache=None):
+    # The parser runs at low temperature on short requests, so identical requests can share an answer
     if use_anthropic:
-        options = AnthropicAgentOptions(
+        options = CustomAnthropicAgentOptions(
             name='vct-input-parser',
             description='An agent to parse and structure VCT-related input, specifically for team building requests.',
             model_id='claude-3-5-sonnet-20240620',
@@ -13,11 +59,13 @@ def create_vct_input_parser(use_anthropic=False, anthropic_api_key=None):
                 'temperature': 0.1,
                 'topP': 0.9,
                 'stopSequences': ['Human:', 'AI:']
-            }
+            },
+            response_cache=response_cache,
+            priority=PRIORITY_PARSER
         )
-        agent = AnthropicAgent(options)
+        agent = CustomAnthropicAgent(options)
     else:
-        options = BedrockLLMAgentOptions(
+        options = CustomBedrockLLMAgentOptions(
             name='vct-input-parser',
             description='An agent to parse and structure VCT-related input, specifically for team building requests.',
             model_id='anthropic.claude-3-sonnet-20240229-v1:0',
@@ -29,9 +77,11 @@ def create_vct_input_parser(use_anthropic=False, anthropic_api_key=None):
                 'topP': 0.9,
                 'stopSequences': ['Human:', 'AI:']
             },
-            save_chat=False
+            save_chat=False,
+            response_cache=response_cache,
+            priority=PRIORITY_PARSER
         )
-        agent = BedrockLLMAgent(options)
+        agent = CustomBedrockLLMAgent(options)
 
     agent.set_system_prompt(
         """You are an AI assistant designed to analyze Valorant Champions Tour (VCT) related input, specifically for team building requests. Your task is to interpret user requests for team composition and provide a structured response that accurately reflects the user's specifications.
@@ -121,4 +171,5 @@ def create_vct_input_parser(use_anthropic=False, anthropic_api_key=None):
         Remember: When a specific number is mentioned for any tournament type, apply that number to ALL tournament types. The total number of players may exceed 5 in these cases. Only when "only" is used for a specific tournament type should all 5 players be assigned to that single type."""
         )
 
-    return agent
\ No newline at end of file
+    # The same rules are applied locally first (team_request_parser.py); keep the two in step
+    return VCTInputParserAgent(agent)
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Cache of model responses for deterministic prompts (the input parser, the classifier). Keys combine the
+model id, a hash of the system prompt and the normalized messages, so the same question asked in another
+session is answered without a model call. Each entry remembers how long the original call took, which
+is reported as saved latency on every hit.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger()
+
+class ResponseCacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    def record(self, hit: bool, latency_ms: float = 0.0):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.saved_ms += latency_ms
+            else:
+                self.misses += 1
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "saved_ms": round(self.saved_ms, 1)
+            }
+
+class LRUResponseCache:
+    """In-process LRU; entries expire after ttl_seconds"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = ResponseCacheStats()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(value, latency_ms of the original call) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            self.counters.record(False)
+            return None
+        self.counters.record(True, entry[2])
+        return entry[1], entry[2]
+
+    def set(self, key: str, value: Any, latency_ms: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value, latency_ms)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = len(self._entries)
+        return {"backend": "memory", "entries": entries, **self.counters.as_dict()}
+
+class SQLiteResponseCache:
+    """
+    On-disk cache shared by every process on the host and kept across restarts. Values must be JSON
+    serializable. The least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: float = 7 * 86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    latency_ms REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_responses_last_used ON llm_responses (last_used)")
+        self.counters = ResponseCacheStats()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT value, latency_ms FROM llm_responses WHERE key = ? AND created_at > ?",
+                    (key, now - self.ttl_seconds)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite response cache get failed: {str(e)}")
+            row = None
+
+        if row is None:
+            self.counters.record(False)
+            return None
+        self.counters.record(True, row[1])
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, latency_ms: float):
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, value, latency_ms, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, json.dumps(value, default=str), latency_ms, now, now)
+                )
+                self._conn.execute(
+                    "DELETE FROM llm_responses WHERE created_at <= ? OR key IN "
+                    "(SELECT key FROM llm_responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (now - self.ttl_seconds, self.max_entries)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite response cache set failed: {str(e)}")
+
+    def stats(self) -> Dict:
+        try:
+            with self._lock:
+                entries = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {"backend": "sqlite", "path": self.path, "entries": entries, **self.counters.as_dict()}
+
+def create_response_cache(max_entries: int = 1024, ttl_seconds: float = 86400):
+    """
+    Create the model response cache. LLM_CACHE_BACKEND picks 'memory' (default) or 'sqlite'
+    (stored at LLM_CACHE_PATH, default llm_cache.sqlite3).
+    """
+    if os.getenv('LLM_CACHE_BACKEND', 'memory') == 'sqlite':
+        path = os.getenv('LLM_CACHE_PATH', 'llm_cache.sqlite3')
+        try:
+            return SQLiteResponseCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+        except sqlite3.Error as e:
+            logger.warning(f"Falling back to in-process response cache, could not open {path}: {str(e)}")
+    return LRUResponseCache(max_entries, ttl_seconds)
+
+def normalize_text(text: str) -> str:
+    return re.sub(r'\s+', ' ', text).strip().casefold()
+
+def _normalize(value):
+    if isinstance(value, str):
+        return normalize_text(value)
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+def response_cache_key(model_id: str, system_prompt: str, messages, **settings) -> str:
+    """Key for a model call: model id, system prompt hash, normalized messages and sampling settings"""
+    system_hash = hashlib.sha256((system_prompt or '').encode()).hexdigest()
+    payload = json.dumps({
+        "model": model_id,
+        "system": system_hash,
+        "messages": _normalize(messages),
+        "settings": settings
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def log_cache_hit(name: str, cache, latency_ms: float):
+    stats = cache.stats()
+    logger.info(f"LLM cache hit for {name}: saved ~{latency_ms:.0f} ms "
+                f"(hit rate {stats['hit_rate']:.2f}, {stats['saved_ms'] / 1000:.1f}s saved in total)")
@@ -0,0 +1,253 @@
+"""
+Admission control for model calls. Each provider (Bedrock, Anthropic) has a requests-per-minute and a
+tokens-per-minute budget, modelled as token buckets. Calls wait their turn in priority order (the
+classifier before the input parser before heavy generation). A call that would have to wait longer
+than max_wait, or that the provider throttles anyway, raises ProviderUnavailable so the request can be
+retried on the other provider (see custom/failover.py).
+"""
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, Optional
+from .tracing import current_span
+
+logger = logging.getLogger()
+
+PRIORITY_CLASSIFIER = 0
+PRIORITY_PARSER = 1
+PRIORITY_GENERATION = 2
+
+# Defaults for accounts without a quota lookup; VCTAgentSystem sets Bedrock's request rate from the
+# Service Quotas API
+BEDROCK_REQUESTS_PER_MINUTE = float(os.getenv('BEDROCK_REQUESTS_PER_MINUTE', '50'))
+BEDROCK_TOKENS_PER_MINUTE = float(os.getenv('BEDROCK_TOKENS_PER_MINUTE', '200000'))
+ANTHROPIC_REQUESTS_PER_MINUTE = float(os.getenv('ANTHROPIC_REQUESTS_PER_MINUTE', '50'))
+ANTHROPIC_TOKENS_PER_MINUTE = float(os.getenv('ANTHROPIC_TOKENS_PER_MINUTE', '80000'))
+# Longest a call waits for budget before it is failed over
+LLM_SCHEDULER_MAX_WAIT = float(os.getenv('LLM_SCHEDULER_MAX_WAIT', '10'))
+# How long a provider is avoided after it throttled a call
+THROTTLE_COOLDOWN = float(os.getenv('LLM_THROTTLE_COOLDOWN', '20'))
+
+POLL_SECONDS = 0.05
+THROTTLING_ERROR_CODES = {'ThrottlingException', 'TooManyRequestsException', 'ServiceQuotaExceededException'}
+
+class ProviderUnavailable(Exception):
+    """The provider has no budget for the call within the wait limit, or throttled it"""
+
+    def __init__(self, provider: str, reason: str):
+        super().__init__(f"{provider} unavailable: {reason}")
+        self.provider = provider
+        self.reason = reason
+
+def is_throttling_error(error: Exception) -> bool:
+    """Bedrock ThrottlingException and friends, Anthropic 429 (rate limit) and 529 (overloaded)"""
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict) and response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES:
+        return True
+    return getattr(error, 'status_code', None) in (429, 529)
+
+class TokenBucket:
+    """Refills at per_minute / 60 per second up to one minute's worth. Not thread safe on its own."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.per_minute, self.level + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available (0 if it is now)"""
+        self._refill()
+        amount = min(amount, self.per_minute)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.per_minute
+
+    def take(self, amount: float):
+        """Remove amount; may go negative when settling actual usage"""
+        self._refill()
+        self.level = min(self.per_minute, self.level - amount)
+
+    def set_rate(self, per_minute: float):
+        """Change the refill rate, keeping the current level (capped at the new burst)"""
+        self._refill()
+        self.per_minute = per_minute
+        self.level = min(self.level, per_minute)
+
+class ProviderBudget:
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.cooldown_until = 0.0
+
+    def wait_time(self, tokens: float) -> float:
+        cooldown = max(self.cooldown_until - time.monotonic(), 0.0)
+        return max(cooldown, self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def take(self, tokens: float):
+        self.requests.take(1)
+        self.tokens.take(min(tokens, self.tokens.per_minute))
+
+class CallTracker:
+    """Counts the model calls that completed inside a track_calls() block and its enclosing blocks"""
+
+    def __init__(self, parent: Optional['CallTracker'] = None):
+        self.parent = parent
+        self.completed = 0
+
+_call_tracker: contextvars.ContextVar[Optional[CallTracker]] = contextvars.ContextVar('llm_call_tracker', default=None)
+
+@contextlib.contextmanager
+def track_calls() -> Iterator[CallTracker]:
+    """Count the model calls the current request completes within the block (see FailoverAgent)"""
+    tracker = CallTracker(_call_tracker.get())
+    token = _call_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _call_tracker.reset(token)
+
+class Slot:
+    """A granted call. Set used_tokens once the response reports its usage to settle the estimate."""
+
+    def __init__(self, scheduler: 'LLMScheduler', provider: str, estimated_tokens: float):
+        self.scheduler = scheduler
+        self.provider = provider
+        self.estimated_tokens = estimated_tokens
+        self.used_tokens: Optional[float] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc is not None and is_throttling_error(exc):
+            self.scheduler.report_throttled(self.provider)
+            raise ProviderUnavailable(self.provider, "throttled") from exc
+        if self.used_tokens is not None:
+            self.scheduler.settle(self.provider, self.used_tokens - self.estimated_tokens)
+        if exc is None:
+            tracker = _call_tracker.get()
+            while tracker is not None:
+                tracker.completed += 1
+                tracker = tracker.parent
+        return False
+
+class LLMScheduler:
+    """
+    Shared by every session in the process (calls arrive from several threads and event loops, so
+    waiting is done by polling under a thread lock).
+
+    Args:
+        max_wait (float): Longest a call waits for budget before ProviderUnavailable is raised
+    """
+
+    def __init__(self, max_wait: float = LLM_SCHEDULER_MAX_WAIT):
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._budgets: Dict[str, ProviderBudget] = {}
+        self._waiting: Dict[str, list] = {}
+        self._sequence = itertools.count()
+        self.stats = {'granted': 0, 'waited_ms': 0.0, 'unavailable': 0, 'throttled': 0}
+
+    def configure(self, provider: str, requests_per_minute: float, tokens_per_minute: float):
+        with self._lock:
+            self._budgets[provider] = ProviderBudget(provider, requests_per_minute, tokens_per_minute)
+            self._waiting.setdefault(provider, [])
+        logger.info(f"LLM scheduler budget for {provider}: {requests_per_minute:g} requests/min, {tokens_per_minute:g} tokens/min")
+
+    def set_rate(self, provider: str, requests_per_minute: float):
+        """
+        Change a configured provider's request rate in place. Unlike configure, the buckets keep their
+        current level and a throttling cooldown stays in force.
+        """
+        with self._lock:
+            budget = self._budgets.get(provider)
+            if budget is None or budget.requests.per_minute == requests_per_minute:
+                return
+            budget.requests.set_rate(requests_per_minute)
+        logger.info(f"LLM scheduler request rate for {provider}: {requests_per_minute:g} requests/min")
+
+    async def acquire(self, provider: str, priority: int = PRIORITY_GENERATION, estimated_tokens: float = 0) -> Slot:
+        """
+        Wait until the provider has budget for the call and it is the highest priority waiter.
+        Raises ProviderUnavailable if that would take longer than max_wait.
+        """
+        if provider not in self._budgets:
+            return Slot(self, provider, estimated_tokens)
+
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        ticket = (priority, next(self._sequence))
+        with self._lock:
+            heapq.heappush(self._waiting[provider], ticket)
+        try:
+            while True:
+                with self._lock:
+                    budget = self._budgets[provider]
+                    head = self._waiting[provider][0] == ticket
+                    wait = budget.wait_time(estimated_tokens) if head else POLL_SECONDS
+                    if head and wait == 0:
+                        budget.take(estimated_tokens)
+                        waited_ms = (time.monotonic() - started) * 1000
+                        self.stats['granted'] += 1
+                        self.stats['waited_ms'] += waited_ms
+                        break
+                    if time.monotonic() + (wait if head else 0) > deadline:
+                        self.stats['unavailable'] += 1
+                        raise ProviderUnavailable(provider, f"no budget within {self.max_wait:g}s")
+                await asyncio.sleep(min(wait, POLL_SECONDS * 4))
+        finally:
+            with self._lock:
+                queue = self._waiting[provider]
+                if ticket in queue:
+                    queue.remove(ticket)
+                    heapq.heapify(queue)
+
+        if waited_ms >= 1:
+            logger.info(f"LLM call on {provider} (priority {priority}) waited {waited_ms:.0f} ms for budget")
+        active = current_span()
+        if active is not None:
+            active.set_attribute('provider', provider)
+            active.set_attribute('scheduler_wait_ms', round(waited_ms, 1))
+        return Slot(self, provider, estimated_tokens)
+
+    def settle(self, provider: str, extra_tokens: float):
+        """Charge (or refund, if negative) the difference between actual and estimated tokens"""
+        with self._lock:
+            budget = self._budgets.get(provider)
+            if budget is not None:
+                budget.tokens.take(extra_tokens)
+
+    def report_throttled(self, provider: str):
+        """The provider rejected a call despite the budget; keep new calls away from it for a while"""
+        with self._lock:
+            budget = self._budgets.get(provider)
+            self.stats['throttled'] += 1
+            if budget is not None:
+                budget.cooldown_until = time.monotonic() + THROTTLE_COOLDOWN
+        logger.warning(f"{provider} throttled a call, pausing it for {THROTTLE_COOLDOWN:g}s")
+
+    def wait_time(self, provider: str, estimated_tokens: float = 0) -> float:
+        """Seconds until the provider could take a call of this size, ignoring other waiters"""
+        with self._lock:
+            budget = self._budgets.get(provider)
+            return budget.wait_time(estimated_tokens) if budget is not None else 0.0
+
+scheduler = LLMScheduler()
+scheduler.configure('bedrock', BEDROCK_REQUESTS_PER_MINUTE, BEDROCK_TOKENS_PER_MINUTE)
+scheduler.configure('anthropic', ANTHROPIC_REQUESTS_PER_MINUTE, ANTHROPIC_TOKENS_PER_MINUTE)
+
+def estimate_call_tokens(prompt_chars: int, max_tokens: Optional[int]) -> float:
+    """Tokens a call is charged up front: the prompt (about 4 characters a token) plus its output limit"""
+    return prompt_chars / 4 + (max_tokens or 0)
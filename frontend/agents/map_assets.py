@@ -0,0 +1,110 @@
+"""
+Minimap asset store: maps.json indexed by mapUrl, and minimaps downloaded once to local disk and
+kept decoded in memory. Renderers get cheap copies to draw on; nothing touches the network once
+the store is warmed, e.g. at build time with:
+    python map_assets.py
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+import requests
+from PIL import Image
+
+logger = logging.getLogger()
+
+MAPS_JSON = Path(__file__).parent / 'maps.json'
+DOWNLOAD_TIMEOUT = 30
+
+class MapAssetStore:
+    """
+    Args:
+        maps_json (Path): maps.json to index
+        cache_dir (Path): Where minimap files are kept (MAP_ASSET_DIR, default ./minimaps next to this module).
+            If it is not writable minimaps are still cached in memory for the life of the process.
+    """
+
+    def __init__(self, maps_json=MAPS_JSON, cache_dir=None):
+        self.maps_json = Path(maps_json)
+        self.cache_dir = Path(cache_dir or os.getenv('MAP_ASSET_DIR') or Path(__file__).parent / 'minimaps')
+        self._lock = threading.Lock()
+        self._maps = None
+        self._maps_by_url = None
+        self._images = {}
+
+    def _load_maps(self):
+        with self._lock:
+            if self._maps is None:
+                with open(self.maps_json, 'r') as f:
+                    maps_data = json.load(f)
+                self._maps_by_url = {map_data['mapUrl']: map_data for map_data in maps_data}
+                self._maps = maps_data
+
+    @property
+    def maps(self) -> List[Dict]:
+        """Every maps.json entry (shared, do not modify)"""
+        if self._maps is None:
+            self._load_maps()
+        return self._maps
+
+    def get_map_data(self, map_url: str) -> Optional[Dict]:
+        """maps.json entry for a mapUrl, or None"""
+        if self._maps_by_url is None:
+            self._load_maps()
+        map_data = self._maps_by_url.get(map_url)
+        return dict(map_data) if map_data is not None else None
+
+    def cache_path(self, display_icon: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(display_icon.encode()).hexdigest()[:16]}.png"
+
+    def _fetch(self, display_icon: str) -> bytes:
+        """Minimap file contents from disk, downloading (and saving) it the first time"""
+        path = self.cache_path(display_icon)
+        if path.is_file():
+            return path.read_bytes()
+
+        response = requests.get(display_icon, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(response.content)
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"Could not cache minimap {display_icon} at {path}: {str(e)}")
+        return response.content
+
+    def _get_image(self, display_icon: str) -> Image.Image:
+        image = self._images.get(display_icon)
+        if image is None:
+            image = Image.open(io.BytesIO(self._fetch(display_icon)))
+            image.load()
+            with self._lock:
+                image = self._images.setdefault(display_icon, image)
+        return image
+
+    def get_minimap(self, display_icon: str) -> Image.Image:
+        """A drawable copy of the minimap at display_icon"""
+        return self._get_image(display_icon).copy()
+
+    def prefetch(self) -> int:
+        """Download and decode every minimap in maps.json; returns how many are available"""
+        available = 0
+        for display_icon in {map_data['displayIcon'] for map_data in self.maps if map_data.get('displayIcon')}:
+            try:
+                self._get_image(display_icon)
+                available += 1
+            except Exception as e:
+                logger.error(f"Error prefetching minimap {display_icon}: {str(e)}")
+        return available
+
+map_assets = MapAssetStore()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    count = map_assets.prefetch()
+    print(f"{count} minimaps cached in {map_assets.cache_dir}")
@@ -2,71 +2,69 @@ import logging
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
-import boto3
-from botocore.exceptions import ClientError
 from PIL import Image, ImageDraw, ImageFont
 import io
-import json
-import requests
+import hashlib
 import colorsys
+import numpy as np
 from datetime import datetime
-from decimal import Decimal
 import os
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from pathlib import Path 
+from .data_version import get_data_version
+from .result_cache import create_result_cache
+from .render_store import create_render_store
+from .map_transform import transform_coordinates_array
+from .map_assets import map_assets
+from .map_heatmap import render_heatmap, KILL_HEAT_COLOR, DEATH_HEAT_COLOR
+from .tracing import span, TracedCursor
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-S3_BUCKET_NAME = "map-imgs"
-S3_REGION = "us-east-1"
-s3_client = boto3.client('s3', region_name=S3_REGION)
+# Bump when the drawing code changes so stale renders are not served
+RENDER_VERSION = 1
+
+# 'markers' draws every event of the last MARKER_GAMES games; 'heatmap' aggregates all of a player's games
+RENDER_MODES = ('markers', 'heatmap')
+DEFAULT_RENDER_MODE = os.getenv('MAP_RENDER_MODE', 'markers')
+MARKER_GAMES = 5
+
+render_store = create_render_store()
+
+# Render URLs per player, map and mode; entries are stored under the render version, so a data
+# version (or RENDER_VERSION) bump makes them miss
+rendered_maps_cache = create_result_cache(
+    'map_renders',
+    max_entries=int(os.getenv('MAP_RENDER_CACHE_SIZE', '512')),
+    ttl_seconds=float(os.getenv('MAP_RENDER_CACHE_TTL', '3600'))
+)
 
 def get_db_connection():
     db_url = os.getenv('RDS_DATABASE_URL')
-    return psycopg2.connect(db_url, cursor_factory=RealDictCursor)
+    return psycopg2.connect(db_url, cursor_factory=TracedCursor)
 
-def transform_coordinates(x, y, map_data, image_width, image_height):
-    """Transform game coordinates to image coordinates"""
-    try:
-        x, y = Decimal(str(x)), Decimal(str(y))
-        xMultiplier = Decimal(map_data['xMultiplier'])
-        yMultiplier = Decimal(map_data['yMultiplier'])
-        xScalarToAdd = Decimal(map_data['xScalarToAdd'])
-        yScalarToAdd = Decimal(map_data['yScalarToAdd'])
-        
-        norm_x = (y * xMultiplier) + xScalarToAdd
-        norm_y = (x * yMultiplier) + yScalarToAdd
-        
-        pixel_x = int((norm_x * Decimal(str(image_width))).to_integral_value())
-        pixel_y = int((norm_y * Decimal(str(image_height))).to_integral_value())
-        
-        return pixel_x, pixel_y
-    except (ValueError, KeyError, TypeError) as e:
-        logger.error(f"Error in transform_coordinates: {str(e)}")
-        return None, None
+def get_minimap(display_icon: str) -> Image.Image:
+    """Get a drawable copy of a minimap from the asset store"""
+    return map_assets.get_minimap(display_icon)
+
+def get_render_version(conn) -> str:
+    """Short hash of the ingest data version and RENDER_VERSION, used in every render key"""
+    return hashlib.sha1(f"{get_data_version(conn)}:{RENDER_VERSION}".encode()).hexdigest()[:12]
 
 def get_map_data(map_url: str):
-    """Get map data from maps.json file"""
+    """Get map data from maps.json (indexed once by the asset store)"""
     try:
-        script_dir = Path(__file__).parent
-        json_path = script_dir / 'maps.json'
-        
-        with open(json_path, 'r') as f:
-            maps_data = json.load(f)
-        
-        for map_data in maps_data:
-            if map_data['mapUrl'] == map_url:
-                return {
-                    'displayName': map_data['displayName'],
-                    'displayIcon': map_data['displayIcon'],
-                    'xMultiplier': str(map_data['xMultiplier']),
-                    'yMultiplier': str(map_data['yMultiplier']),
-                    'xScalarToAdd': str(map_data['xScalarToAdd']),
-                    'yScalarToAdd': str(map_data['yScalarToAdd']),
-                    'mapUrl': map_data['mapUrl']
-                }
+        map_data = map_assets.get_map_data(map_url)
+        if map_data is not None:
+            return {
+                'displayName': map_data['displayName'],
+                'displayIcon': map_data['displayIcon'],
+                'xMultiplier': str(map_data['xMultiplier']),
+                'yMultiplier': str(map_data['yMultiplier']),
+                'xScalarToAdd': str(map_data['xScalarToAdd']),
+                'yScalarToAdd': str(map_data['yScalarToAdd']),
+                'mapUrl': map_data['mapUrl']
+            }
         
         logger.warning(f"Map data not found for {map_url}")
         return None
@@ -75,12 +73,13 @@ def get_map_data(map_url: str):
         logger.error(f"Error in get_map_data: {str(e)}", exc_info=True)
         raise
 
-async def process_player_map_visualizations(player_id: str, maps_data: List[Dict], conn) -> List[Dict]:
+async def process_player_map_visualizations(player_id: str, maps_data: List[Dict], conn,
+                                           render_mode: str = DEFAULT_RENDER_MODE) -> List[Dict]:
     """Process visualizations for a player's top maps"""
     try:
         updated_maps = []
         for map_info in maps_data:
-            viz_data = await generate_map_visualization(player_id, map_info['map'], conn)
+            viz_data = await generate_map_visualization(player_id, map_info['map'], conn, render_mode)
             if viz_data:
                 map_info.update(viz_data)
             updated_maps.append(map_info)
@@ -89,35 +88,38 @@ async def process_player_map_visualizations(player_id: str, maps_data: List[Dict
         logger.error(f"Error processing map visualizations for player {player_id}: {str(e)}")
         return maps_data
 
-async def generate_map_visualization(player_id: str, map_name: str, conn) -> Optional[Dict]:
+async def generate_map_visualization(player_id: str, map_name: str, conn,
+                                     render_mode: str = DEFAULT_RENDER_MODE) -> Optional[Dict]:
     """Generate visualization for a specific map"""
     try:
+        if render_mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode: {render_mode}")
+
         map_data = get_map_data(map_name)
         if not map_data:
             return None
 
-        map_directory = f"{player_id}/maps/{map_data['displayName']}"
-        file_name_attacking = f"{map_directory}/attacking.png"
-        file_name_defending = f"{map_directory}/defending.png"
+        render_version = get_render_version(conn)
+        render_key = get_render_cache_key(player_id, map_name, render_mode)
+        cached = rendered_maps_cache.get(render_key, render_version)
+        if cached is not None:
+            return cached
 
-        # Check if files already exist in S3
-        try:
-            s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=file_name_attacking)
-            s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=file_name_defending)
-            
-            # If we get here, both files exist
-            return {
+        file_name_attacking, file_name_defending = get_render_file_names(player_id, map_data['displayName'], render_version, render_mode)
+
+        # Reuse renders made for this data version by another process or the batch job
+        if render_store.exists(file_name_attacking) and render_store.exists(file_name_defending):
+            visualization = {
                 "visualization": {
-                    "attacking_url": f"https://{S3_BUCKET_NAME}.s3.{S3_REGION}.amazonaws.com/{file_name_attacking}",
-                    "defending_url": f"https://{S3_BUCKET_NAME}.s3.{S3_REGION}.amazonaws.com/{file_name_defending}"
+                    "attacking_url": render_store.url(file_name_attacking),
+                    "defending_url": render_store.url(file_name_defending)
                 }
             }
-        except ClientError as e:
-            # Files don't exist, continue with generation
-            pass
+            rendered_maps_cache.set(render_key, visualization, render_version)
+            return visualization
 
-        # Get recent games for this map (limit to last 5 for performance)
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        # Markers only stay readable for the last few games; heatmaps take the whole history (LIMIT NULL)
+        cursor = conn.cursor(cursor_factory=TracedCursor)
         games_query = """
             SELECT 
                 pm.platform_game_id, pm.kills, pm.deaths, pm.assists, 
@@ -126,76 +128,162 @@ async def generate_map_visualization(player_id: str, map_name: str, conn) -> Opt
             JOIN player_mapping pm ON gm.platform_game_id = pm.platform_game_id
             WHERE pm.player_id = %s AND gm.map = %s
             ORDER BY gm.game_date DESC
-            LIMIT 5
+            LIMIT %s
         """
-        cursor.execute(games_query, (player_id, map_name))
+        cursor.execute(games_query, (player_id, map_name, MARKER_GAMES if render_mode == 'markers' else None))
         games = cursor.fetchall()
 
         if not games:
             return None
 
-        # Create base images
-        img_attacking = Image.open(io.BytesIO(requests.get(map_data['displayIcon']).content))
-        img_defending = Image.open(io.BytesIO(requests.get(map_data['displayIcon']).content))
-        draw_attacking = ImageDraw.Draw(img_attacking)
-        draw_defending = ImageDraw.Draw(img_defending)
-
-        # Generate colors and process games
-        colors = get_distinct_colors(len(games))
-        for i, game in enumerate(games):
-            game['color'] = colors[i]
-            game['attacker_kills'], game['defender_kills'], game['attacker_deaths'], game['defender_deaths'] = plot_game_events(
-                draw_attacking, draw_defending, game, player_id, map_data, 'both', conn
-            )
-
-        # Add legends
-        img_attacking_with_legend = add_legend(img_attacking, games, 'both', "ATTACKING", map_data['displayName'])
-        img_defending_with_legend = add_legend(img_defending, games, 'both', "DEFENDING", map_data['displayName'])
-
-        # Upload to S3
-        img_buffer_attacking = io.BytesIO()
-        img_attacking_with_legend.save(img_buffer_attacking, format='PNG')
-        img_buffer_attacking.seek(0)
-        
-        img_buffer_defending = io.BytesIO()
-        img_defending_with_legend.save(img_buffer_defending, format='PNG')
-        img_buffer_defending.seek(0)
-
-        s3_url_attacking = upload_to_s3(file_name_attacking, img_buffer_attacking, 'image/png')
-        s3_url_defending = upload_to_s3(file_name_defending, img_buffer_defending, 'image/png')
-
-        if s3_url_attacking and s3_url_defending:
-            return {
-                "visualization": {
-                    "attacking_url": s3_url_attacking,
-                    "defending_url": s3_url_defending,
-                }
-            }
-        return None
+        with span("map_render", player_id=player_id, map=map_data['displayName'], render_mode=render_mode, games=len(games)):
+            img_attacking, img_defending = render_map_images(player_id, map_data, games, conn=conn, render_mode=render_mode)
+            return store_map_images(player_id, map_name, map_data['displayName'], render_version, img_attacking, img_defending, render_mode)
 
     except Exception as e:
         logger.error(f"Error generating map visualization: {str(e)}")
         return None
 
-def plot_game_events(draw_attacking, draw_defending, game, player_id, map_data, event_type, conn):
-    """Plot game events on the map"""
-    events = get_game_events(game['platform_game_id'], player_id, event_type, conn)
+def get_render_cache_key(player_id: str, map_name: str, render_mode: str) -> str:
+    return f"{player_id}:{map_name}:{render_mode}"
+
+def get_render_file_names(player_id: str, map_display_name: str, render_version: str, render_mode: str = 'markers'):
+    """Render store keys for a player's attacking and defending images on a map"""
+    map_directory = f"{player_id}/maps/{map_display_name}/{render_version}"
+    prefix = '' if render_mode == 'markers' else f"{render_mode}_"
+    return f"{map_directory}/{prefix}attacking.png", f"{map_directory}/{prefix}defending.png"
+
+def render_map_images(player_id: str, map_data: Dict, games: List[Dict], conn=None,
+                      events_by_game: Optional[Dict] = None, team_acronyms: Optional[Dict] = None,
+                      render_mode: str = 'markers'):
+    """
+    Draw the attacking and defending images (with legends) for a player's games on a map.
+    Events and team acronyms for all games are fetched with one query each unless they are passed in prefetched.
+    """
+    if events_by_game is None or team_acronyms is None:
+        fetched_events, fetched_acronyms = get_render_data(player_id, [game['platform_game_id'] for game in games], conn)
+        events_by_game = fetched_events if events_by_game is None else events_by_game
+        team_acronyms = fetched_acronyms if team_acronyms is None else team_acronyms
+
+    if render_mode == 'heatmap':
+        return render_heatmap_images(player_id, map_data, games, events_by_game)
+
+    # Create base images
+    img_attacking = get_minimap(map_data['displayIcon'])
+    img_defending = get_minimap(map_data['displayIcon'])
+    draw_attacking = ImageDraw.Draw(img_attacking)
+    draw_defending = ImageDraw.Draw(img_defending)
+
+    # Generate colors and process games
+    colors = get_distinct_colors(len(games))
+    for i, game in enumerate(games):
+        game['color'] = colors[i]
+        game['attacker_kills'], game['defender_kills'], game['attacker_deaths'], game['defender_deaths'] = plot_game_events(
+            draw_attacking, draw_defending, game, player_id, map_data, 'both', events_by_game.get(game['platform_game_id'], [])
+        )
+
+    # Add legends
+    img_attacking_with_legend = add_legend(img_attacking, games, 'both', "ATTACKING", map_data['displayName'], team_acronyms)
+    img_defending_with_legend = add_legend(img_defending, games, 'both', "DEFENDING", map_data['displayName'], team_acronyms)
+    return img_attacking_with_legend, img_defending_with_legend
+
+def render_heatmap_images(player_id: str, map_data: Dict, games: List[Dict], events_by_game: Dict):
+    """
+    Draw kill/death density heatmaps over all the given games. Cost after the coordinate
+    transform does not depend on the number of events.
+    """
+    events = []
+    for game in games:
+        events.extend(events_by_game.get(game['platform_game_id'], []))
+
+    minimap = get_minimap(map_data['displayIcon'])
+    points = get_heatmap_points(events, player_id, map_data, *minimap.size)
+
+    images = []
+    for side, attacking in (("ATTACKING", True), ("DEFENDING", False)):
+        kill_xs, kill_ys, death_xs, death_ys = points[attacking]
+        img = render_heatmap(minimap, [(kill_xs, kill_ys, KILL_HEAT_COLOR), (death_xs, death_ys, DEATH_HEAT_COLOR)])
+        images.append(add_heatmap_legend(img, games, side, map_data['displayName'],
+                                         len(kill_xs), len(death_xs)))
+    return images[0], images[1]
+
+def get_heatmap_points(events: List[Dict], player_id: str, map_data: Dict, image_width: int, image_height: int) -> Dict:
+    """
+    Split a player's events into kill positions (where they stood) and death positions, per side.
+    Returns {is_attacking: (kill_xs, kill_ys, death_xs, death_ys)}.
+    """
+    if not events:
+        empty = np.empty(0, dtype=np.int64)
+        return {True: (empty, empty, empty, empty), False: (empty, empty, empty, empty)}
+
+    killer_xs, killer_ys, killer_valid = transform_coordinates_array(
+        [event['killer_x'] for event in events], [event['killer_y'] for event in events],
+        map_data, image_width, image_height
+    )
+    deceased_xs, deceased_ys, deceased_valid = transform_coordinates_array(
+        [event['deceased_x'] for event in events], [event['deceased_y'] for event in events],
+        map_data, image_width, image_height
+    )
+    is_kill = np.array([event['true_killer_id'] == player_id for event in events]) & killer_valid
+    is_death = np.array([event['true_deceased_id'] == player_id for event in events]) & ~is_kill & deceased_valid
+    killer_attacking = np.array([bool(event['killer_is_attacking']) for event in events])
+    deceased_attacking = np.array([bool(event['deceased_is_attacking']) for event in events])
+
+    points = {}
+    for attacking in (True, False):
+        kills = is_kill & (killer_attacking == attacking)
+        deaths = is_death & (deceased_attacking == attacking)
+        points[attacking] = (killer_xs[kills], killer_ys[kills], deceased_xs[deaths], deceased_ys[deaths])
+    return points
+
+def store_map_images(player_id: str, map_name: str, map_display_name: str, render_version: str,
+                     img_attacking, img_defending, render_mode: str = 'markers') -> Optional[Dict]:
+    """Upload rendered images to the render store and return their visualization URLs"""
+    file_name_attacking, file_name_defending = get_render_file_names(player_id, map_display_name, render_version, render_mode)
+
+    img_buffer_attacking = io.BytesIO()
+    img_attacking.save(img_buffer_attacking, format='PNG')
+    
+    img_buffer_defending = io.BytesIO()
+    img_defending.save(img_buffer_defending, format='PNG')
+
+    url_attacking = render_store.put(file_name_attacking, img_buffer_attacking.getvalue(), 'image/png')
+    url_defending = render_store.put(file_name_defending, img_buffer_defending.getvalue(), 'image/png')
+
+    if url_attacking and url_defending:
+        visualization = {
+            "visualization": {
+                "attacking_url": url_attacking,
+                "defending_url": url_defending,
+            }
+        }
+        rendered_maps_cache.set(get_render_cache_key(player_id, map_name, render_mode), visualization, render_version)
+        return visualization
+    return None
+
+def plot_game_events(draw_attacking, draw_defending, game, player_id, map_data, event_type, events):
+    """Plot a game's prefetched events on the map"""
     image_width, image_height = draw_attacking.im.size
     color = game['color']
     
     attacker_kills, defender_kills, attacker_deaths, defender_deaths = 0, 0, 0, 0
-    
-    for event in events:
-        deceased_x, deceased_y = transform_coordinates(
-            event['deceased_x'], event['deceased_y'], 
-            map_data, image_width, image_height
-        )
-        killer_x, killer_y = transform_coordinates(
-            event['killer_x'], event['killer_y'], 
-            map_data, image_width, image_height
-        )
-        
-        if all(coord is not None for coord in [killer_x, killer_y, deceased_x, deceased_y]):
+    if not events:
+        return attacker_kills, defender_kills, attacker_deaths, defender_deaths
+
+    # Transform every killer/deceased position of the game in one pass
+    deceased_xs, deceased_ys, deceased_valid = transform_coordinates_array(
+        [event['deceased_x'] for event in events], [event['deceased_y'] for event in events],
+        map_data, image_width, image_height
+    )
+    killer_xs, killer_ys, killer_valid = transform_coordinates_array(
+        [event['killer_x'] for event in events], [event['killer_y'] for event in events],
+        map_data, image_width, image_height
+    )
+
+    for i, event in enumerate(events):
+        if deceased_valid[i] and killer_valid[i]:
+            deceased_x, deceased_y = int(deceased_xs[i]), int(deceased_ys[i])
+            killer_x, killer_y = int(killer_xs[i]), int(killer_ys[i])
             if event['true_killer_id'] == player_id and (event_type in ['kills', 'both']):
                 if event['killer_is_attacking']:
                     draw_attacking.ellipse((killer_x - 5, killer_y - 5, killer_x + 5, killer_y + 5), fill=color)
@@ -224,8 +312,8 @@ def draw_x(draw, x, y, size, fill):
     draw.line((x - size, y - size, x + size, y + size), fill=fill, width=2)
     draw.line((x - size, y + size, x + size, y - size), fill=fill, width=2)
 
-def add_legend(img, games, event_type, side, map_display_name):  # Added map_display_name parameter
-    """Add legend to the map image"""
+def add_legend(img, games, event_type, side, map_display_name, team_acronyms):  # Added map_display_name parameter
+    """Add legend to the map image; team_acronyms maps platform_game_id to a prefetched (team1, team2)"""
     legend_width = 300
     new_img = Image.new('RGB', (img.width + legend_width, img.height), color='white')
     new_img.paste(img, (0, 0))
@@ -241,7 +329,7 @@ def add_legend(img, games, event_type, side, map_display_name):  # Added map_dis
 
     
     for i, game in enumerate(games):
-        team1, team2 = get_team_acronyms(game['platform_game_id'])
+        team1, team2 = team_acronyms.get(game['platform_game_id'], ('TBD', 'TBD'))
         match_text = f"Game {i+1}: {team1} vs {team2}"
         color = game['color']
         draw.rectangle([x, y, x+20, y+20], fill=color, outline="black")
@@ -269,57 +357,104 @@ def add_legend(img, games, event_type, side, map_display_name):  # Added map_dis
     
     return new_img
 
-def get_team_acronyms(platform_game_id):
-    """Get team acronyms for a match"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def add_heatmap_legend(img, games, side, map_display_name, kills, deaths):
+    """Add a legend describing a heatmap: games covered and the kill/death totals for the side"""
+    legend_width = 300
+    new_img = Image.new('RGB', (img.width + legend_width, img.height), color='white')
+    new_img.paste(img, (0, 0))
+
+    draw = ImageDraw.Draw(new_img)
+    font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 14)
+
+    x, y = img.width + 10, 10
+    draw.text((x, y), "Legend", fill="black", font=font)
+    y += 20
+    draw.text((x, y), f"{map_display_name} {side.upper()}", fill="black", font=font)
+    y += 30
+
+    dates = [game['game_date'] for game in games if game.get('game_date')]
+    draw.text((x, y), f"{len(games)} games", fill="black", font=font)
+    y += 20
+    if dates:
+        draw.text((x, y), f"{min(dates):%Y-%m-%d} to {max(dates):%Y-%m-%d}", fill="black", font=font)
+        y += 20
+    y += 20
+
+    for color, label in ((KILL_HEAT_COLOR, f"Player's kills ({kills})"), (DEATH_HEAT_COLOR, f"Player's deaths ({deaths})")):
+        draw.rectangle([x, y, x+20, y+20], fill=color, outline="black")
+        draw.text((x+30, y+3), label, fill="black", font=font)
+        y += 30
+
+    draw.text((x, y), "Brighter areas: more events", fill="black", font=font)
+    return new_img
+
+def get_render_data(player_id: str, platform_game_ids: List[str], conn=None):
+    """
+    Events and team acronyms for a set of games: two queries on one connection (opened here if not given).
+    Returns ({platform_game_id: [events]}, {platform_game_id: (team1, team2)}).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    try:
+        events = get_events_for_games(platform_game_ids, [player_id], conn)
+        events_by_game = {
+            platform_game_id: events.get((platform_game_id, player_id), [])
+            for platform_game_id in platform_game_ids
+        }
+        return events_by_game, get_team_acronyms_for_games(platform_game_ids, conn)
+    finally:
+        if own_conn:
+            conn.close()
+
+def get_team_acronyms_for_games(platform_game_ids: List[str], conn) -> Dict:
+    """Get team acronyms for many games in one query, keyed by platform_game_id"""
+    cursor = conn.cursor(cursor_factory=TracedCursor)
     query = """
-    SELECT DISTINCT MIN(t.acronym) as acronym
+    SELECT tm.platform_game_id, MIN(t.acronym) as acronym
     FROM team_mapping tm
     JOIN teams t ON tm.team_id = t.team_id
-    WHERE tm.platform_game_id = %s
-    GROUP BY tm.team_id
+    WHERE tm.platform_game_id = ANY(%s)
+    GROUP BY tm.platform_game_id, tm.team_id
     """
-    
-    cursor.execute(query, (platform_game_id,))
+    cursor.execute(query, (list(platform_game_ids),))
     results = cursor.fetchall()
-    
     cursor.close()
-    conn.close()
-    
-    if len(results) == 2:
-        return results[0]['acronym'], results[1]['acronym']
-    elif len(results) == 1:
-        return results[0]['acronym'], 'TBD'
-    else:
-        return 'TBD', 'TBD'
-
-def get_game_events(platform_game_id, player_id, event_type, conn):
-    """Get game events for a player"""
-    try:
-        cursor = conn.cursor()
-        query = """
-            SELECT 
-                deceased_x, deceased_y, killer_x, killer_y,
-                true_deceased_id, true_killer_id, killer_is_attacking, deceased_is_attacking
-            FROM player_died
-            WHERE platform_game_id = %s 
-            AND (true_deceased_id = %s OR true_killer_id = %s)
-        """
-        cursor.execute(query, (platform_game_id, player_id, player_id))
-        events = cursor.fetchall()
 
-        if event_type == 'kills':
-            return [e for e in events if e['true_killer_id'] == player_id]
-        elif event_type == 'deaths':
-            return [e for e in events if e['true_deceased_id'] == player_id]
-        else:
-            return events
+    acronyms_by_game = {}
+    for row in results:
+        acronyms_by_game.setdefault(row['platform_game_id'], []).append(row['acronym'])
 
-    except Exception as e:
-        logger.error(f"Error in get_game_events: {str(e)}")
-        return []
+    return {
+        platform_game_id: tuple((acronyms_by_game.get(platform_game_id, []) + ['TBD', 'TBD'])[:2])
+        for platform_game_id in platform_game_ids
+    }
+
+def get_events_for_games(platform_game_ids: List[str], player_ids: List[str], conn) -> Dict:
+    """
+    Get kill/death events for many players across many games in one query.
+    Returns {(platform_game_id, player_id): [events]}.
+    """
+    cursor = conn.cursor(cursor_factory=TracedCursor)
+    query = """
+        SELECT 
+            platform_game_id, deceased_x, deceased_y, killer_x, killer_y,
+            true_deceased_id, true_killer_id, killer_is_attacking, deceased_is_attacking
+        FROM player_died
+        WHERE platform_game_id = ANY(%s)
+        AND (true_deceased_id = ANY(%s) OR true_killer_id = ANY(%s))
+    """
+    player_ids = list(player_ids)
+    cursor.execute(query, (list(platform_game_ids), player_ids, player_ids))
+    events = cursor.fetchall()
+    cursor.close()
+
+    wanted = set(player_ids)
+    events_by_game_player = {}
+    for event in events:
+        for player_id in {event['true_killer_id'], event['true_deceased_id']} & wanted:
+            events_by_game_player.setdefault((event['platform_game_id'], player_id), []).append(event)
+    return events_by_game_player
 
 def get_distinct_colors(n):
     """Generate distinct colors for visualization"""
@@ -346,17 +481,3 @@ def get_distinct_colors(n):
     ]
 
     return cb_friendly_palette[:min(n, len(cb_friendly_palette))] + colors[:max(0, n - len(cb_friendly_palette))]
-
-def upload_to_s3(file_name, file_content, content_type):
-    """Upload file to S3 bucket"""
-    try:
-        s3_client.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=file_name,
-            Body=file_content,
-            ContentType=content_type
-        )
-        return f"https://{S3_BUCKET_NAME}.s3.{S3_REGION}.amazonaws.com/{file_name}"
-    except ClientError as e:
-        logger.error(f"Error uploading to S3: {str(e)}")
-        return None
\ No newline at end of file
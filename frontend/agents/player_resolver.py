@@ -0,0 +1,192 @@
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+import psycopg2
+from .tracing import TracedCursor
+from .data_version import get_data_version
+
+logger = logging.getLogger()
+
+# Same cut-off the SQL lookups use with pg_trgm's similarity()
+MIN_SIMILARITY = 0.3
+# After a failed load the players table is not queried again for this long; callers fall back to SQL
+# (or keep the previous index) in the meantime
+PLAYER_RESOLVER_RETRY_SECONDS = float(os.getenv('PLAYER_RESOLVER_RETRY_SECONDS', '30'))
+
+_word_split = re.compile(r'[\W_]+')
+
+def get_db_connection():
+    db_url = os.getenv('RDS_DATABASE_URL')
+    return psycopg2.connect(db_url, cursor_factory=TracedCursor)
+
+def trigrams(text: Optional[str]) -> frozenset:
+    """Trigram set of a string, built the same way pg_trgm does (lowercased words padded with '  ' and ' ')"""
+    if not text:
+        return frozenset()
+    grams = set()
+    for word in _word_split.split(text.lower()):
+        if word:
+            padded = f"  {word} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+class TrigramIndex:
+    """Inverted trigram index answering top-k similarity queries without scanning every entry"""
+
+    def __init__(self):
+        self._postings = defaultdict(list)
+        self._sizes = []
+        self.entries = []
+
+    def add(self, text: Optional[str], entry: Dict):
+        grams = trigrams(text)
+        entry_index = len(self.entries)
+        self.entries.append(entry)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._postings[gram].append(entry_index)
+
+    def scores(self, text: Optional[str]) -> Dict[int, float]:
+        query = trigrams(text)
+        if not query:
+            return {}
+        shared = defaultdict(int)
+        for gram in query:
+            for entry_index in self._postings.get(gram, ()):
+                shared[entry_index] += 1
+        return {
+            entry_index: count / (len(query) + self._sizes[entry_index] - count)
+            for entry_index, count in shared.items()
+        }
+
+class PlayerResolver:
+    """
+    In-memory replacement for the similarity() lookups against the players table. Handles and names
+    are loaded once and indexed by trigram; the index is rebuilt when the ingest data version changes.
+    """
+
+    def __init__(self, min_similarity: float = MIN_SIMILARITY, retry_seconds: float = PLAYER_RESOLVER_RETRY_SECONDS):
+        self.min_similarity = min_similarity
+        self.retry_seconds = retry_seconds
+        self._failed_at = None
+        self._lock = threading.Lock()
+        self._version = None
+        self._handles = None
+        self._first_names = None
+        self._last_names = None
+        self._handle_set = None
+
+    def _load(self, conn) -> List[Dict]:
+        with conn.cursor(cursor_factory=TracedCursor) as cur:
+            cur.execute("""
+                SELECT player_id, handle, first_name, last_name, updated_at
+                FROM players
+            """)
+            return cur.fetchall()
+
+    def _build(self, rows: List[Dict]):
+        # Mirror the DISTINCT ON ... ORDER BY updated_at DESC in the SQL lookups: latest row wins
+        rows = sorted(rows, key=lambda row: (row['updated_at'] is not None, row['updated_at']), reverse=True)
+
+        handles = TrigramIndex()
+        seen_handles = set()
+        first_names = TrigramIndex()
+        last_names = TrigramIndex()
+        seen_names = set()
+
+        for row in rows:
+            entry = {
+                'player_id': row['player_id'],
+                'handle': row['handle'],
+                'first_name': row['first_name'],
+                'last_name': row['last_name']
+            }
+            handle_key = (row['handle'] or '').lower()
+            if handle_key not in seen_handles:
+                seen_handles.add(handle_key)
+                handles.add(row['handle'], entry)
+
+            name_key = (row['first_name'] or '').lower() + (row['last_name'] or '').lower()
+            if name_key not in seen_names:
+                seen_names.add(name_key)
+                first_names.add(row['first_name'], entry)
+                last_names.add(row['last_name'], entry)
+
+        self._handles, self._first_names, self._last_names = handles, first_names, last_names
+        self._handle_set = None
+        logger.info(f"Player resolver indexed {len(handles.entries)} handles and {len(first_names.entries)} names")
+
+    def refresh(self, conn=None, force: bool = False) -> bool:
+        """
+        Rebuild the index if the data version moved (or force is set). A failed load is not retried
+        for retry_seconds.
+        Returns False if the index is unavailable, so callers can fall back to SQL.
+        """
+        version = get_data_version(conn)
+        with self._lock:
+            if not force and self._handles is not None and version == self._version:
+                return True
+            if not force and self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_seconds:
+                return self._handles is not None
+            try:
+                if conn is not None:
+                    rows = self._load(conn)
+                else:
+                    new_conn = get_db_connection()
+                    try:
+                        rows = self._load(new_conn)
+                    finally:
+                        new_conn.close()
+                self._build(rows)
+                self._version = version
+                self._failed_at = None
+            except Exception as e:
+                self._failed_at = time.monotonic()
+                logger.error(f"Error refreshing player resolver, retrying in {self.retry_seconds:g}s: {str(e)}", exc_info=True)
+            return self._handles is not None
+
+    def known_handles(self) -> Optional[frozenset]:
+        """Lowercased handles of every indexed player, or None if the index is unavailable"""
+        if not self.refresh():
+            return None
+        with self._lock:
+            if self._handle_set is None:
+                self._handle_set = frozenset((entry['handle'] or '').lower() for entry in self._handles.entries) - {''}
+            return self._handle_set
+
+    def _top_k(self, index: TrigramIndex, scores: Dict[int, float], k: int) -> List[Dict]:
+        best = heapq.nlargest(k, ((score, entry_index) for entry_index, score in scores.items() if score > self.min_similarity))
+        return [dict(index.entries[entry_index], score=round(score, 4)) for score, entry_index in best]
+
+    def resolve_handle(self, handle: str, k: int = 5) -> Optional[List[Dict]]:
+        """Top-k players whose handle is most similar to the given one, or None if the index is unavailable"""
+        if not self.refresh():
+            return None
+        return self._top_k(self._handles, self._handles.scores(handle), k)
+
+    def resolve_name(self, first_name: Optional[str] = None, last_name: Optional[str] = None, k: int = 5) -> Optional[List[Dict]]:
+        """Top-k players scored by greatest(first name similarity, last name similarity), or None if the index is unavailable"""
+        if not self.refresh():
+            return None
+        scores = self._first_names.scores(first_name)
+        for entry_index, score in self._last_names.scores(last_name).items():
+            scores[entry_index] = max(score, scores.get(entry_index, 0.0))
+        return self._top_k(self._first_names, scores, k)
+
+    def resolve(self,
+                player_identifier: Optional[str] = None,
+                first_name: Optional[str] = None,
+                last_name: Optional[str] = None,
+                search_type: str = 'handle',
+                k: int = 5) -> Optional[List[Dict]]:
+        """Resolve using the same arguments as the get_player_stats tool"""
+        if search_type == 'handle':
+            return self.resolve_handle(player_identifier, k)
+        return self.resolve_name(first_name, last_name, k)
+
+player_resolver = PlayerResolver()
@@ -0,0 +1,82 @@
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger()
+
+S3_BUCKET_NAME = "map-imgs"
+S3_REGION = "us-east-1"
+
+class S3RenderStore:
+    """Stores rendered map images in the public map-imgs bucket"""
+
+    def __init__(self, bucket: str = S3_BUCKET_NAME, region: str = S3_REGION):
+        import boto3
+
+        self.bucket = bucket
+        self.region = region
+        self.client = boto3.client('s3', region_name=region)
+
+    def url(self, key: str) -> str:
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError:
+            return False
+
+    def put(self, key: str, body: bytes, content_type: str) -> Optional[str]:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=body, ContentType=content_type)
+            return self.url(key)
+        except ClientError as e:
+            logger.error(f"Error uploading to S3: {str(e)}")
+            return None
+
+class LocalRenderStore:
+    """
+    Filesystem stand-in for the S3 bucket, for running offline. Images are served from base_url
+    when one is configured (e.g. a static file server over the directory), otherwise as file:// URLs.
+    """
+
+    def __init__(self, root_dir: str, base_url: Optional[str] = None):
+        self.root = Path(root_dir)
+        self.base_url = base_url.rstrip('/') if base_url else None
+
+    def url(self, key: str) -> str:
+        if self.base_url:
+            return f"{self.base_url}/{key}"
+        return (self.root / key).resolve().as_uri()
+
+    def exists(self, key: str) -> bool:
+        return (self.root / key).is_file()
+
+    def put(self, key: str, body: bytes, content_type: str) -> Optional[str]:
+        path = self.root / key
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            tmp_path.write_bytes(body)
+            tmp_path.replace(path)
+            return self.url(key)
+        except OSError as e:
+            logger.error(f"Error writing render to {path}: {str(e)}")
+            return None
+
+def create_render_store():
+    """
+    Pick the render store from the environment:
+        MAP_RENDER_STORE=local  -> LocalRenderStore(MAP_RENDER_DIR, MAP_RENDER_BASE_URL)
+        anything else           -> S3RenderStore
+    """
+    if os.getenv('MAP_RENDER_STORE', 's3').lower() == 'local':
+        root_dir = os.getenv('MAP_RENDER_DIR', os.path.join(os.getcwd(), 'map_renders'))
+        return LocalRenderStore(root_dir, os.getenv('MAP_RENDER_BASE_URL'))
+    return S3RenderStore()
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger()
+
+class LRUResultCache:
+    """
+    In-process LRU cache whose entries expire after ttl_seconds or as soon as they are
+    read with a different data version than the one they were stored under.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 900):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, version: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            entry_version, expires_at, value = entry
+            if entry_version != version or expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, version: int):
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[str] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"backend": "memory", "entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+class RedisResultCache:
+    """
+    Redis (or any Redis-compatible server) backed cache. The data version is part of the key,
+    so bumping the version orphans old entries and the server expires them after ttl_seconds.
+    Values must be JSON serializable.
+    """
+
+    def __init__(self, redis_url: str, namespace: str, ttl_seconds: float = 900):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str, version: int) -> str:
+        return f"{self.namespace}:v{version}:{key}"
+
+    def get(self, key: str, version: int) -> Optional[Any]:
+        try:
+            raw = self.client.get(self._key(key, version))
+        except Exception as e:
+            logger.warning(f"Redis cache get failed for {key}: {str(e)}")
+            raw = None
+
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, version: int):
+        try:
+            self.client.set(self._key(key, version), json.dumps(value, default=str), ex=int(self.ttl_seconds))
+        except Exception as e:
+            logger.warning(f"Redis cache set failed for {key}: {str(e)}")
+
+    def invalidate(self, key: Optional[str] = None):
+        pattern = f"{self.namespace}:v*:{key if key is not None else '*'}"
+        try:
+            for redis_key in self.client.scan_iter(match=pattern):
+                self.client.delete(redis_key)
+        except Exception as e:
+            logger.warning(f"Redis cache invalidate failed for {pattern}: {str(e)}")
+
+    def stats(self) -> Dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+def create_result_cache(namespace: str, max_entries: int = 256, ttl_seconds: float = 900):
+    """
+    Create a result cache for the given namespace. Uses Redis when RESULT_CACHE_REDIS_URL is set
+    (and the redis package is installed), otherwise an in-process LRU.
+
+    Args:
+        namespace (str): Prefix separating this cache's keys from other caches on a shared server
+        max_entries (int): LRU capacity for the in-process backend
+        ttl_seconds (float): Maximum age of an entry
+    """
+    redis_url = os.getenv('RESULT_CACHE_REDIS_URL')
+    if redis_url:
+        try:
+            return RedisResultCache(redis_url, namespace, ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Falling back to in-process cache for {namespace}: {str(e)}")
+    return LRUResultCache(max_entries, ttl_seconds)
@@ -0,0 +1,76 @@
+"""
+Streams model output to the UI while a request is still running. Agents keep returning their complete
+ConversationMessage (so chat storage and the ChainAgent work as before) and additionally emit text
+deltas and status updates to the TokenStream of the request they run in. Tool calls are resolved
+server-side between the streamed segments.
+
+Events are dicts: {"type": "text", "text": delta}, {"type": "status", "text": message} and, last,
+{"type": "done", "result": <return value of the request>}.
+"""
+import asyncio
+import contextvars
+import os
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional
+
+# Set STREAM_RESPONSES=false to go back to single responses for the user-facing agents
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', 'true').lower() == 'true'
+
+_current_stream: contextvars.ContextVar[Optional['TokenStream']] = contextvars.ContextVar('token_stream', default=None)
+
+class TokenStream:
+    """Queue of events for one request. emit is safe to call from executor threads."""
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # Characters of text sent so far
+        self.text_emitted = 0
+
+    def emit(self, event: Optional[Dict[str, Any]]):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        return await self._queue.get()
+
+def emit_text(text: str):
+    """Send a text delta to the current request's stream; a no-op outside stream_events"""
+    stream = _current_stream.get()
+    if stream is not None and text:
+        stream.text_emitted += len(text)
+        stream.emit({"type": "text", "text": text})
+
+def text_emitted() -> int:
+    """Characters of text the current request has streamed so far (0 outside stream_events)"""
+    stream = _current_stream.get()
+    return stream.text_emitted if stream is not None else 0
+
+def emit_status(text: str):
+    """Send a progress message (e.g. which tool is running) to the current request's stream"""
+    stream = _current_stream.get()
+    if stream is not None:
+        stream.emit({"type": "status", "text": text})
+
+async def stream_events(request: Awaitable[Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run a request and yield the events its agents emit as they arrive, then a "done" event with its
+    result. Exceptions raised by the request are re-raised after the events emitted before them.
+
+    Args:
+        request (Awaitable): Coroutine to run, e.g. orchestrator.route_request(...)
+    """
+    stream = TokenStream()
+    token = _current_stream.set(stream)
+    try:
+        # The task copies the current context, so everything it runs sees this stream
+        task = asyncio.ensure_future(request)
+    finally:
+        _current_stream.reset(token)
+    task.add_done_callback(lambda _: stream.emit(None))
+
+    try:
+        while (event := await stream.get()) is not None:
+            yield event
+    finally:
+        if not task.done():
+            task.cancel()
+    yield {"type": "done", "result": task.result()}
@@ -2,27 +2,42 @@ from multi_agent_orchestrator.agents import BedrockLLMAgent, BedrockLLMAgentOpti
 from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
 from typing import List, Dict, Optional
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import json
 import logging
 import os
-import json
 import asyncio
 from .custom.custom_bedrock_agent import CustomBedrockLLMAgent
 from .custom.custom_anthropic_agent import CustomAnthropicAgent
 from .player_maps import process_player_map_visualizations
+from .tracing import span, run_in_executor, current_span, TracedCursor
+from .data_version import get_data_version
+from .result_cache import create_result_cache
+from .single_flight import SingleFlight
+from .tool_payloads import compact_for_model, compact_team_result
+from .streaming import STREAM_RESPONSES
+from .tool_dispatch import dispatch_bedrock_tool_uses, dispatch_anthropic_tool_uses
 import concurrent.futures
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Identical team builds (same counts, same data version) share one run while in flight, and the
+# result is reused for a short while afterwards to absorb re-submits
+team_build_flight = SingleFlight()
+team_build_cache = create_result_cache(
+    'team_builds',
+    max_entries=int(os.getenv('TEAM_BUILD_CACHE_SIZE', '32')),
+    ttl_seconds=float(os.getenv('TEAM_BUILD_CACHE_TTL', '120'))
+)
+
 def get_db_connection():
     db_url = os.getenv('RDS_DATABASE_URL')
-    return psycopg2.connect(db_url, cursor_factory=RealDictCursor)
+    return psycopg2.connect(db_url, cursor_factory=TracedCursor)
 
 def get_top_players_by_role(role: str, tournament_types: Dict[str, int]) -> Dict:
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TracedCursor) as cur:
                 results = {}
                 
                 # Step 1: Get top players by normalized score with games adjustment
@@ -256,29 +271,28 @@ def get_top_players_by_role(role: str, tournament_types: Dict[str, int]) -> Dict
 
 async def get_all_roles_parallel(tournament_types: Dict[str, int]) -> Dict:
     roles = ['controller', 'duelist', 'initiator', 'sentinel', 'igl']
-    loop = asyncio.get_event_loop()
     
     async def fetch_role(role):
-        role_data = await loop.run_in_executor(
-            None, 
-            get_top_players_by_role,
-            role,
-            tournament_types
-        )
-        
-        # Process map visualizations for each player
-        conn = get_db_connection()
-        for tournament_type, players in role_data.items():
-            for player in players:
-                if player['top_maps']:
-                    player['top_maps'] = await process_player_map_visualizations(
-                        player['player_id'],
-                        player['top_maps'],
-                        conn
-                    )
-        conn.close()
-        
-        return role, role_data
+        with span("team_builder_role", role=role):
+            role_data = await run_in_executor(
+                get_top_players_by_role,
+                role,
+                tournament_types
+            )
+            
+            # Process map visualizations for each player
+            conn = get_db_connection()
+            for tournament_type, players in role_data.items():
+                for player in players:
+                    if player['top_maps']:
+                        player['top_maps'] = await process_player_map_visualizations(
+                            player['player_id'],
+                            player['top_maps'],
+                            conn
+                        )
+            conn.close()
+            
+            return role, role_data
     
     tasks = [fetch_role(role) for role in roles]
     results = await asyncio.gather(*tasks)
@@ -305,174 +319,134 @@ def team_builder_wrapper(vct_international: int = 0,
                 "message": "At least one tournament type count must be greater than 0"
             }
 
-        result = asyncio.run(get_all_roles_parallel(tournament_types))
-        
-        formatted_result = {
-            "status": "success",
-            "data": {
-                role: {
-                    tournament_type: [
-                        {
-                            "player": {
-                                "name": f"{player['first_name']} {player['last_name']}",
-                                "player_id": player['player_id'],
-                                "handle": player['handle'],
-                                "team": player['team_name'],
-                                "region": player['region']
-                            },
-                            "overall_stats": {
-                                "total_games": int(player['total_games_played']),
-                                "average_combat_score": float(player['avg_combat_score']),
-                                "average_kda": float(player['avg_kda']),
-                                "role_percentage": float(player['role_percentage'])
-                            },
-                            "agent_stats": [
-                                {
-                                    "agent_name": agent_stat['agent_name'],
-                                    "agent_role": agent_stat['agent_role'],
-                                    "games_played": int(agent_stat['games_played']),
-                                    "average_kda": float(agent_stat['average_kda'])
-                                }
-                                for agent_stat in player['top_agents']
-                            ],
-                            "map_stats": [
-                                {
-                                    "map": map_stat['map'],
-                                    "display_name": map_stat['display_name'],
-                                    "average_kda": float(map_stat['average_kda']),
-                                    "games_played": int(map_stat['games_played']),
-                                    "preferred_site": map_stat['preferred_site'],
-                                    "site_percentage": float(map_stat['site_percentage']),
-                                    "visualization": map_stat.get('visualization', {})
-                                }
-                                for map_stat in player['top_maps']
-                            ],
-                            "combat_stats": {
-                                "attacking": {
-                                    "kills": float(player['avg_kills_attacking']),
-                                    "deaths": float(player['avg_deaths_attacking']),
-                                    "assists": float(player['avg_assists_attacking'])
-                                },
-                                "defending": {
-                                    "kills": float(player['avg_kills_defending']),
-                                    "deaths": float(player['avg_deaths_defending']),
-                                    "assists": float(player['avg_assists_defending'])
-                                }
-                            },
-                            "round_impact": {
-                                "rounds_survived": float(player['avg_rounds_survived']),
-                                "rounds_won": float(player['avg_rounds_won']),
-                            },
-                            "playmaking": {
-                                "first_bloods": float(player['avg_first_bloods']),
-                                "multi_kills": float(player['avg_multi_kills']),
-                                "clutch_wins": float(player['avg_clutch_wins'])
-                            },
-                            "ability_usage": {
-                                "damage": {
-                                    "usage": float(player['avg_ability_damage']),
-                                    "effectiveness": float(player['avg_ability_effectiveness_damage'])
-                                },
-                                "utility": {
-                                    "usage": float(player['avg_ability_utility']),
-                                    "effectiveness": float(player['avg_ability_effectiveness_utility'])
-                                },
-                            }
-                        }
-                        for player in players
-                    ]
-                    for tournament_type, players in role_data.items()
-                    if players
-                }
-                for role, role_data in result.items()
-            }
-        }
-        
-        return formatted_result
+        key = json.dumps(tournament_types, sort_keys=True)
+        data_version = get_data_version()
+        cached = team_build_cache.get(key, data_version)
+        if cached is not None:
+            logger.info(f"Serving cached team build for {key} (data version {data_version})")
+            _record_team_build('cached')
+            return cached
+
+        result, shared = team_build_flight.do(f"{key}:v{data_version}", build_team, tournament_types)
+        if shared:
+            logger.info(f"Joined in-flight team build for {key} (data version {data_version})")
+        elif result.get('status') == 'success':
+            team_build_cache.set(key, result, data_version)
+        _record_team_build('shared' if shared else 'built')
+        return result
 
     except Exception as e:
         logger.error(f"Error in team_builder_wrapper: {str(e)}", exc_info=True)
         return {"status": "error", "message": str(e)}
 
-async def bedrock_function_handler(response, conversation):
-    try:
-        if isinstance(response.content, list) and len(response.content) > 0:
-            # Find the content item that contains toolUse
-            tool_use = None
-            for content_item in response.content:
-                if 'toolUse' in content_item:
-                    tool_use = content_item['toolUse']
-                    break
-            
-            if not tool_use:
-                return json.dumps({
-                    "status": "error",
-                    "message": "No tool use found in response"
-                })
-
-            input_data = tool_use.get('input', {})
-
-            # Add debug logging
-            logger.info(f"Found input data: {input_data}")
-
-            result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                team_builder_wrapper,
-                input_data.get('vct_international', 0),
-                input_data.get('vct_challenger', 0),
-                input_data.get('game_changers', 0)
-            )
-
-            return json.dumps(result, default=str)
-        else:
-            return json.dumps({
-                "status": "error",
-                "message": "Unexpected response format"
-            })
-
-    except Exception as e:
-        logger.error(f"Error in bedrock_function_handler: {str(e)}", exc_info=True)
-        return json.dumps({"status": "error", "message": str(e)})
+def _record_team_build(source: str):
+    active = current_span()
+    if active is not None:
+        active.set_attribute('team_build', source)
 
-async def anthropic_function_handler(response, conversation):
-    try:
-        # Find tool_use content block
-        tool_use_blocks = [content for content in response.content if content.type == 'tool_use']
-        if tool_use_blocks:
-            # Get the first tool use block
-            tool_block = tool_use_blocks[0]
-            tool_input = tool_block.input
-            
-            result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                team_builder_wrapper,
-                tool_input.get('vct_international', 0),
-                tool_input.get('vct_challenger', 0),
-                tool_input.get('game_changers', 0)
-            )
-
-            # Return in the correct format matching the documentation
-            return {
-                "role": "user",
-                "content": [
+def build_team(tournament_types: Dict[str, int]) -> Dict:
+    """Run the role queries and map renders for the tournament counts and format the result"""
+    result = asyncio.run(get_all_roles_parallel(tournament_types))
+    
+    formatted_result = {
+        "status": "success",
+        "data": {
+            role: {
+                tournament_type: [
                     {
-                        "type": "tool_result",
-                        "tool_use_id": tool_block.id,  # This is the correct field name
-                        "content": json.dumps(result, default=str)  # Direct content string
+                        "player": {
+                            "name": f"{player['first_name']} {player['last_name']}",
+                            "player_id": player['player_id'],
+                            "handle": player['handle'],
+                            "team": player['team_name'],
+                            "region": player['region']
+                        },
+                        "overall_stats": {
+                            "total_games": int(player['total_games_played']),
+                            "average_combat_score": float(player['avg_combat_score']),
+                            "average_kda": float(player['avg_kda']),
+                            "role_percentage": float(player['role_percentage'])
+                        },
+                        "agent_stats": [
+                            {
+                                "agent_name": agent_stat['agent_name'],
+                                "agent_role": agent_stat['agent_role'],
+                                "games_played": int(agent_stat['games_played']),
+                                "average_kda": float(agent_stat['average_kda'])
+                            }
+                            for agent_stat in player['top_agents']
+                        ],
+                        "map_stats": [
+                            {
+                                "map": map_stat['map'],
+                                "display_name": map_stat['display_name'],
+                                "average_kda": float(map_stat['average_kda']),
+                                "games_played": int(map_stat['games_played']),
+                                "preferred_site": map_stat['preferred_site'],
+                                "site_percentage": float(map_stat['site_percentage']),
+                                "visualization": map_stat.get('visualization', {})
+                            }
+                            for map_stat in player['top_maps']
+                        ],
+                        "combat_stats": {
+                            "attacking": {
+                                "kills": float(player['avg_kills_attacking']),
+                                "deaths": float(player['avg_deaths_attacking']),
+                                "assists": float(player['avg_assists_attacking'])
+                            },
+                            "defending": {
+                                "kills": float(player['avg_kills_defending']),
+                                "deaths": float(player['avg_deaths_defending']),
+                                "assists": float(player['avg_assists_defending'])
+                            }
+                        },
+                        "round_impact": {
+                            "rounds_survived": float(player['avg_rounds_survived']),
+                            "rounds_won": float(player['avg_rounds_won']),
+                        },
+                        "playmaking": {
+                            "first_bloods": float(player['avg_first_bloods']),
+                            "multi_kills": float(player['avg_multi_kills']),
+                            "clutch_wins": float(player['avg_clutch_wins'])
+                        },
+                        "ability_usage": {
+                            "damage": {
+                                "usage": float(player['avg_ability_damage']),
+                                "effectiveness": float(player['avg_ability_effectiveness_damage'])
+                            },
+                            "utility": {
+                                "usage": float(player['avg_ability_utility']),
+                                "effectiveness": float(player['avg_ability_effectiveness_utility'])
+                            },
+                        }
                     }
+                    for player in players
                 ]
+                for tournament_type, players in role_data.items()
+                if players
             }
-        else:
-            return {
-                "role": "assistant",
-                "content": "No tool use block found in the response"
-            }
-    except Exception as e:
-        logger.error(f"Error in anthropic_function_handler: {str(e)}", exc_info=True)
-        return {
-            "role": "assistant",
-            "content": f"Error occurred while processing tool: {str(e)}"
+            for role, role_data in result.items()
         }
+    }
+    
+    return formatted_result
+
+async def run_team_builder_tool(tool_name: str, tool_input: Dict) -> Dict:
+    """Run one get_all_players call off the event loop and compact its result for the model"""
+    logger.info(f"Found input data: {tool_input}")
+    result = await run_in_executor(
+        team_builder_wrapper,
+        tool_input.get('vct_international', 0),
+        tool_input.get('vct_challenger', 0),
+        tool_input.get('game_changers', 0)
+    )
+    return compact_for_model('team_builder_wrapper', result, compact_team_result)
+
+async def bedrock_function_handler(response, conversation):
+    return await dispatch_bedrock_tool_uses(response, run_team_builder_tool)
+
+async def anthropic_function_handler(response, conversation):
+    return await dispatch_anthropic_tool_uses(response, run_team_builder_tool)
 
 def setup_team_builder_agent(use_anthropic=False, anthropic_api_key=None, rds_database_url=None):
     # Anthropic tool format
@@ -543,7 +517,7 @@ def setup_team_builder_agent(use_anthropic=False, anthropic_api_key=None, rds_da
             description='An agent for building optimal team compositions based on tournament data',
             model_id='claude-3-5-sonnet-20241022',
             api_key=anthropic_api_key,
-            streaming=False,
+            streaming=STREAM_RESPONSES,
             save_chat=True,
             inference_config={
                 'maxTokens': 4096,
@@ -560,6 +534,7 @@ def setup_team_builder_agent(use_anthropic=False, anthropic_api_key=None, rds_da
             description='An agent for building optimal team compositions based on tournament data',
             model_id='anthropic.claude-3-sonnet-20240229-v1:0',
             region='us-west-2',
+            streaming=STREAM_RESPONSES,
             save_chat=True,
             inference_config={
                 'maxTokens': 4096,
@@ -599,65 +574,45 @@ def setup_team_builder_agent(use_anthropic=False, anthropic_api_key=None, rds_da
         </tool_instructions>
 
         <data_structure>
-        The tool returns player data organized by role (initiator, duelist, controller, sentinel, igl) containing:
+        The tool returns a compact table. "columns" names the fields of each row, in order, and "data" holds
+        player rows organized by role (initiator, duelist, controller, sentinel, igl) and then by tournament type.
 
-        1. Player Information:
+        1. Player row ("columns.player"):
         - name: Full name (first_name + last_name)
-        - player_id: Unique identifier
         - handle: In-game name
         - team: Current team name
         - region: Player's competitive region
-
-        2. Overall Statistics:
-        - total_games: Number of games played
-        - average_combat_score: Average combat score per game
-        - average_kda: Overall KDA ratio
-        - role_percentage: Percentage of games played in this role
-
-        3. Agent Statistics (top 3 most played):
-        - agent_name: Name of the agent
-        - agent_role: Role category of the agent
-        - games_played: Number of games on this agent
-        - average_kda: KDA ratio on this agent
-
-        4. Map Statistics (top 3 most played):
-        - map: Internal map identifier
-        - display_name: User-friendly map name
-        - average_kda: KDA ratio on this map
-        - games_played: Number of games on this map
-        - preferred_site: Most commonly played site (A or B)
-        - site_percentage: Percentage of rounds played on preferred site
-        - visualization: Contains a url for a s3 bucket that contains an image of a marked up
-        minimap for the map with attacking/defending kill and death events
-
-        5. Combat Statistics:
-        Attacking:
-        - kills: Average kills per round on attack
-        - deaths: Average deaths per round on attack
-        - assists: Average assists per round on attack
-        
-        Defending:
-        - kills: Average kills per round on defense
-        - deaths: Average deaths per round on defense
-        - assists: Average assists per round on defense
-
-        6. Round Impact:
+        - games: Total number of games played
+        - acs: Average combat score per game
+        - kda: Overall KDA ratio
+        - role_pct: Percentage of games played in this role
+        - atk_kills / atk_deaths / atk_assists: Average kills, deaths and assists per round on attack
+        - def_kills / def_deaths / def_assists: Average kills, deaths and assists per round on defense
         - rounds_survived: Average rounds survived per game
         - rounds_won: Average rounds won per game
-
-        7. Playmaking:
         - first_bloods: Average first bloods per game
         - multi_kills: Average multi-kills per game
         - clutch_wins: Average clutch wins per game
-
-        8. Ability Usage:
-        Damage:
-        - usage: Average number of damage-dealing abilities used
-        - effectiveness: Percentage of damage abilities resulting in kills
-        
-        Utility:
-        - usage: Average number of utility abilities used
-        - effectiveness: Percentage of utility abilities resulting in assists
+        - damage_ability_usage: Average number of damage-dealing abilities used
+        - damage_ability_eff: Percentage of damage abilities resulting in kills
+        - utility_ability_usage: Average number of utility abilities used
+        - utility_ability_eff: Percentage of utility abilities resulting in assists
+        - agents: Agent rows for the top 3 most played agents
+        - maps: Map rows for the top 3 most played maps
+
+        2. Agent row ("columns.agents"):
+        - agent: Name of the agent
+        - games: Number of games on this agent
+        - kda: KDA ratio on this agent
+
+        3. Map row ("columns.maps"):
+        - map: Map name
+        - games: Number of games on this map
+        - kda: KDA ratio on this map
+        - preferred_site: Most commonly played site (A, B or C)
+        - site_pct: Percentage of rounds played on preferred site
+        - attacking_url / defending_url: Urls of images of the marked up minimap with the attacking and
+        defending kill and death events (null if no image is available)
         </data_structure>
 
         <team_building_process>
@@ -0,0 +1,104 @@
+"""
+Local version of the vct-input-parser prompt rules: turns a team building request into the
+VCT_INTERNATIONAL / VCT_CHALLENGER / GAME_CHANGERS counts and constraints in the parser's output format.
+It only answers when every word of the request is accounted for; anything else (regions, roles, named
+players, follow-ups) returns None so the LLM parser handles it.
+"""
+import re
+from typing import Dict, List, Optional
+
+TOURNAMENT_TYPES = ('VCT_INTERNATIONAL', 'VCT_CHALLENGER', 'GAME_CHANGERS')
+
+TYPE_PATTERNS = {
+    'VCT_INTERNATIONAL': r"\b(?:vct[\s-]*)?internationals?\b",
+    'VCT_CHALLENGER': r"\b(?:vct[\s-]*)?challengers?\b",
+    'GAME_CHANGERS': r"\b(?:vct[\s-]*)?game[\s-]*changers?\b|\bunderrepresented(?:\s+(?:groups?|genders?))?\b",
+}
+NUMBERS = {'1': 1, '2': 2, '3': 3, '4': 4, '5': 5, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5}
+NUMBER_WORDS = {1: 'one', 2: 'two', 3: 'three', 4: 'four', 5: 'five'}
+
+TEAM_SIZE_PATTERN = r"\bteam\s+of\s+(?:5|five)(?:\s+players)?\b|\b(?:5|five)[\s-](?:man|player|person|stack)\b"
+COUNT_PATTERN = r"\b(at\s+least\s+|exactly\s+)?(1|2|3|4|5|one|two|three|four|five)\b"
+EACH_PATTERN = r"\beach\b|\bevery\b|\ball\s+(?:three\s+)?(?:tournament\s+types?|tournaments|circuits|leagues)\b"
+ONLY_PATTERN = r"\bonly\b|\bexclusively\b|\bjust\b|\bsolely\b"
+
+# Words that carry no constraint of their own
+FILLER_WORDS = {
+    'a', 'all', 'an', 'and', 'any', 'as', 'assemble', 'build', 'can', 'choose', 'circuit', 'competitive',
+    'compose', 'composed', 'comprised', 'consisting', 'construct', 'create', 'draft', 'for', 'form', 'from',
+    'give', 'group', 'groups', 'have', 'i', 'in', 'include', 'includes', 'including', 'league', 'leagues',
+    'let', 'like', 'made', 'make', 'me', 'need', 'new', 'of', 'or', 'pick', 'player', 'players', 'please',
+    'pro', 'program', 'pros', 'put', 'roster', 'select', 'squad', 'such', 'team', 'that', 'the', 'to',
+    'together', 'tournament', 'tournaments', 'type', 'types', 'up', 'us', 'use', 'using', 'valorant', 'vct',
+    'want', 'with', 'would', 'you', 's'
+}
+
+def _blank(text: str, pattern: str) -> str:
+    return re.sub(pattern, ' ', text, flags=re.IGNORECASE)
+
+def _leftover_words(text: str) -> List[str]:
+    for pattern in [TEAM_SIZE_PATTERN, COUNT_PATTERN, EACH_PATTERN, ONLY_PATTERN, *TYPE_PATTERNS.values()]:
+        text = _blank(text, pattern)
+    return [word for word in re.findall(r"[a-z]+", text.lower()) if word not in FILLER_WORDS]
+
+def format_parser_output(counts: Dict[str, int], constraints: List[str]) -> str:
+    """Text in the vct-input-parser OUTPUT FORMAT"""
+    lines = [f"{tournament_type}: {counts[tournament_type]}" for tournament_type in TOURNAMENT_TYPES]
+    lines += ["", "CONSTRAINTS:"]
+    lines += [f"- {constraint}" for constraint in constraints] or ["- None specified"]
+    return "\n".join(lines)
+
+def parse_team_request(text: str) -> Optional[Dict]:
+    """
+    Apply the parser prompt's rules to a request:
+    - no tournament type and no count: 2 players of each type
+    - one tournament type without a count ("only game changers"): all 5 players of that type
+    - a count for a tournament type ("2 from each", "at least two game changers"): that count for ALL types
+
+    Returns {"counts": {...}, "constraints": [...], "output": str}, or None if the request is not
+    one the rules settle unambiguously.
+    """
+    if not text or _leftover_words(text):
+        return None
+
+    text = _blank(text, TEAM_SIZE_PATTERN)
+    types = [t for t in TOURNAMENT_TYPES if re.search(TYPE_PATTERNS[t], text, re.IGNORECASE)]
+    counts_found = re.findall(COUNT_PATTERN, text, re.IGNORECASE)
+    if len({NUMBERS[number.lower()] for _, number in counts_found}) > 1:
+        return None
+    qualifier = counts_found[0][0].strip().lower() if counts_found else ''
+    count = NUMBERS[counts_found[0][1].lower()] if counts_found else None
+    each = bool(re.search(EACH_PATTERN, text, re.IGNORECASE))
+    only = bool(re.search(ONLY_PATTERN, text, re.IGNORECASE))
+    prefix = "at least " if qualifier.startswith('at') else ''
+
+    if count is None:
+        if each or (only and len(types) != 1):
+            return None
+        if not types:
+            counts, constraints = dict.fromkeys(TOURNAMENT_TYPES, 2), []
+        elif len(types) == 1:
+            counts = {t: 5 if t == types[0] else 0 for t in TOURNAMENT_TYPES}
+            constraints = [f"Must only use {types[0]} players"]
+        else:
+            return None
+    else:
+        if only:
+            return None
+        counts = dict.fromkeys(TOURNAMENT_TYPES, count)
+        amount = f"{prefix}{NUMBER_WORDS[count]}"
+        players = "player" if count == 1 else "players"
+        if each and not types:
+            constraints = [f"Must include {amount} {players} from each tournament type"]
+        elif len(types) == 1 and not each:
+            constraints = [f"Must include {amount} {types[0]} {players}"]
+        elif len(types) == 2 and not each and re.search(r"\bor\b", text, re.IGNORECASE):
+            constraints = [f"Must include {amount} {types[0]} or {types[1]} {players}"]
+        else:
+            return None
+
+    return {
+        "counts": counts,
+        "constraints": constraints,
+        "output": format_parser_output(counts, constraints)
+    }
@@ -0,0 +1,181 @@
+"""
+The scheduler against a local fake provider that throttles like Bedrock/Anthropic do:
+    cd frontend && python -m pytest agents/test_llm_scheduler.py
+"""
+import asyncio
+import time
+import pytest
+from multi_agent_orchestrator.agents import Agent, AgentOptions
+from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
+from agents.llm_scheduler import (LLMScheduler, ProviderUnavailable, TokenBucket, PRIORITY_CLASSIFIER,
+                                  PRIORITY_GENERATION)
+from agents.custom.failover import FailoverAgent
+from agents.streaming import emit_text, stream_events
+
+class ThrottlingError(Exception):
+    status_code = 429
+
+class FakeProvider:
+    """Accepts requests_per_minute calls (with a full minute's burst) and throttles the rest"""
+
+    def __init__(self, requests_per_minute: float):
+        self.bucket = TokenBucket(requests_per_minute)
+        self.accepted = 0
+        self.throttled = 0
+
+    async def call(self, text='ok'):
+        if self.bucket.wait_time(1) > 0:
+            self.throttled += 1
+            raise ThrottlingError("Too many requests")
+        self.bucket.take(1)
+        self.accepted += 1
+        await asyncio.sleep(0.01)
+        return text
+
+async def scheduled_call(scheduler, provider_name, provider, priority=PRIORITY_GENERATION):
+    async with await scheduler.acquire(provider_name, priority, 0):
+        return await provider.call()
+
+def test_calls_beyond_the_budget_are_delayed_instead_of_throttled():
+    provider = FakeProvider(requests_per_minute=600)
+    scheduler = LLMScheduler(max_wait=5)
+    scheduler.configure('fake', requests_per_minute=600, tokens_per_minute=10**6)
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(scheduled_call(scheduler, 'fake', provider) for _ in range(605)))
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+    assert provider.throttled == 0 and provider.accepted == 605
+    # 600 go through at once, the other 5 at the refill rate of 10 per second
+    assert elapsed >= 0.4
+
+def test_without_the_scheduler_the_fake_provider_throttles():
+    provider = FakeProvider(requests_per_minute=600)
+
+    async def run():
+        return await asyncio.gather(*(provider.call() for _ in range(605)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert sum(isinstance(result, ThrottlingError) for result in results) == 5
+
+def test_classifier_calls_go_first():
+    scheduler = LLMScheduler(max_wait=5)
+    scheduler.configure('fake', requests_per_minute=60, tokens_per_minute=10**6)
+    order = []
+
+    async def call(name, priority):
+        async with await scheduler.acquire('fake', priority, 0):
+            order.append(name)
+
+    async def run():
+        for _ in range(60):
+            await call('warmup', PRIORITY_GENERATION)
+        # budget is empty: the generation call queues first, the classifier call overtakes it
+        generation = asyncio.ensure_future(call('generation', PRIORITY_GENERATION))
+        await asyncio.sleep(0.1)
+        await asyncio.gather(generation, call('classifier', PRIORITY_CLASSIFIER))
+
+    asyncio.run(run())
+    assert order[60:] == ['classifier', 'generation']
+
+def test_no_budget_within_max_wait_raises_provider_unavailable():
+    scheduler = LLMScheduler(max_wait=0.2)
+    scheduler.configure('fake', requests_per_minute=1, tokens_per_minute=10**6)
+
+    async def run():
+        async with await scheduler.acquire('fake', PRIORITY_GENERATION, 0):
+            pass
+        await scheduler.acquire('fake', PRIORITY_GENERATION, 0)
+
+    with pytest.raises(ProviderUnavailable):
+        asyncio.run(run())
+
+class FakeAgent(Agent):
+    def __init__(self, name, scheduler, provider_name, provider):
+        super().__init__(AgentOptions(name=name, description='fake'))
+        self.scheduler = scheduler
+        self.provider_name = provider_name
+        self.provider = provider
+
+    async def process_request(self, input_text, user_id, session_id, chat_history, additional_params=None):
+        text = await scheduled_call(self.scheduler, self.provider_name, self.provider)
+        return ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{'text': f"{self.provider_name}:{text}"}])
+
+def test_throttled_requests_fail_over_to_the_other_provider():
+    # The scheduler believes the primary has more budget than it really has
+    primary, secondary = FakeProvider(requests_per_minute=2), FakeProvider(requests_per_minute=600)
+    scheduler = LLMScheduler(max_wait=0.5)
+    scheduler.configure('primary', requests_per_minute=600, tokens_per_minute=10**6)
+    scheduler.configure('secondary', requests_per_minute=600, tokens_per_minute=10**6)
+    agent = FailoverAgent([
+        ('primary', FakeAgent('analyst', scheduler, 'primary', primary)),
+        ('secondary', FakeAgent('analyst', scheduler, 'secondary', secondary)),
+    ])
+
+    async def run():
+        return [(await agent.process_request('q', 'u', 's', [])).content[0]['text'] for _ in range(5)]
+
+    answers = asyncio.run(run())
+    assert answers == ['primary:ok', 'primary:ok', 'secondary:ok', 'secondary:ok', 'secondary:ok']
+    # after the throttle the primary is cooling down, so later requests did not hit it again
+    assert primary.throttled == 1
+    assert scheduler.stats['throttled'] == 1
+
+class FakeToolAgent(FakeAgent):
+    """A tool loop: a model call asks for a tool, the tool runs, a second model call answers"""
+
+    def __init__(self, name, scheduler, provider_name, provider, tool_runs):
+        super().__init__(name, scheduler, provider_name, provider)
+        self.tool_runs = tool_runs
+
+    async def process_request(self, input_text, user_id, session_id, chat_history, additional_params=None):
+        await scheduled_call(self.scheduler, self.provider_name, self.provider)
+        self.tool_runs.append(self.provider_name)
+        emit_text('partial answer')
+        return await super().process_request(input_text, user_id, session_id, chat_history, additional_params)
+
+def test_no_failover_once_the_request_made_progress():
+    # The primary throttles the second model call of the loop, after the tool already ran
+    primary, secondary = FakeProvider(requests_per_minute=1), FakeProvider(requests_per_minute=600)
+    scheduler = LLMScheduler(max_wait=0.5)
+    scheduler.configure('primary', requests_per_minute=600, tokens_per_minute=10**6)
+    scheduler.configure('secondary', requests_per_minute=600, tokens_per_minute=10**6)
+    tool_runs = []
+    agent = FailoverAgent([
+        ('primary', FakeToolAgent('analyst', scheduler, 'primary', primary, tool_runs)),
+        ('secondary', FakeToolAgent('analyst', scheduler, 'secondary', secondary, tool_runs)),
+    ])
+
+    async def run():
+        return [event async for event in stream_events(agent.process_request('q', 'u', 's', []))]
+
+    with pytest.raises(ProviderUnavailable):
+        asyncio.run(run())
+    assert tool_runs == ['primary']
+    assert secondary.accepted == 0
+
+def test_set_rate_keeps_the_level_and_the_cooldown():
+    scheduler = LLMScheduler(max_wait=5)
+    scheduler.configure('fake', requests_per_minute=600, tokens_per_minute=10**6)
+    scheduler.report_throttled('fake')
+    cooldown = scheduler.wait_time('fake')
+
+    scheduler.set_rate('fake', 60)
+    assert scheduler.wait_time('fake') == pytest.approx(cooldown, abs=0.1)
+    budget = scheduler._budgets['fake']
+    assert budget.requests.per_minute == 60 and budget.requests.level <= 60
+
+def test_set_rate_does_not_refill_a_drained_bucket():
+    scheduler = LLMScheduler(max_wait=5)
+    scheduler.configure('fake', requests_per_minute=60, tokens_per_minute=10**6)
+
+    async def drain():
+        for _ in range(60):
+            async with await scheduler.acquire('fake', PRIORITY_GENERATION, 0):
+                pass
+
+    asyncio.run(drain())
+    scheduler.set_rate('fake', 120)
+    assert scheduler.wait_time('fake') > 0
@@ -0,0 +1,58 @@
+"""
+The resolver's index and its reload backoff, without a database:
+    cd frontend && python -m pytest agents/test_player_resolver.py
+"""
+import pytest
+from agents import player_resolver as resolver_module
+from agents.player_resolver import PlayerResolver
+
+ROWS = [
+    {'player_id': '1', 'handle': 'TenZ', 'first_name': 'Tyson', 'last_name': 'Ngo', 'updated_at': None},
+    {'player_id': '2', 'handle': 'aspas', 'first_name': 'Erick', 'last_name': 'Santos', 'updated_at': None},
+]
+
+class Database:
+    def __init__(self):
+        self.connects = 0
+        self.available = False
+
+    def connect(self):
+        self.connects += 1
+        if not self.available:
+            raise ConnectionError("database unreachable")
+        return FakeConnection()
+
+class FakeConnection:
+    def close(self):
+        pass
+
+@pytest.fixture
+def database(monkeypatch):
+    database = Database()
+    monkeypatch.setattr(resolver_module, 'get_db_connection', database.connect)
+    monkeypatch.setattr(resolver_module, 'get_data_version', lambda conn=None: 1)
+    monkeypatch.setattr(PlayerResolver, '_load', lambda self, conn: ROWS)
+    return database
+
+def test_failed_load_is_not_retried_until_the_backoff_passes(database, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(resolver_module.time, 'monotonic', lambda: clock[0])
+    resolver = PlayerResolver(retry_seconds=30)
+
+    for _ in range(5):
+        assert resolver.known_handles() is None
+        assert resolver.resolve_handle('tenz') is None
+    assert database.connects == 1
+
+    database.available = True
+    clock[0] += 31
+    assert resolver.known_handles() == {'tenz', 'aspas'}
+    assert resolver.resolve_handle('tenz')[0]['player_id'] == '1'
+    assert database.connects == 2
+
+def test_force_refresh_ignores_the_backoff(database):
+    resolver = PlayerResolver(retry_seconds=30)
+    assert not resolver.refresh()
+    database.available = True
+    assert resolver.refresh(force=True)
+    assert database.connects == 2
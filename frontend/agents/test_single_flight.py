@@ -0,0 +1,54 @@
+"""
+    cd frontend && python -m pytest agents/test_single_flight.py
+"""
+import threading
+import time
+import pytest
+from agents.single_flight import SingleFlight
+
+def run_concurrently(count, target):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"status": "success"}
+
+    results = run_concurrently(8, lambda: flight.do('2-2-2', build))
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert all(result is results[0][0] for result, _ in results)
+    assert flight.stats == {'leader': 1, 'shared': 7}
+
+def test_different_keys_and_later_calls_run_again():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == (1, False)
+    assert flight.do('b', lambda: 2) == (2, False)
+    assert flight.do('a', lambda: 3) == (3, False)
+
+def test_waiters_get_the_leaders_exception():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise RuntimeError("database unavailable")
+
+    def call():
+        try:
+            flight.do('key', fail)
+        except RuntimeError as e:
+            return str(e)
+
+    assert run_concurrently(4, call) == ["database unavailable"] * 4
+    with pytest.raises(RuntimeError):
+        flight.do('key', fail)
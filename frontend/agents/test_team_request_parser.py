@@ -0,0 +1,38 @@
+"""
+The local parser against the examples in the vct-input-parser prompt:
+    cd frontend && python -m pytest agents/test_team_request_parser.py
+"""
+import pytest
+from agents.team_request_parser import parse_team_request
+
+@pytest.mark.parametrize("text, counts, constraint", [
+    ("Build a team using players from VCT International.", (5, 0, 0), "- Must only use VCT_INTERNATIONAL players"),
+    ("Build a team using players from VCT Challengers.", (0, 5, 0), "- Must only use VCT_CHALLENGER players"),
+    ("Build a team using players from VCT Game Changers.", (0, 0, 5), "- Must only use GAME_CHANGERS players"),
+    ("Build a team that includes at least two players from an underrepresented group, such as the Game Changers program.",
+     (2, 2, 2), "- Must include at least two GAME_CHANGERS players"),
+    ("Build a team", (2, 2, 2), "- None specified"),
+    ("only game changers", (0, 0, 5), "- Must only use GAME_CHANGERS players"),
+    ("2 from each", (2, 2, 2), "- Must include two players from each tournament type"),
+    ("build a team of 5 players using only challengers", (0, 5, 0), "- Must only use VCT_CHALLENGER players"),
+    ("1 from each", (1, 1, 1), "- Must include one player from each tournament type"),
+    ("Build a team with at least one game changers player", (1, 1, 1), "- Must include at least one GAME_CHANGERS player"),
+])
+def test_documented_rules(text, counts, constraint):
+    parsed = parse_team_request(text)
+    assert parsed is not None
+    assert parsed['output'] == (
+        f"VCT_INTERNATIONAL: {counts[0]}\nVCT_CHALLENGER: {counts[1]}\nGAME_CHANGERS: {counts[2]}\n\n"
+        f"CONSTRAINTS:\n{constraint}"
+    )
+
+@pytest.mark.parametrize("text", [
+    "Build a team with players from at least three different regions.",
+    "Build a team that includes at least two semi-professional players, such as from VCT Challengers or VCT Game Changers.",
+    "Build a team with international and challengers players",
+    "build a team with tenz",
+    "now do it again with 3 of each but 2 game changers",
+    "",
+])
+def test_anything_else_goes_to_the_llm_parser(text):
+    assert parse_team_request(text) is None
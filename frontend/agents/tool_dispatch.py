@@ -0,0 +1,63 @@
+"""
+Run every tool call a model turn asks for at once and answer them together in one message.
+A tool runner is an async function (tool_name, tool_input) -> result dict; runners put blocking
+work on the executor (tracing.run_in_executor) so the calls overlap.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List
+from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
+from .tracing import span
+
+logger = logging.getLogger()
+
+ToolRunner = Callable[[str, Dict[str, Any]], Awaitable[Dict]]
+
+async def _run_tool(run_tool: ToolRunner, name: str, tool_input: Dict) -> Dict:
+    with span("tool_call", tool=name):
+        try:
+            return await run_tool(name, tool_input or {})
+        except Exception as e:
+            logger.error(f"Error running tool {name}: {str(e)}", exc_info=True)
+            return {"status": "error", "message": str(e)}
+
+async def run_tool_uses(run_tool: ToolRunner, tool_uses: List[Dict]) -> List[Dict]:
+    """Results for [{'name', 'input'}, ...], in the same order, run concurrently"""
+    return await asyncio.gather(*[_run_tool(run_tool, tool_use['name'], tool_use['input']) for tool_use in tool_uses])
+
+async def dispatch_bedrock_tool_uses(response: ConversationMessage, run_tool: ToolRunner) -> ConversationMessage:
+    """One user message with a toolResult block for every toolUse block in a Bedrock response"""
+    tool_uses = [content['toolUse'] for content in response.content if 'toolUse' in content]
+    results = await run_tool_uses(run_tool, tool_uses)
+    return ConversationMessage(
+        role=ParticipantRole.USER.value,
+        content=[
+            {
+                'toolResult': {
+                    'toolUseId': tool_use['toolUseId'],
+                    # Round-trip through JSON so Decimals, dates etc. become plain JSON values
+                    'content': [{'json': json.loads(json.dumps(result, default=str))}],
+                    **({'status': 'error'} if result.get('status') == 'error' else {})
+                }
+            }
+            for tool_use, result in zip(tool_uses, results)
+        ]
+    )
+
+async def dispatch_anthropic_tool_uses(response, run_tool: ToolRunner) -> Dict:
+    """One user message with a tool_result block for every tool_use block in an Anthropic response"""
+    tool_blocks = [content for content in response.content if content.type == 'tool_use']
+    results = await run_tool_uses(run_tool, [{'name': block.name, 'input': block.input} for block in tool_blocks])
+    return {
+        "role": "user",
+        "content": [
+            {
+                "type": "tool_result",
+                "tool_use_id": block.id,
+                "content": json.dumps(result, default=str, separators=(',', ':')),
+                **({"is_error": True} if result.get('status') == 'error' else {})
+            }
+            for block, result in zip(tool_blocks, results)
+        ]
+    }
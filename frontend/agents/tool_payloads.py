@@ -0,0 +1,102 @@
+"""
+Compact forms of tool results sent back to the model. A tool result stays in the conversation and
+is re-sent on every later recursion, so the team builder's nested per-player dicts are flattened into
+column-headed rows, fields the prompt never uses (player ids, internal map names, agent roles) are
+dropped and floats are rounded.
+"""
+import json
+import logging
+import os
+from typing import Dict, List
+from .tracing import current_span
+
+logger = logging.getLogger()
+
+FLOAT_PRECISION = int(os.getenv('TOOL_PAYLOAD_PRECISION', '2'))
+
+PLAYER_COLUMNS = [
+    'name', 'handle', 'team', 'region', 'games', 'acs', 'kda', 'role_pct',
+    'atk_kills', 'atk_deaths', 'atk_assists', 'def_kills', 'def_deaths', 'def_assists',
+    'rounds_survived', 'rounds_won', 'first_bloods', 'multi_kills', 'clutch_wins',
+    'damage_ability_usage', 'damage_ability_eff', 'utility_ability_usage', 'utility_ability_eff',
+    'agents', 'maps'
+]
+AGENT_COLUMNS = ['agent', 'games', 'kda']
+MAP_COLUMNS = ['map', 'games', 'kda', 'preferred_site', 'site_pct', 'attacking_url', 'defending_url']
+
+def _round(value, precision):
+    return round(value, precision) if isinstance(value, float) else value
+
+def _player_row(player: Dict, precision: int) -> List:
+    overall = player['overall_stats']
+    combat = player['combat_stats']
+    round_impact = player['round_impact']
+    playmaking = player['playmaking']
+    abilities = player['ability_usage']
+    row = [
+        player['player']['name'], player['player']['handle'], player['player']['team'], player['player']['region'],
+        overall['total_games'], overall['average_combat_score'], overall['average_kda'], overall['role_percentage'],
+        combat['attacking']['kills'], combat['attacking']['deaths'], combat['attacking']['assists'],
+        combat['defending']['kills'], combat['defending']['deaths'], combat['defending']['assists'],
+        round_impact['rounds_survived'], round_impact['rounds_won'],
+        playmaking['first_bloods'], playmaking['multi_kills'], playmaking['clutch_wins'],
+        abilities['damage']['usage'], abilities['damage']['effectiveness'],
+        abilities['utility']['usage'], abilities['utility']['effectiveness']
+    ]
+    agents = [
+        [agent['agent_name'], agent['games_played'], agent['average_kda']]
+        for agent in player['agent_stats']
+    ]
+    maps = [
+        [
+            map_stat['display_name'], map_stat['games_played'], map_stat['average_kda'],
+            map_stat['preferred_site'], map_stat['site_percentage'],
+            map_stat['visualization'].get('attacking_url'), map_stat['visualization'].get('defending_url')
+        ]
+        for map_stat in player['map_stats']
+    ]
+    return [_round(value, precision) for value in row] + [
+        [[_round(value, precision) for value in agent] for agent in agents],
+        [[_round(value, precision) for value in map_row] for map_row in maps]
+    ]
+
+def compact_team_result(result: Dict, precision: int = FLOAT_PRECISION) -> Dict:
+    """
+    Columnar form of a team_builder_wrapper result: {"status", "columns": {...}, "data": {role:
+    {tournament_type: [player rows]}}}. Error results are returned unchanged.
+    """
+    if result.get('status') != 'success':
+        return result
+
+    return {
+        "status": "success",
+        "columns": {
+            "player": PLAYER_COLUMNS,
+            "agents": AGENT_COLUMNS,
+            "maps": MAP_COLUMNS
+        },
+        "data": {
+            role: {
+                tournament_type: [_player_row(player, precision) for player in players]
+                for tournament_type, players in role_data.items()
+            }
+            for role, role_data in result['data'].items()
+        }
+    }
+
+def payload_size(payload) -> int:
+    """Characters of JSON the payload costs in the conversation"""
+    return len(json.dumps(payload, default=str, separators=(',', ':')))
+
+def compact_for_model(name: str, result: Dict, compactor) -> Dict:
+    """Apply compactor to a tool result and log (and record on the current span) the size before and after"""
+    compacted = compactor(result)
+    before = len(json.dumps(result, default=str))
+    after = payload_size(compacted)
+    logger.info(f"Compacted {name} result from {before} to {after} characters "
+                f"({100 * (1 - after / before):.0f}% smaller, ~{before // 4} -> ~{after // 4} tokens)")
+    active = current_span()
+    if active is not None:
+        active.set_attribute('payload_chars_before', before)
+        active.set_attribute('payload_chars_after', after)
+    return compacted
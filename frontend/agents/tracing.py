@@ -0,0 +1,159 @@
+"""
+Lightweight request tracing. Spans nest through contextvars (so they follow awaits and, via
+run_in_executor below, executor threads) and are appended to a JSONL file when TRACE_FILE is set:
+
+    TRACE_FILE=traces.jsonl streamlit run app.py
+    python -m agents.tracing traces.jsonl       # per-request breakdown of where the time went
+
+Each line is one finished span with OpenTelemetry-style fields: trace_id, span_id, parent_id, name,
+start_time, duration_ms, status and attributes.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Optional
+from psycopg2.extras import RealDictCursor
+
+logger = logging.getLogger()
+
+TRACE_FILE = os.getenv('TRACE_FILE')
+
+# Longest SQL text kept on a span
+MAX_STATEMENT_LENGTH = 200
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+class Span:
+    def __init__(self, name: str, parent: Optional['Span'] = None, attributes: Optional[Dict] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.status = 'ok'
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self):
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def to_dict(self) -> Dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_time': self.start_time,
+            'duration_ms': round(self.duration_ms, 3),
+            'status': self.status,
+            'attributes': self.attributes
+        }
+
+class JsonlSpanExporter:
+    """Appends finished spans to a JSONL file, one line per span"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        try:
+            with self._lock, open(self.path, 'a') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            logger.warning(f"Could not write span to {self.path}: {str(e)}")
+
+exporter = JsonlSpanExporter(TRACE_FILE) if TRACE_FILE else None
+
+def set_exporter(new_exporter):
+    """Replace the span exporter (None turns exporting off)"""
+    global exporter
+    exporter = new_exporter
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a block as a child of the current span (or as the root of a new trace).
+    Exceptions mark the span as an error and are re-raised.
+    """
+    active = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(active)
+    try:
+        yield active
+    except BaseException as e:
+        active.status = 'error'
+        active.set_attribute('error', f"{type(e).__name__}: {str(e)}")
+        raise
+    finally:
+        active.end()
+        _current_span.reset(token)
+        if exporter is not None:
+            exporter.export(active)
+
+async def run_in_executor(func, *args, executor=None):
+    """loop.run_in_executor(executor, ...) that keeps the caller's span as the parent inside the thread"""
+    context = contextvars.copy_context()
+    return await asyncio.get_event_loop().run_in_executor(executor, functools.partial(context.run, func, *args))
+
+class TracedCursor(RealDictCursor):
+    """RealDictCursor that records every statement as an 'sql' span"""
+
+    def execute(self, query, vars=None):
+        statement = query if isinstance(query, str) else str(query)
+        with span('sql', statement=' '.join(statement.split())[:MAX_STATEMENT_LENGTH]) as active:
+            result = super().execute(query, vars)
+            active.set_attribute('rows', self.rowcount)
+            return result
+
+def summarize(path: str):
+    """Print each trace in a span file as an indented tree of durations"""
+    spans_by_trace = {}
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                spans_by_trace.setdefault(record['trace_id'], []).append(record)
+
+    for trace_id, spans in spans_by_trace.items():
+        children = {}
+        for record in spans:
+            children.setdefault(record['parent_id'], []).append(record)
+        span_ids = {record['span_id'] for record in spans}
+
+        def print_tree(record, depth):
+            attributes = {k: v for k, v in record['attributes'].items() if k != 'statement'}
+            label = record['attributes'].get('statement', '') if record['name'] == 'sql' else ''
+            print(f"{'  ' * depth}{record['name']:<{40 - 2 * depth}}{record['duration_ms']:>12.1f} ms"
+                  f"  {record['status']}  {attributes or ''} {label[:80]}")
+            for child in sorted(children.get(record['span_id'], []), key=lambda r: r['start_time']):
+                print_tree(child, depth + 1)
+
+        print(f"trace {trace_id}")
+        # Roots are spans whose parent never finished into this file (normally just the request span)
+        for root in sorted((r for r in spans if r['parent_id'] not in span_ids), key=lambda r: r['start_time']):
+            print_tree(root, 1)
+
+        totals = {}
+        for record in spans:
+            totals[record['name']] = totals.get(record['name'], 0) + record['duration_ms']
+        print("  totals: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in sorted(totals.items(), key=lambda i: -i[1])))
+        print()
+
+if __name__ == "__main__":
+    summarize(sys.argv[1] if len(sys.argv) > 1 else (TRACE_FILE or 'traces.jsonl'))
@@ -1,19 +1,48 @@
 import uuid
 import asyncio
 import os
+import threading
+import time
 import boto3
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, List
 from multi_agent_orchestrator.orchestrator import MultiAgentOrchestrator, OrchestratorConfig
 from multi_agent_orchestrator.agents import AgentResponse, ChainAgent, ChainAgentOptions
 from multi_agent_orchestrator.classifiers import BedrockClassifier, BedrockClassifierOptions, AnthropicClassifier, AnthropicClassifierOptions
-from multi_agent_orchestrator.storage import InMemoryChatStorage
 from .input_parser_agent import create_vct_input_parser
 from .general_agent import setup_player_analyst_agent
 from .team_builder_agent import setup_team_builder_agent
 from .final_agent import create_vct_final_agent
 from .custom.custom_orchestrator import CustomMultiAgentOrchestrator
+from .custom.history_manager import HistoryManager
+from .custom.pre_classifier import PreClassifier
+from .custom.cached_classifier import CachedClassifier
+from .custom.sqlite_chat_storage import create_chat_storage
+from .custom.failover import FailoverAgent, FailoverClassifier
+from .llm_scheduler import scheduler
+from .llm_cache import create_response_cache
+from .single_flight import SingleFlight
+from .tracing import run_in_executor
+
+# Estimated-token budget for the chat history passed to each agent. The team builder already carries a
+# large system prompt and tool result, so its history is kept tighter.
+CHAIN_AGENT_HISTORY_BUDGET = int(os.getenv('CHAIN_AGENT_HISTORY_BUDGET', '4000'))
+ANALYST_AGENT_HISTORY_BUDGET = int(os.getenv('ANALYST_AGENT_HISTORY_BUDGET', '8000'))
+# How long the Bedrock quota check result is trusted before the Service Quotas API is asked again
+QUOTA_CHECK_TTL = int(os.getenv('QUOTA_CHECK_TTL', '3600'))
+# Build every agent for the other provider as well and move requests there when the preferred one is
+# out of budget or throttling (needs credentials for both)
+LLM_FAILOVER = os.getenv('LLM_FAILOVER', 'true').lower() == 'true'
+
+def _provider_name(use_anthropic: bool) -> str:
+    return 'anthropic' if use_anthropic else 'bedrock'
 
 class VCTAgentSystem:
+    """
+    One instance is shared by every chat session in the process. Sessions only differ by the
+    user/session ids their chat history is stored under; the orchestrator and its agents are built
+    on the first query and rebuilt only when the quota check switches provider.
+    """
+
     def __init__(self, aws_access_key: str, aws_secret_key: str, anthropic_api_key: str, aws_region: str = 'us-east-1'):
         self.api_key = anthropic_api_key
         self.use_anthropic = False
@@ -21,11 +50,21 @@ class VCTAgentSystem:
         self.aws_secret_key = aws_secret_key
         self.aws_region = aws_region
         self.orchestrator = None
+        self.storage = create_chat_storage()
+        self._lock = threading.Lock()
+        self._quota_checked_at = None
+        self._bedrock_available = False
+        # Concurrent sessions that find the quota check due share one Service Quotas call
+        self._quota_flight = SingleFlight()
+        self.bedrock_requests_per_minute = 0.0
+        # Shared by the agents whose answers depend only on their input: the classifier and the input
+        # parser. The team builder and analyst read live data through tools and are never cached.
+        self.response_cache = create_response_cache()
 
     def _check_bedrock_quotas(self) -> bool:
         """
         Check AWS service quotas for Claude models.
-        Returns True if quotas are available (> 0), False otherwise.
+        Returns True if every quota found is available (> 0), False otherwise.
         """
         if not self.aws_access_key or not self.aws_secret_key:
             print("AWS credentials not found in environment variables!")
@@ -55,7 +94,9 @@ class VCTAgentSystem:
             print("\nChecking AWS Service Quotas for Claude models...")
             print("-" * 50)
             
-            total_quota = 0
+            # All Bedrock calls share one scheduler budget but each model has its own quota, so the
+            # budget is the smallest one
+            quota_values = []
             for quota in quotas_to_check:
                 try:
                     response = client.get_service_quota(
@@ -69,31 +110,62 @@ class VCTAgentSystem:
                     print(f"{quota['ModelName']}:")
                     print(f"InvokeModel requests per minute: {quota_value}")
                     print("-" * 50)
-                    total_quota += float(quota_value)
+                    quota_values.append(float(quota_value))
                     
                 except client.exceptions.NoSuchResourceException:
                     print(f"Quota not found for {quota['ModelName']}")
                 except Exception as e:
                     print(f"Error checking quota for {quota['ModelName']}: {str(e)}")
 
-            return total_quota > 0
+            self.bedrock_requests_per_minute = min(quota_values) if quota_values else 0.0
+            return self.bedrock_requests_per_minute > 0
 
         except Exception as e:
             print(f"Error connecting to AWS Service Quotas: {str(e)}")
             return False
 
-    def _create_orchestrator(self, classifier=None):
-        if classifier is None:
-            classifier = BedrockClassifier(BedrockClassifierOptions(
-                model_id='anthropic.claude-3-sonnet-20240229-v1:0',
-                region=self.aws_region,
-                inference_config={
-                    'maxTokens': 500,
-                    'temperature': 0.7,
-                    'topP': 0.9,
-                }
+    def _providers(self) -> List[bool]:
+        """use_anthropic values in order of preference: the current provider, then the failover one"""
+        providers = [self.use_anthropic]
+        has_failover_credentials = bool(self.aws_access_key and self.aws_secret_key) if self.use_anthropic else bool(self.api_key)
+        if LLM_FAILOVER and has_failover_credentials:
+            providers.append(not self.use_anthropic)
+        return providers
+
+    def _with_failover(self, create_agent):
+        """Build an agent with create_agent(use_anthropic) for each provider; one provider returns it unwrapped"""
+        agents = [(_provider_name(use_anthropic), create_agent(use_anthropic)) for use_anthropic in self._providers()]
+        return FailoverAgent(agents) if len(agents) > 1 else agents[0][1]
+
+    def _create_classifier(self, use_anthropic: bool):
+        if use_anthropic:
+            return AnthropicClassifier(AnthropicClassifierOptions(
+                api_key=self.api_key,
+                model_id='claude-3-sonnet-20240229'
             ))
-        memory_storage = InMemoryChatStorage()
+        return BedrockClassifier(BedrockClassifierOptions(
+            model_id='anthropic.claude-3-sonnet-20240229-v1:0',
+            region=self.aws_region,
+            inference_config={
+                'maxTokens': 500,
+                'temperature': 0.7,
+                'topP': 0.9,
+            }
+        ))
+
+    def _create_orchestrator(self):
+        classifier = FailoverClassifier([
+            (_provider_name(use_anthropic), self._create_classifier(use_anthropic)) for use_anthropic in self._providers()
+        ])
+        chain_agent = self._create_chain_agent()
+        analyst_agent = self._with_failover(lambda use_anthropic: setup_player_analyst_agent(use_anthropic, self.api_key))
+        history_manager = HistoryManager(agent_budgets={
+            chain_agent.id: CHAIN_AGENT_HISTORY_BUDGET,
+            analyst_agent.id: ANALYST_AGENT_HISTORY_BUDGET
+        })
+        # Clear-cut requests are routed locally; the LLM classifier only sees the ambiguous ones
+        classifier = PreClassifier(CachedClassifier(classifier, self.response_cache),
+                                   team_agent_id=chain_agent.id, analyst_agent_id=analyst_agent.id)
 
         orchestrator = CustomMultiAgentOrchestrator(
             options=OrchestratorConfig(
@@ -107,20 +179,21 @@ class VCTAgentSystem:
                 MAX_MESSAGE_PAIRS_PER_AGENT=10
             ),
             classifier=classifier,
-            storage=memory_storage
+            storage=self.storage,
+            history_manager=history_manager
         )
 
-
-        chain_agent = self._create_chain_agent()
-        analyst_agent = setup_player_analyst_agent(self.use_anthropic, self.api_key)
         orchestrator.add_agent(chain_agent)
         orchestrator.add_agent(analyst_agent)
         
         return orchestrator
 
     def _create_chain_agent(self):
-        vct_input_parser = create_vct_input_parser(self.use_anthropic, self.api_key)
-        team_builder_agent = setup_team_builder_agent(self.use_anthropic, self.api_key)
+        # Each link fails over on its own; the ChainAgent does not pass the original error through
+        vct_input_parser = self._with_failover(
+            lambda use_anthropic: create_vct_input_parser(use_anthropic, self.api_key, response_cache=self.response_cache)
+        )
+        team_builder_agent = self._with_failover(lambda use_anthropic: setup_team_builder_agent(use_anthropic, self.api_key))
         
         chain_options = ChainAgentOptions(
             name='VCTChainAgent',
@@ -131,32 +204,98 @@ class VCTAgentSystem:
         )
         return ChainAgent(chain_options)
 
-    async def switch_to_anthropic_classifier(self):
+    def _build_anthropic_orchestrator(self):
         self.use_anthropic = True
         print("\nSwitching to Anthropic API...")
-        anthropic_classifier = AnthropicClassifier(AnthropicClassifierOptions(
-            api_key=self.api_key,
-            model_id='claude-3-sonnet-20240229'
-        ))
-        
-        self.orchestrator = self._create_orchestrator(classifier=anthropic_classifier)
+        self.orchestrator = self._create_orchestrator()
         print("Successfully configured Anthropic classifier")
 
+    async def switch_to_anthropic_classifier(self):
+        with self._lock:
+            # Stay on Anthropic until the next quota check is due
+            self._bedrock_available = False
+            self._quota_checked_at = time.monotonic()
+            self._build_anthropic_orchestrator()
+
+    def response_cache_stats(self) -> Dict[str, Any]:
+        """Hit rate and saved model latency of the response cache"""
+        return self.response_cache.stats()
+
+    def _quota_check_due(self) -> bool:
+        with self._lock:
+            return self._quota_checked_at is None or time.monotonic() - self._quota_checked_at >= QUOTA_CHECK_TTL
+
+    def _run_quota_check(self):
+        if not self._quota_check_due():
+            return
+        # The Service Quotas call is made without holding the lock; only the result is swapped in under it
+        available = self._check_bedrock_quotas()
+        with self._lock:
+            self._bedrock_available = available
+            self._quota_checked_at = time.monotonic()
+            if available:
+                scheduler.set_rate('bedrock', self.bedrock_requests_per_minute)
+
+    def _refresh_quota(self):
+        """Re-run the Bedrock quota check once its result is older than QUOTA_CHECK_TTL"""
+        if self._quota_check_due():
+            self._quota_flight.do('bedrock_quota', self._run_quota_check)
+
+    def get_orchestrator(self) -> CustomMultiAgentOrchestrator:
+        """
+        The shared orchestrator, built on first use. Safe to call from concurrent sessions; the chat
+        storage is kept when the orchestrator is rebuilt for the other provider. Blocks while a due
+        quota check runs, so coroutines use get_orchestrator_async.
+        """
+        self._refresh_quota()
+        with self._lock:
+            use_bedrock = self._bedrock_available
+            if self.orchestrator is not None and use_bedrock == (not self.use_anthropic):
+                return self.orchestrator
+
+            if use_bedrock:
+                print("\nUsing AWS Bedrock for Claude models")
+                self.use_anthropic = False
+                self.orchestrator = self._create_orchestrator()
+            else:
+                print("\nNo AWS Bedrock quotas available or quota check failed")
+                self._build_anthropic_orchestrator()
+            return self.orchestrator
+
+    async def get_orchestrator_async(self) -> CustomMultiAgentOrchestrator:
+        """get_orchestrator that runs a due quota check and the (re)build on the executor, off the event loop"""
+        if self.orchestrator is None or self._quota_check_due():
+            return await run_in_executor(self.get_orchestrator)
+        return self.get_orchestrator()
+
     async def initialize(self):
-        if self._check_bedrock_quotas():
-            print("\nUsing AWS Bedrock for Claude models")
-            self.orchestrator = self._create_orchestrator()
-        else:
-            print("\nNo AWS Bedrock quotas available or quota check failed")
-            await self.switch_to_anthropic_classifier()
+        await self.get_orchestrator_async()
 
     async def process_query(self, user_input: str, user_id: str, session_id: str) -> Dict[str, Any]:
-        response: AgentResponse = await self.orchestrator.route_request(user_input, user_id, session_id)
+        orchestrator = await self.get_orchestrator_async()
+        response: AgentResponse = await orchestrator.route_request(user_input, user_id, session_id)
+        return self._format_response(response)
+
+    async def process_query_stream(self, user_input: str, user_id: str, session_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Same as process_query, but yields {"type": "text"|"status", "text": ...} events while the agent
+        is generating and finally {"type": "done", "result": <process_query result>}
+        """
+        orchestrator = await self.get_orchestrator_async()
+        async for event in orchestrator.route_request_stream(user_input, user_id, session_id):
+            if event["type"] == "done":
+                event = {"type": "done", "result": self._format_response(event["result"])}
+            yield event
+
+    def _format_response(self, response: AgentResponse) -> Dict[str, Any]:
         print(response)
-        result = {
+        output = response.output
+        if isinstance(output, str):
+            content = output
+        else:
+            content = output.content[0]['text'] if output.content else ""
+        return {
             "agent_name": response.metadata.agent_name,
-            "content": response.output.content[0]['text'] if response.output.content else "",
+            "content": content,
             "is_streaming": response.streaming
         }
-        
-        return result
\ No newline at end of file
@@ -3,6 +3,7 @@ import asyncio
 from agents.vct_agent import VCTAgentSystem
 import time
 import os
+import uuid
 
 def init_session_state():
     """Initialize session state variables if they don't exist"""
@@ -15,7 +16,8 @@ def init_session_state():
     if "user_id" not in st.session_state:
         st.session_state.user_id = "streamlit_user"
     if "session_id" not in st.session_state:
-        st.session_state.session_id = "streamlit_session"
+        # The agent system is shared by all sessions, so each one needs its own chat history key
+        st.session_state.session_id = f"streamlit_session_{uuid.uuid4().hex}"
     if "message_counter" not in st.session_state:
         st.session_state.message_counter = 0
     if "authenticated" not in st.session_state:
@@ -62,33 +64,44 @@ def get_unique_key():
     st.session_state.message_counter += 1
     return f"msg_{int(time.time())}_{st.session_state.message_counter}"
 
-async def initialize_agent():
-    """Initialize the VCTAgentSystem"""
+@st.cache_resource
+def get_agent_system():
+    """One VCTAgentSystem per process, shared by every session; it builds its agents on the first query"""
+    return VCTAgentSystem(
+        st.secrets["AWS_ACCESS_KEY"],
+        st.secrets["AWS_SECRET_ACCESS_KEY"],
+        st.secrets["ANTHROPIC_API_KEY"],
+        st.secrets["AWS_DEFAULT_REGION"]
+    )
+
+def initialize_agent():
+    """Attach the shared VCTAgentSystem to this session"""
     try:
         if st.session_state.agent_system is None:
-            vct_system = VCTAgentSystem(
-                st.secrets["AWS_ACCESS_KEY"],
-                st.secrets["AWS_SECRET_ACCESS_KEY"],
-                st.secrets["ANTHROPIC_API_KEY"],
-                st.secrets["AWS_DEFAULT_REGION"]
-            )
-            await vct_system.initialize()
-            st.session_state.agent_system = vct_system
+            st.session_state.agent_system = get_agent_system()
     except Exception as e:
         st.error(f"There was an error initializing the chat: {str(e)}")
         return None
 
-async def process_message(prompt):
-    """Process a message and return the response"""
+async def process_message(prompt, placeholder):
+    """Process a message, rendering the response into the placeholder as it streams, and return the result"""
+    streamed = ""
     try:
-        result = await st.session_state.agent_system.process_query(
+        async for event in st.session_state.agent_system.process_query_stream(
             prompt,
             st.session_state.user_id,
             st.session_state.session_id
-        )
-        return result
+        ):
+            if event["type"] == "text":
+                streamed += event["text"]
+                placeholder.markdown(streamed + "▌")
+            elif event["type"] == "status":
+                placeholder.markdown(f"{streamed}\n\n*{event['text']}*" if streamed else f"*{event['text']}*")
+            elif event["type"] == "done":
+                return event["result"]
     except Exception:
-        return {"content": "There was an error processing your message. Please refresh the page and try again."}
+        pass
+    return {"content": "There was an error processing your message. Please refresh the page and try again."}
 
 def main():
     st.set_page_config(page_title="VCT Agent Chat", layout="wide")
@@ -170,7 +183,7 @@ def main():
         st.title("VCT Agent Chat")
         
         # Initialize the agent system
-        asyncio.run(initialize_agent())
+        initialize_agent()
         
         # Display chat messages
         for msg in st.session_state.messages:
@@ -191,18 +204,19 @@ def main():
             with st.chat_message("user"):
                 st.write(prompt)
             
-            # Get and display assistant response
-            with st.spinner("Thinking..."):
-                result = asyncio.run(process_message(prompt))
+            # Stream the assistant response; the final message replaces the streamed text so the
+            # display matches what is stored in the chat history
+            with st.chat_message("assistant"):
+                placeholder = st.empty()
+                placeholder.markdown("*Thinking...*")
+                result = asyncio.run(process_message(prompt, placeholder))
                 response_content = result.get('content', 'There was an error processing your message. Please refresh the page and try again.')
-                
-                with st.chat_message("assistant"):
-                    st.write(response_content)
-                
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": response_content
-                })
+                placeholder.write(response_content)
+
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": response_content
+            })
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
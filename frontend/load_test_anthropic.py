@@ -0,0 +1,103 @@
+"""
+Load test for CustomAnthropicAgent: runs several sessions' requests concurrently on one event loop and
+reports wall time and how many model calls were in flight at once, next to the old behaviour of calling
+the blocking client straight from the coroutine.
+
+    python load_test_anthropic.py [--sessions 8] [--latency 1.0]
+    ANTHROPIC_API_KEY=... python load_test_anthropic.py --live --sessions 4
+
+Without --live the client is a local fake that sleeps --latency seconds per call.
+ANTHROPIC_MAX_CONCURRENCY caps the overlap.
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+from types import SimpleNamespace
+from agents.custom.custom_anthropic_agent import CustomAnthropicAgent, ANTHROPIC_MAX_CONCURRENCY
+from multi_agent_orchestrator.agents import AnthropicAgentOptions
+
+class InFlightCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.current -= 1
+
+class FakeMessages:
+    def __init__(self, latency, counter):
+        self.latency = latency
+        self.counter = counter
+
+    def create(self, **kwargs):
+        with self.counter:
+            time.sleep(self.latency)
+        return SimpleNamespace(content=[SimpleNamespace(type='text', text='ok')], stop_reason='end_turn',
+                               usage=SimpleNamespace(input_tokens=12, output_tokens=1))
+
+class CountingMessages:
+    """Wraps the real client's messages resource to count calls in flight"""
+
+    def __init__(self, messages, counter):
+        self.messages = messages
+        self.counter = counter
+
+    def create(self, **kwargs):
+        with self.counter:
+            return self.messages.create(**kwargs)
+
+class BlockingAnthropicAgent(CustomAnthropicAgent):
+    """The previous behaviour: the blocking client called directly on the event loop"""
+
+    async def handle_single_response(self, input_data):
+        return self.client.messages.create(**input_data)
+
+def make_agent(agent_class, live, latency, counter):
+    agent = agent_class(AnthropicAgentOptions(
+        name='Load Test Agent',
+        description='Answers load test prompts',
+        model_id='claude-3-5-sonnet-20241022',
+        api_key=os.getenv('ANTHROPIC_API_KEY') if live else 'load-test',
+        streaming=False,
+        inference_config={'maxTokens': 16}
+    ))
+    if live:
+        agent.client.messages = CountingMessages(agent.client.messages, counter)
+    else:
+        agent.client = SimpleNamespace(messages=FakeMessages(latency, counter))
+    return agent
+
+async def run_sessions(agent, sessions):
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        agent.process_request("Reply with the word ok.", f"user-{i}", f"session-{i}", [])
+        for i in range(sessions)
+    ])
+    return time.perf_counter() - started
+
+def run_load_test(sessions=8, latency=1.0, live=False):
+    print(f"{sessions} concurrent sessions, {'live API' if live else f'fake client with {latency:.2f}s latency'}, "
+          f"ANTHROPIC_MAX_CONCURRENCY={ANTHROPIC_MAX_CONCURRENCY}\n")
+    print(f"{'agent':<28}{'wall s':>10}{'peak in flight':>16}")
+    for label, agent_class in (('blocking (before)', BlockingAnthropicAgent), ('executor (now)', CustomAnthropicAgent)):
+        counter = InFlightCounter()
+        agent = make_agent(agent_class, live, latency, counter)
+        wall = asyncio.run(run_sessions(agent, sessions))
+        print(f"{label:<28}{wall:>10.2f}{counter.peak:>16}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that concurrent Anthropic requests overlap")
+    parser.add_argument('--sessions', type=int, default=8, help="Concurrent sessions")
+    parser.add_argument('--latency', type=float, default=1.0, help="Seconds per call of the fake client")
+    parser.add_argument('--live', action='store_true', help="Call the real API (needs ANTHROPIC_API_KEY)")
+    args = parser.parse_args()
+    run_load_test(args.sessions, args.latency, args.live)
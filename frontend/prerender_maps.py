@@ -0,0 +1,137 @@
+"""
+Pre-render the attacking/defending map visualizations for every player-map with enough games,
+so team builds only have to look up URLs.
+
+Run after the ingest scripts have bumped the data version:
+    python prerender_maps.py [--workers N] [--min-games 3] [--mode markers|heatmap] [--force]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from psycopg2.extras import RealDictCursor
+from agents.player_maps import (get_db_connection, get_map_data, get_render_version, get_render_file_names,
+                                get_events_for_games, get_team_acronyms_for_games, render_map_images,
+                                store_map_images, render_store, MARKER_GAMES, RENDER_MODES)
+from agents.map_assets import map_assets
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def get_player_maps(conn, min_games):
+    """Player ids per map for every player_map_performance row with at least min_games games"""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT player_id, map
+            FROM player_map_performance
+            WHERE games_played >= %s
+        """, (min_games,))
+        players_by_map = defaultdict(list)
+        for row in cur.fetchall():
+            players_by_map[row['map']].append(row['player_id'])
+        return players_by_map
+
+def get_recent_games_for_map(conn, map_name, player_ids, limit=MARKER_GAMES):
+    """Last `limit` games (all games if None) on a map for every given player, in one query"""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT player_id, platform_game_id, kills, deaths, assists, combat_score, game_date, match_id
+            FROM (
+                SELECT
+                    pm.player_id, pm.platform_game_id, pm.kills, pm.deaths, pm.assists,
+                    pm.combat_score, gm.game_date, gm.match_id,
+                    ROW_NUMBER() OVER (PARTITION BY pm.player_id ORDER BY gm.game_date DESC) as game_rank
+                FROM game_mapping gm
+                JOIN player_mapping pm ON gm.platform_game_id = pm.platform_game_id
+                WHERE gm.map = %s AND pm.player_id = ANY(%s)
+            ) ranked
+            WHERE game_rank <= COALESCE(%s, game_rank)
+            ORDER BY player_id, game_date DESC
+        """, (map_name, list(player_ids), limit))
+        games_by_player = defaultdict(list)
+        for row in cur.fetchall():
+            games_by_player[row['player_id']].append(dict(row))
+        return games_by_player
+
+def render_player_map(player_id, map_name, map_data, games, events_by_game, team_acronyms, render_version, render_mode):
+    """Worker: draw and upload one player-map from prefetched data (no database access)"""
+    img_attacking, img_defending = render_map_images(
+        player_id, map_data, games, events_by_game=events_by_game, team_acronyms=team_acronyms, render_mode=render_mode
+    )
+    return store_map_images(player_id, map_name, map_data['displayName'], render_version, img_attacking, img_defending, render_mode)
+
+def prerender_maps(workers=None, min_games=3, force=False, render_mode='markers'):
+    # Decode every minimap before the workers fork so none of them downloads its own copy
+    logger.info(f"{map_assets.prefetch()} minimaps ready in {map_assets.cache_dir}")
+
+    conn = get_db_connection()
+    try:
+        render_version = get_render_version(conn)
+        players_by_map = get_player_maps(conn, min_games)
+        logger.info(f"Pre-rendering {sum(len(p) for p in players_by_map.values())} player-maps "
+                    f"across {len(players_by_map)} maps (render version {render_version})")
+
+        rendered, skipped, failed = 0, 0, 0
+        started = time.monotonic()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for map_name, player_ids in players_by_map.items():
+                map_data = get_map_data(map_name)
+                if not map_data:
+                    continue
+
+                if not force:
+                    player_ids = [
+                        player_id for player_id in player_ids
+                        if not all(render_store.exists(key) for key in get_render_file_names(player_id, map_data['displayName'], render_version, render_mode))
+                    ]
+                    skipped += len(players_by_map[map_name]) - len(player_ids)
+                if not player_ids:
+                    continue
+
+                # One query each for games, events and team acronyms per map
+                games_by_player = get_recent_games_for_map(conn, map_name, player_ids, MARKER_GAMES if render_mode == 'markers' else None)
+                game_ids = list({game['platform_game_id'] for games in games_by_player.values() for game in games})
+                events = get_events_for_games(game_ids, player_ids, conn)
+                team_acronyms = get_team_acronyms_for_games(game_ids, conn)
+
+                futures = {}
+                for player_id, games in games_by_player.items():
+                    events_by_game = {
+                        game['platform_game_id']: [dict(e) for e in events.get((game['platform_game_id'], player_id), [])]
+                        for game in games
+                    }
+                    acronyms = {game['platform_game_id']: team_acronyms[game['platform_game_id']] for game in games}
+                    future = executor.submit(render_player_map, player_id, map_name, map_data, games,
+                                             events_by_game, acronyms, render_version, render_mode)
+                    futures[future] = player_id
+
+                for future in as_completed(futures):
+                    try:
+                        if future.result():
+                            rendered += 1
+                        else:
+                            failed += 1
+                    except Exception as e:
+                        failed += 1
+                        logger.error(f"Error rendering {map_name} for player {futures[future]}: {str(e)}")
+
+                logger.info(f"Finished {map_data['displayName']}: {rendered} rendered, {skipped} skipped, {failed} failed so far")
+
+        logger.info(f"Pre-rendering done in {time.monotonic() - started:.1f}s: "
+                    f"{rendered} rendered, {skipped} already present, {failed} failed")
+        return failed == 0
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-render player map visualizations")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Render processes")
+    parser.add_argument('--min-games', type=int, default=3, help="Minimum games on a map to render it")
+    parser.add_argument('--mode', choices=RENDER_MODES, default='markers', help="Event markers or kill/death heatmaps")
+    parser.add_argument('--force', action='store_true', help="Re-render images that already exist")
+    args = parser.parse_args()
+
+    sys.exit(0 if prerender_maps(args.workers, args.min_games, args.force, args.mode) else 1)
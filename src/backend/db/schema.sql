@@ -147,4 +147,11 @@ CREATE TABLE IF NOT EXISTS ability_used (
   inventory_slot VARCHAR(50),
   charges_consumed INTEGER,
   FOREIGN KEY (platform_game_id) REFERENCES game_mapping(platform_game_id) ON DELETE CASCADE
-);
\ No newline at end of file
+);
+
+-- Create Data Version Table (bumped by the ingest scripts, read by the chat app caches)
+CREATE TABLE IF NOT EXISTS data_version (
+  id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,59 @@
+import os
+import logging
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("RDS_DATABASE_URL")
+
+logger = logging.getLogger(__name__)
+
+def create_data_version_table(conn):
+    """
+    Creates the single-row data_version table if it does not exist yet.
+    Readers (the chat app caches) treat a missing row as version 0.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS data_version (
+                id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+                version BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+        """)
+    conn.commit()
+
+def bump_data_version(conn):
+    """
+    Increments the data version counter after an ingest run. Every cache keyed on
+    the data version (player stats, player resolver, map renders) drops its entries
+    the next time it reads the new value.
+
+    Args:
+        conn: The active database connection.
+
+    Returns:
+        The new data version.
+    """
+    create_data_version_table(conn)
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO data_version (id, version, updated_at)
+            VALUES (1, 1, NOW())
+            ON CONFLICT (id) DO UPDATE
+            SET version = data_version.version + 1,
+                updated_at = NOW()
+            RETURNING version
+        """)
+        version = cur.fetchone()[0]
+    conn.commit()
+    logger.info(f"Data version bumped to {version}")
+    return version
+
+if __name__ == "__main__":
+    connection = psycopg2.connect(DATABASE_URL)
+    try:
+        print(f"Data version is now {bump_data_version(connection)}")
+    finally:
+        connection.close()
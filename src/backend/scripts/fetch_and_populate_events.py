@@ -10,6 +10,7 @@ import shutil
 import time
 from io import BytesIO
 from dotenv import load_dotenv
+from bump_data_version import bump_data_version
 
 load_dotenv()
 
@@ -339,6 +340,7 @@ def populate_data(tournament_type, year, start_game=0):
     for event_type, count in total_event_counts.items():
         info_logger.info(f"{event_type}: {count}")
 
+    bump_data_version(connection)
     connection.close()
 
 if __name__ == "__main__":
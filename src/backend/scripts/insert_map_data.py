@@ -9,6 +9,7 @@ import psycopg2
 from psycopg2 import sql
 from math import sqrt
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from bump_data_version import bump_data_version
 
 # Set up logging
 logging.basicConfig(filename='player_map_performance.log', level=logging.INFO,
@@ -53,9 +54,66 @@ def create_player_map_performance_table(conn):
                 PRIMARY KEY (player_id, map)
             )
         """)
+        # Per (player, map) event aggregates read directly by the chat app's player stats query,
+        # so it never has to scan player_died at request time
+        cur.execute("""
+            ALTER TABLE player_map_performance
+            ADD COLUMN IF NOT EXISTS kills_on_map INT,
+            ADD COLUMN IF NOT EXISTS deaths_on_map INT,
+            ADD COLUMN IF NOT EXISTS first_bloods INT,
+            ADD COLUMN IF NOT EXISTS matches_with_first_blood INT
+        """)
     conn.commit()
     logging.info("player_map_performance table created or updated")
 
+def backfill_player_map_event_stats(conn):
+    """
+    Fills the event aggregate columns for rows written before they existed, in one set-based pass.
+    New rows get the columns from process_player_map_performance.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1 FROM player_map_performance WHERE kills_on_map IS NULL LIMIT 1")
+        if cur.fetchone() is None:
+            return 0
+
+        cur.execute("""
+            UPDATE player_map_performance pmp
+            SET 
+                kills_on_map = COALESCE(k.kills_on_map, 0),
+                deaths_on_map = COALESCE(d.deaths_on_map, 0),
+                first_bloods = COALESCE(fb.first_bloods, 0),
+                matches_with_first_blood = COALESCE(fb.matches_with_first_blood, 0)
+            FROM player_map_performance base
+            LEFT JOIN (
+                SELECT pd.true_killer_id AS player_id, gm.map, COUNT(*) AS kills_on_map
+                FROM player_died pd
+                JOIN game_mapping gm ON pd.platform_game_id = gm.platform_game_id
+                GROUP BY pd.true_killer_id, gm.map
+            ) k ON k.player_id = base.player_id AND k.map = base.map
+            LEFT JOIN (
+                SELECT pd.true_deceased_id AS player_id, gm.map, COUNT(*) AS deaths_on_map
+                FROM player_died pd
+                JOIN game_mapping gm ON pd.platform_game_id = gm.platform_game_id
+                GROUP BY pd.true_deceased_id, gm.map
+            ) d ON d.player_id = base.player_id AND d.map = base.map
+            LEFT JOIN (
+                SELECT 
+                    pm.player_id, 
+                    gm.map, 
+                    SUM(pm.first_bloods) AS first_bloods,
+                    COUNT(DISTINCT pm.platform_game_id) FILTER (WHERE pm.first_bloods > 0) AS matches_with_first_blood
+                FROM player_mapping pm
+                JOIN game_mapping gm ON pm.platform_game_id = gm.platform_game_id
+                GROUP BY pm.player_id, gm.map
+            ) fb ON fb.player_id = base.player_id AND fb.map = base.map
+            WHERE pmp.player_id = base.player_id AND pmp.map = base.map
+            AND pmp.kills_on_map IS NULL
+        """)
+        updated = cur.rowcount
+    conn.commit()
+    logging.info(f"Backfilled event stats for {updated} player-map combinations")
+    return updated
+
 def load_map_data(file_path='event_locations/maps.json'):
     with open(file_path, 'r') as f:
         return json.load(f)
@@ -111,7 +169,11 @@ def process_player_map_performance(conn, player_id, map_url, map_data):
                 'site_a_events': 0,
                 'site_b_events': 0,
                 'site_c_events': 0,
-                'map_type': map_type
+                'map_type': map_type,
+                'kills_on_map': 0,
+                'deaths_on_map': 0,
+                'first_bloods': 0,
+                'matches_with_first_blood': 0
             }
 
         # If games_played > 0, proceed with the rest of the processing
@@ -127,6 +189,8 @@ def process_player_map_performance(conn, player_id, map_url, map_data):
         events = cur.fetchall()
 
         site_counts = {'A': 0, 'B': 0, 'C': 0}
+        kills_on_map = sum(1 for event in events if event[4] == player_id)
+        deaths_on_map = sum(1 for event in events if event[5] == player_id)
 
         for killer_x, killer_y, deceased_x, deceased_y, true_killer_id, true_deceased_id in events:
             if true_killer_id == player_id and killer_x is not None and killer_y is not None:
@@ -141,7 +205,9 @@ def process_player_map_performance(conn, player_id, map_url, map_data):
             SELECT 
                 SUM(pm.kills) as total_kills,
                 SUM(pm.deaths) as total_deaths,
-                SUM(pm.assists) as total_assists
+                SUM(pm.assists) as total_assists,
+                SUM(pm.first_bloods) as first_bloods,
+                COUNT(DISTINCT pm.platform_game_id) FILTER (WHERE pm.first_bloods > 0) as matches_with_first_blood
             FROM 
                 game_mapping gm
             JOIN 
@@ -152,7 +218,7 @@ def process_player_map_performance(conn, player_id, map_url, map_data):
         
         result = cur.fetchone()
         if result:
-            total_kills, total_deaths, total_assists = result
+            total_kills, total_deaths, total_assists, first_bloods, matches_with_first_blood = result
             total_kills = total_kills or 0
             total_deaths = total_deaths or 0
             total_assists = total_assists or 0
@@ -170,7 +236,11 @@ def process_player_map_performance(conn, player_id, map_url, map_data):
                 'site_a_events': site_counts['A'],
                 'site_b_events': site_counts['B'],
                 'site_c_events': site_counts['C'],
-                'map_type': map_type
+                'map_type': map_type,
+                'kills_on_map': kills_on_map,
+                'deaths_on_map': deaths_on_map,
+                'first_bloods': first_bloods or 0,
+                'matches_with_first_blood': matches_with_first_blood or 0
             }
         else:
             logging.info(f"No performance data for player {player_id} on map {map_url}")
@@ -181,10 +251,12 @@ def batch_update_player_map_performance(conn, data):
         cur.executemany("""
             INSERT INTO player_map_performance 
             (player_id, map, games_played, total_kills, total_deaths, total_assists, average_kda, 
-             site_a_events, site_b_events, site_c_events, map_type)
+             site_a_events, site_b_events, site_c_events, map_type,
+             kills_on_map, deaths_on_map, first_bloods, matches_with_first_blood)
             VALUES (%(player_id)s, %(map)s, %(games_played)s, %(total_kills)s, %(total_deaths)s, 
                     %(total_assists)s, %(average_kda)s, %(site_a_events)s, %(site_b_events)s, 
-                    %(site_c_events)s, %(map_type)s)
+                    %(site_c_events)s, %(map_type)s,
+                    %(kills_on_map)s, %(deaths_on_map)s, %(first_bloods)s, %(matches_with_first_blood)s)
             ON CONFLICT (player_id, map) DO UPDATE
             SET 
                 games_played = EXCLUDED.games_played,
@@ -195,7 +267,11 @@ def batch_update_player_map_performance(conn, data):
                 site_a_events = EXCLUDED.site_a_events,
                 site_b_events = EXCLUDED.site_b_events,
                 site_c_events = EXCLUDED.site_c_events,
-                map_type = EXCLUDED.map_type
+                map_type = EXCLUDED.map_type,
+                kills_on_map = EXCLUDED.kills_on_map,
+                deaths_on_map = EXCLUDED.deaths_on_map,
+                first_bloods = EXCLUDED.first_bloods,
+                matches_with_first_blood = EXCLUDED.matches_with_first_blood
         """, data)
     conn.commit()
     logging.info(f"Batch update completed for {len(data)} player-map combinations")
@@ -236,6 +312,7 @@ def main_loop():
         try:
             conn = get_db_connection()
             create_player_map_performance_table(conn)
+            backfilled = backfill_player_map_event_stats(conn)
             
             map_data = load_map_data()
             map_urls = [
@@ -262,6 +339,9 @@ def main_loop():
                 save_processed_players(processed_players)
                 logging.info(f"Processed and saved data for player {player_id}")
 
+            if players_to_process or backfilled:
+                bump_data_version(conn)
+
             logging.info("Player map performance aggregation completed successfully")
 
         except Exception as e:
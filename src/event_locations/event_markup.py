@@ -1,39 +1,19 @@
 import json
-import requests
 from PIL import Image, ImageDraw, ImageFont
-import io
-from decimal import Decimal, getcontext
 import random
-
-# Set a high precision for decimal calculations
-getcontext().prec = 50
+from map_assets import map_assets
+from map_transform import transform_coordinates_array
 
 DEFAULT_GAME_JSON = "/home/colin/vct-esports-manager/data/test-files/sample/sample.json"
 DEFAULT_MAPS_JSON = "/home/colin/vct-esports-manager/src/event_locations/maps.json"
 
 def download_image(url):
-    response = requests.get(url)
-    return Image.open(io.BytesIO(response.content))
+    return map_assets.get_minimap(url)
 
 def load_json_file(file_path):
     with open(file_path, 'r') as file:
         return json.load(file)
 
-def transform_coordinates(x, y, map_data, image_width, image_height):
-    x, y = Decimal(str(x)), Decimal(str(y))
-    xMultiplier = Decimal(str(map_data['xMultiplier']))
-    yMultiplier = Decimal(str(map_data['yMultiplier']))
-    xScalarToAdd = Decimal(str(map_data['xScalarToAdd']))
-    yScalarToAdd = Decimal(str(map_data['yScalarToAdd']))
-    
-    norm_x = (y * xMultiplier) + xScalarToAdd
-    norm_y = (x * yMultiplier) + yScalarToAdd
-    
-    pixel_x = int((norm_x * Decimal(str(image_height))).to_integral_value())
-    pixel_y = int((norm_y * Decimal(str(image_width))).to_integral_value())
-    
-    return pixel_x, pixel_y
-
 def generate_random_color():
     return (random.randint(64, 255), random.randint(64, 255), random.randint(64, 255))
 
@@ -76,6 +56,8 @@ def plot_events(game_data, map_data, event_type):
     for player_id in player_info:
         player_colors[player_id] = generate_random_color()
 
+    # Collect markers first so all positions are transformed in one pass
+    markers = []
     for event in game_data:
         if 'snapshot' in event:
             for player in event['snapshot']['players']:
@@ -88,31 +70,36 @@ def plot_events(game_data, map_data, event_type):
         elif event_type == 'kills' and 'playerDied' in event:
             killer_id = event['playerDied']['killerId']['value']
             if killer_id in last_known_positions:
-                x, y = last_known_positions[killer_id]
-                pixel_x, pixel_y = transform_coordinates(x, y, map_data, image_width, image_height)
-                
-                circle_radius = 3
-                draw.ellipse([pixel_x - circle_radius, pixel_y - circle_radius,
-                              pixel_x + circle_radius, pixel_y + circle_radius],
-                             fill=player_colors[killer_id], outline='white')
+                markers.append((killer_id, *last_known_positions[killer_id]))
 
         elif event_type == 'deaths' and 'playerDied' in event:
             deceased_id = event['playerDied']['deceasedId']['value']
             if deceased_id in last_known_positions:
-                x, y = last_known_positions[deceased_id]
-                pixel_x, pixel_y = transform_coordinates(x, y, map_data, image_width, image_height)
-                
-                draw.line((pixel_x - 5, pixel_y - 5, pixel_x + 5, pixel_y + 5), fill=player_colors[deceased_id], width=2)
-                draw.line((pixel_x - 5, pixel_y + 5, pixel_x + 5, pixel_y - 5), fill=player_colors[deceased_id], width=2)
+                markers.append((deceased_id, *last_known_positions[deceased_id]))
 
         elif event_type == 'spike_plants' and 'spikePlantCompleted' in event:
             planter_id = event['spikePlantCompleted']['playerId']['value']
             x = event['spikePlantCompleted']['plantLocation']['x']
             y = event['spikePlantCompleted']['plantLocation']['y']
-            pixel_x, pixel_y = transform_coordinates(x, y, map_data, image_width, image_height)
-            
+            markers.append((planter_id, x, y))
+
+    pixel_xs, pixel_ys, _ = transform_coordinates_array(
+        [x for _, x, _ in markers], [y for _, _, y in markers], map_data, image_width, image_height
+    )
+
+    for (player_id, _, _), pixel_x, pixel_y in zip(markers, pixel_xs.tolist(), pixel_ys.tolist()):
+        color = player_colors[player_id]
+        if event_type == 'kills':
+            circle_radius = 3
+            draw.ellipse([pixel_x - circle_radius, pixel_y - circle_radius,
+                          pixel_x + circle_radius, pixel_y + circle_radius],
+                         fill=color, outline='white')
+        elif event_type == 'deaths':
+            draw.line((pixel_x - 5, pixel_y - 5, pixel_x + 5, pixel_y + 5), fill=color, width=2)
+            draw.line((pixel_x - 5, pixel_y + 5, pixel_x + 5, pixel_y - 5), fill=color, width=2)
+        else:
             draw.rectangle([pixel_x - 5, pixel_y - 5, pixel_x + 5, pixel_y + 5],
-                           fill=player_colors[planter_id], outline='white')
+                           fill=color, outline='white')
 
     # Create color legend
     legend_width = 200
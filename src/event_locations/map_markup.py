@@ -1,38 +1,15 @@
 import json
-import requests
-from PIL import Image, ImageDraw, ImageFont
-import io
-from decimal import Decimal, getcontext
-
-# Set a high precision for decimal calculations
-getcontext().prec = 50
+from PIL import ImageDraw, ImageFont
+from map_assets import map_assets
+from map_transform import transform_coordinates_array
 
 def download_image(url):
-    response = requests.get(url)
-    return Image.open(io.BytesIO(response.content))
+    return map_assets.get_minimap(url)
 
 def load_map_data(filename):
     with open(filename, 'r') as f:
         return json.load(f)
 
-def transform_coordinates(x, y, map_data, image_width, image_height):
-    # Use Decimal for high-precision calculations
-    x = Decimal(str(x))
-    y = Decimal(str(y))
-    xMultiplier = Decimal(str(map_data['xMultiplier']))
-    yMultiplier = Decimal(str(map_data['yMultiplier']))
-    xScalarToAdd = Decimal(str(map_data['xScalarToAdd']))
-    yScalarToAdd = Decimal(str(map_data['yScalarToAdd']))
-    
-    # Scale and swap coordinates (implicit 90-degree rotation)
-    norm_x = (y * xMultiplier) + xScalarToAdd
-    norm_y = (x * yMultiplier) + yScalarToAdd
-    
-    pixel_x = int((norm_x * Decimal(str(image_height))).to_integral_value())
-    pixel_y = int((norm_y * Decimal(str(image_width))).to_integral_value())
-    
-    return pixel_x, pixel_y
-
 def draw_callouts(image, map_data):
     draw = ImageDraw.Draw(image)
     try:
@@ -41,10 +18,14 @@ def draw_callouts(image, map_data):
         font = ImageFont.load_default()
     image_width, image_height = image.size
     
-    for callout in map_data['callouts']:
-        x, y = Decimal(str(callout['location']['x'])), Decimal(str(callout['location']['y']))
-        pixel_x, pixel_y = transform_coordinates(x, y, map_data, image_width, image_height)
-        
+    callouts = map_data['callouts']
+    pixel_xs, pixel_ys, _ = transform_coordinates_array(
+        [callout['location']['x'] for callout in callouts],
+        [callout['location']['y'] for callout in callouts],
+        map_data, image_width, image_height
+    )
+
+    for callout, pixel_x, pixel_y in zip(callouts, pixel_xs.tolist(), pixel_ys.tolist()):
         # Draw a small circle for each callout
         circle_radius = 5
         draw.ellipse([pixel_x - circle_radius, pixel_y - circle_radius,
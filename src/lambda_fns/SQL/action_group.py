@@ -0,0 +1,60 @@
+import json
+import logging
+from db_connection import release_db_connection
+
+logger = logging.getLogger()
+
+def parse_event(event):
+    """Function name and {name: value} parameters of a Bedrock action group event"""
+    function = event['function']
+    parameters = {param['name']: param['value'] for param in event.get('parameters', [])}
+    return function, parameters
+
+def format_response(event, result):
+    return {
+        'response': {
+            'actionGroup': event['actionGroup'],
+            'function': event['function'],
+            'functionResponse': {
+                'responseBody': {
+                    'TEXT': {
+                        'body': json.dumps(result, default=str)
+                    }
+                }
+            }
+        },
+        'messageVersion': event['messageVersion']
+    }
+
+def format_error(event, error):
+    return {
+        'response': {
+            'actionGroup': event.get('actionGroup'),
+            'function': event.get('function'),
+            'functionResponse': {
+                'responseBody': {
+                    'TEXT': {
+                        'body': json.dumps({'error': str(error)})
+                    }
+                }
+            }
+        },
+        'messageVersion': event.get('messageVersion')
+    }
+
+def handle_event(event, functions):
+    """
+    Run the event's function from functions ({name: runner(parameters)}) and format the response.
+    The shared database connection is released afterwards so warm invocations reuse it.
+    """
+    logger.info(f"Received event: {json.dumps(event)}")
+    try:
+        function, parameters = parse_event(event)
+        if function not in functions:
+            raise ValueError(f"Unknown function: {function}")
+        return format_response(event, functions[function](parameters))
+    except Exception as e:
+        logger.error(f"Error in lambda_handler: {str(e)}")
+        return format_error(event, e)
+    finally:
+        release_db_connection()
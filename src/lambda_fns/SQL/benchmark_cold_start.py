@@ -0,0 +1,101 @@
+"""
+Local cold-start benchmark for the SQL action group. Every function is measured in a fresh interpreter:
+import time of the handler module, import time of the function's own modules, peak RSS, and which heavy
+packages ended up loaded.
+
+    python benchmark_cold_start.py [--runs 5] [--invoke]
+
+--invoke also times the first lambda_handler call (set RDS_DATABASE_URL to a local database; without it
+the call fails at connect, after the imports have happened).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# function -> (split handler module, module imported lazily for it, sample parameters)
+FUNCTIONS = {
+    'get_player_info': ('query_handler', 'get_player_info', {'handle': 'tezn'}),
+    'get_top_agents_for_player': ('query_handler', 'get_top_agents_for_player', {'player_id': '106229920360816436'}),
+    'get_top_players_by_role': ('query_handler', 'get_top_players_by_role', {'role': 'duelist', 'vct_international': '1'}),
+    'get_map_visualization': ('render_handler', 'get_last_game_map', {'player_id': '106229920360816436'}),
+    'get_last_tournament_map': ('render_handler', 'get_last_tour_map', {'player_id': '106229920360816436'}),
+}
+
+HEAVY_PACKAGES = ('PIL', 'numpy', 'requests', 'boto3', 'botocore')
+
+PROBE = """
+import json, resource, sys, time
+handler_name, module_name, event, invoke = json.loads(sys.argv[1])
+started = time.perf_counter()
+handler = __import__(handler_name)
+handler_loaded = time.perf_counter()
+__import__(module_name)
+module_loaded = time.perf_counter()
+result = {
+    'handler_import_ms': (handler_loaded - started) * 1000,
+    'function_import_ms': (module_loaded - handler_loaded) * 1000,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': len(sys.modules),
+    'heavy': [name for name in %r if name in sys.modules],
+}
+if invoke:
+    call_started = time.perf_counter()
+    handler.lambda_handler(event, None)
+    result['first_call_ms'] = (time.perf_counter() - call_started) * 1000
+    result['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(result))
+""" % (HEAVY_PACKAGES,)
+
+def make_event(function, parameters):
+    return {
+        'actionGroup': 'benchmark',
+        'function': function,
+        'parameters': [{'name': name, 'type': 'string', 'value': value} for name, value in parameters.items()],
+        'messageVersion': '1.0'
+    }
+
+def probe(handler_name, module_name, event, invoke):
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, json.dumps([handler_name, module_name, event, invoke])],
+        cwd=HERE, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def baseline_rss(runs):
+    script = "import resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)"
+    return statistics.median(
+        float(subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout)
+        for _ in range(runs)
+    )
+
+def run_benchmark(runs=5, invoke=False):
+    print(f"Bare interpreter RSS: {baseline_rss(runs):.1f} MB (median of {runs})\n")
+    header = f"{'function':<28}{'handler':<16}{'handler ms':>12}{'function ms':>13}{'total ms':>10}{'RSS MB':>9}"
+    if invoke:
+        header += f"{'call ms':>10}"
+    print(header + "  heavy packages")
+
+    for function, (split_handler, module_name, parameters) in FUNCTIONS.items():
+        event = make_event(function, parameters)
+        for handler_name in ('main', split_handler):
+            samples = [probe(handler_name, module_name, event, invoke) for _ in range(runs)]
+            handler_ms = statistics.median(s['handler_import_ms'] for s in samples)
+            function_ms = statistics.median(s['function_import_ms'] for s in samples)
+            total_ms = statistics.median(s['handler_import_ms'] + s['function_import_ms'] for s in samples)
+            rss = statistics.median(s['max_rss_mb'] for s in samples)
+            line = f"{function:<28}{handler_name:<16}{handler_ms:>12.1f}{function_ms:>13.1f}{total_ms:>10.1f}{rss:>9.1f}"
+            if invoke:
+                line += f"{statistics.median(s['first_call_ms'] for s in samples):>10.1f}"
+            print(line + "  " + (", ".join(samples[-1]['heavy']) or "-"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold-start import time and RSS per function")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument('--invoke', action='store_true', help="Also time the first lambda_handler call")
+    args = parser.parse_args()
+    run_benchmark(args.runs, args.invoke)
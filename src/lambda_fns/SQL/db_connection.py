@@ -1,7 +1,115 @@
+import logging
 import os
+import threading
+import time
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
 
+logger = logging.getLogger()
+
+# A connection idle for longer than this is pinged before it is handed out again
+VALIDATE_AFTER_SECONDS = float(os.getenv('DB_VALIDATE_AFTER_SECONDS', '30'))
+
+class SharedConnection:
+    """
+    Handle on the managed connection. Behaves like the psycopg2 connection (cursor, commit,
+    `with conn:` transactions), but close() only ends the current transaction so the next
+    get_db_connection() call, in this or a later warm invocation, reuses the connection.
+    """
+
+    def __init__(self, manager, conn):
+        self._manager = manager
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._conn.__exit__(exc_type, exc_value, traceback)
+
+    def close(self):
+        self._manager.release()
+
+class ConnectionManager:
+    """Keeps one validated connection per process and reconnects when it has gone away"""
+
+    def __init__(self, db_url=None, validate_after_seconds=VALIDATE_AFTER_SECONDS):
+        self._db_url = db_url
+        self.validate_after_seconds = validate_after_seconds
+        self._conn = None
+        self._last_used = 0.0
+        self._lock = threading.RLock()
+        self.connects = 0
+
+    def _connect(self):
+        db_url = self._db_url or os.environ['RDS_DATABASE_URL']
+        self._conn = psycopg2.connect(db_url, cursor_factory=RealDictCursor)
+        self.connects += 1
+        logger.info(f"Opened database connection (#{self.connects})")
+
+    def _is_usable(self) -> bool:
+        if self._conn is None or self._conn.closed:
+            return False
+        try:
+            status = self._conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                self._conn.rollback()
+            if time.monotonic() - self._last_used > self.validate_after_seconds:
+                with self._conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                self._conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Discarding database connection: {str(e)}")
+            return False
+
+    def get(self) -> SharedConnection:
+        """The shared connection, reconnecting first if it is closed or fails validation"""
+        with self._lock:
+            if not self._is_usable():
+                self.reset()
+                self._connect()
+            self._last_used = time.monotonic()
+            return SharedConnection(self, self._conn)
+
+    def release(self):
+        """End any open transaction; drop the connection if it broke while in use"""
+        with self._lock:
+            if self._conn is None:
+                return
+            if self._conn.closed:
+                self._conn = None
+                return
+            try:
+                if self._conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    self._conn.rollback()
+                self._last_used = time.monotonic()
+            except psycopg2.Error as e:
+                logger.warning(f"Discarding database connection: {str(e)}")
+                self.reset()
+
+    def reset(self):
+        """Close and forget the current connection"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except psycopg2.Error:
+                    pass
+                self._conn = None
+
+connection_manager = ConnectionManager()
+
 def get_db_connection():
-    db_url = os.environ['RDS_DATABASE_URL']
-    return psycopg2.connect(db_url, cursor_factory=RealDictCursor)
\ No newline at end of file
+    return connection_manager.get()
+
+def release_db_connection():
+    """Call at the end of a handler invocation so no transaction is left open between invocations"""
+    connection_manager.release()
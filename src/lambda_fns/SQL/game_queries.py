@@ -140,4 +140,177 @@ def get_deaths(platform_game_id, internal_player_id):
                 return cursor.fetchall()
     except Exception as e:
         logger.error(f"Error in get_deaths: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+
+def _split_pairs(game_player_pairs):
+    """Unique (platform_game_id, internal_player_id) pairs as two parallel lists for unnest()"""
+    pairs = list(dict.fromkeys((str(game_id), str(player_id)) for game_id, player_id in game_player_pairs))
+    return pairs, [game_id for game_id, _ in pairs], [player_id for _, player_id in pairs]
+
+def _group_rows(rows, pairs, player_column):
+    grouped = {pair: [] for pair in pairs}
+    for row in rows:
+        grouped[(row['platform_game_id'], row[player_column])].append(row)
+    return grouped
+
+def get_damage_stats_batch(game_player_pairs):
+    """
+    get_damage_stats for many (platform_game_id, internal_player_id) pairs in one query.
+    Returns {(platform_game_id, internal_player_id): [rows]}, with an empty list for pairs without damage.
+    """
+    pairs, game_ids, player_ids = _split_pairs(game_player_pairs)
+    if not pairs:
+        return {}
+    query = """
+    SELECT de.platform_game_id, de.causer_id, de.victim_id, de.damage_amount, de.location, de.kill_event
+    FROM damage_event de
+    JOIN unnest(%s::text[], %s::text[]) AS p(platform_game_id, internal_player_id)
+      ON de.platform_game_id = p.platform_game_id AND de.causer_id = p.internal_player_id;
+    """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, (game_ids, player_ids))
+                return _group_rows(cursor.fetchall(), pairs, 'causer_id')
+    except Exception as e:
+        logger.error(f"Error in get_damage_stats_batch: {str(e)}")
+        raise
+
+def get_assists_batch(game_player_pairs):
+    """get_assists for many pairs in one query, grouped like get_damage_stats_batch"""
+    pairs, game_ids, player_ids = _split_pairs(game_player_pairs)
+    if not pairs:
+        return {}
+    query = """
+    SELECT pa.platform_game_id, pa.assister_id
+    FROM player_assists pa
+    JOIN unnest(%s::text[], %s::text[]) AS p(platform_game_id, internal_player_id)
+      ON pa.platform_game_id = p.platform_game_id AND pa.assister_id = p.internal_player_id;
+    """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, (game_ids, player_ids))
+                return _group_rows(cursor.fetchall(), pairs, 'assister_id')
+    except Exception as e:
+        logger.error(f"Error in get_assists_batch: {str(e)}")
+        raise
+
+def get_deaths_batch(game_player_pairs):
+    """get_deaths for many pairs in one query, grouped like get_damage_stats_batch"""
+    pairs, game_ids, player_ids = _split_pairs(game_player_pairs)
+    if not pairs:
+        return {}
+    query = """
+    SELECT pd.platform_game_id, pd.deceased_id, pd.killer_id, pd.weapon_guid
+    FROM player_died pd
+    JOIN unnest(%s::text[], %s::text[]) AS p(platform_game_id, internal_player_id)
+      ON pd.platform_game_id = p.platform_game_id AND pd.deceased_id = p.internal_player_id;
+    """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, (game_ids, player_ids))
+                return _group_rows(cursor.fetchall(), pairs, 'deceased_id')
+    except Exception as e:
+        logger.error(f"Error in get_deaths_batch: {str(e)}")
+        raise
+
+def get_game_breakdowns(game_player_pairs):
+    """
+    Per-game breakdown for many (platform_game_id, internal_player_id) pairs in one query: damage
+    totals, hits and kills by body location, headshot ratio, assists and deaths. All aggregation
+    happens in the database; only one row per pair and location comes back.
+
+    Returns:
+        {(platform_game_id, internal_player_id): {
+            'total_damage', 'total_hits', 'kills_from_damage', 'headshot_ratio', 'assists', 'deaths',
+            'locations': {location: {'damage', 'hits', 'kills', 'hit_share'}}
+        }}
+    """
+    pairs, game_ids, player_ids = _split_pairs(game_player_pairs)
+    if not pairs:
+        return {}
+    query = """
+    WITH pairs AS (
+        SELECT p.platform_game_id, p.internal_player_id
+        FROM unnest(%s::text[], %s::text[]) AS p(platform_game_id, internal_player_id)
+    ),
+    damage AS (
+        SELECT
+            de.platform_game_id, de.causer_id, UPPER(de.location) AS location,
+            SUM(de.damage_amount)::float AS damage,
+            COUNT(*) AS hits,
+            COUNT(*) FILTER (WHERE de.kill_event) AS kills
+        FROM damage_event de
+        JOIN pairs p ON de.platform_game_id = p.platform_game_id AND de.causer_id = p.internal_player_id
+        GROUP BY de.platform_game_id, de.causer_id, UPPER(de.location)
+    ),
+    damage_totals AS (
+        SELECT
+            platform_game_id, causer_id, location, damage, hits, kills,
+            SUM(damage) OVER w AS total_damage,
+            SUM(hits) OVER w AS total_hits,
+            SUM(kills) OVER w AS total_kills,
+            SUM(CASE WHEN location = 'HEAD' THEN hits ELSE 0 END) OVER w AS head_hits
+        FROM damage
+        WINDOW w AS (PARTITION BY platform_game_id, causer_id)
+    ),
+    assists AS (
+        SELECT pa.platform_game_id, pa.assister_id, COUNT(*) AS assists
+        FROM player_assists pa
+        JOIN pairs p ON pa.platform_game_id = p.platform_game_id AND pa.assister_id = p.internal_player_id
+        GROUP BY pa.platform_game_id, pa.assister_id
+    ),
+    deaths AS (
+        SELECT pd.platform_game_id, pd.deceased_id, COUNT(*) AS deaths
+        FROM player_died pd
+        JOIN pairs p ON pd.platform_game_id = p.platform_game_id AND pd.deceased_id = p.internal_player_id
+        GROUP BY pd.platform_game_id, pd.deceased_id
+    )
+    SELECT
+        p.platform_game_id, p.internal_player_id,
+        dt.location, dt.damage, dt.hits, dt.kills,
+        dt.hits::float / NULLIF(dt.total_hits, 0) AS hit_share,
+        COALESCE(dt.total_damage, 0) AS total_damage,
+        COALESCE(dt.total_hits, 0)::bigint AS total_hits,
+        COALESCE(dt.total_kills, 0)::bigint AS total_kills,
+        dt.head_hits::float / NULLIF(dt.total_hits, 0) AS headshot_ratio,
+        COALESCE(a.assists, 0) AS assists,
+        COALESCE(d.deaths, 0) AS deaths
+    FROM pairs p
+    LEFT JOIN damage_totals dt ON dt.platform_game_id = p.platform_game_id AND dt.causer_id = p.internal_player_id
+    LEFT JOIN assists a ON a.platform_game_id = p.platform_game_id AND a.assister_id = p.internal_player_id
+    LEFT JOIN deaths d ON d.platform_game_id = p.platform_game_id AND d.deceased_id = p.internal_player_id
+    ORDER BY p.platform_game_id, p.internal_player_id, dt.location;
+    """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, (game_ids, player_ids))
+                rows = cursor.fetchall()
+    except Exception as e:
+        logger.error(f"Error in get_game_breakdowns: {str(e)}")
+        raise
+
+    breakdowns = {}
+    for row in rows:
+        pair = (row['platform_game_id'], row['internal_player_id'])
+        breakdown = breakdowns.setdefault(pair, {
+            'total_damage': row['total_damage'],
+            'total_hits': row['total_hits'],
+            'kills_from_damage': row['total_kills'],
+            'headshot_ratio': row['headshot_ratio'] or 0.0,
+            'assists': row['assists'],
+            'deaths': row['deaths'],
+            'locations': {}
+        })
+        if row['location'] is not None:
+            breakdown['locations'][row['location']] = {
+                'damage': row['damage'],
+                'hits': row['hits'],
+                'kills': row['kills'],
+                'hit_share': row['hit_share']
+            }
+    return breakdowns
@@ -1,11 +1,10 @@
 import logging
-import json
-from PIL import Image, ImageDraw
+from PIL import ImageDraw
 import io
 import base64
 from db_connection import get_db_connection
-from decimal import Decimal
-import requests
+from map_assets import map_assets
+from map_transform import transform_coordinates_array
 from datetime import datetime
 
 logger = logging.getLogger()
@@ -42,20 +41,17 @@ def get_latest_game(player_id):
 
 def get_map_data(map_url):
     try:
-        with open('maps.json', 'r') as f:
-            maps_data = json.load(f)
-
-        for map_data in maps_data:
-            if map_data['mapUrl'] == map_url:
-                return {
-                    'displayName': map_data['displayName'],
-                    'displayIcon': map_data['displayIcon'],
-                    'xMultiplier': str(map_data['xMultiplier']),
-                    'yMultiplier': str(map_data['yMultiplier']),
-                    'xScalarToAdd': str(map_data['xScalarToAdd']),
-                    'yScalarToAdd': str(map_data['yScalarToAdd']),
-                    'mapUrl': map_data['mapUrl']
-                }
+        map_data = map_assets.get_map_data(map_url)
+        if map_data is not None:
+            return {
+                'displayName': map_data['displayName'],
+                'displayIcon': map_data['displayIcon'],
+                'xMultiplier': str(map_data['xMultiplier']),
+                'yMultiplier': str(map_data['yMultiplier']),
+                'xScalarToAdd': str(map_data['xScalarToAdd']),
+                'yScalarToAdd': str(map_data['yScalarToAdd']),
+                'mapUrl': map_data['mapUrl']
+            }
 
         logger.warning(f"Map data not found for {map_url}")
         return None
@@ -89,39 +85,23 @@ def get_game_events(platform_game_id, player_id):
         logger.error(f"Error in get_game_events: {str(e)}", exc_info=True)
         raise
 
-def transform_coordinates(x, y, map_data, image_width, image_height):
-    try:
-        x, y = Decimal(str(x)), Decimal(str(y))
-        xMultiplier = Decimal(map_data['xMultiplier'])
-        yMultiplier = Decimal(map_data['yMultiplier'])
-        xScalarToAdd = Decimal(map_data['xScalarToAdd'])
-        yScalarToAdd = Decimal(map_data['yScalarToAdd'])
-        
-        norm_x = (y * xMultiplier) + xScalarToAdd
-        norm_y = (x * yMultiplier) + yScalarToAdd
-        
-        pixel_x = int((norm_x * Decimal(str(image_width))).to_integral_value())
-        pixel_y = int((norm_y * Decimal(str(image_height))).to_integral_value())
-        
-        return pixel_x, pixel_y
-    except (ValueError, KeyError, TypeError) as e:
-        logger.error(f"Error in transform_coordinates: {str(e)}")
-        return None, None
-
 def create_map_visualization(player_id, platform_game_id, map_url, map_data):
     try:
         events = get_game_events(platform_game_id, player_id)
 
-        response = requests.get(map_data['displayIcon'])
-        img = Image.open(io.BytesIO(response.content))
+        img = map_assets.get_minimap(map_data['displayIcon'])
         draw = ImageDraw.Draw(img)
         image_width, image_height = img.size
         
-        for event in events:
-            deceased_x, deceased_y = transform_coordinates(event['deceased_x'], event['deceased_y'], map_data, image_width, image_height)
-            killer_x, killer_y = transform_coordinates(event['killer_x'], event['killer_y'], map_data, image_width, image_height)
-            
-            if all(coord is not None for coord in [killer_x, killer_y, deceased_x, deceased_y]):
+        deceased_xs, deceased_ys, deceased_valid = transform_coordinates_array(
+            [event['deceased_x'] for event in events], [event['deceased_y'] for event in events], map_data, image_width, image_height)
+        killer_xs, killer_ys, killer_valid = transform_coordinates_array(
+            [event['killer_x'] for event in events], [event['killer_y'] for event in events], map_data, image_width, image_height)
+
+        for i, event in enumerate(events):
+            if deceased_valid[i] and killer_valid[i]:
+                deceased_x, deceased_y = int(deceased_xs[i]), int(deceased_ys[i])
+                killer_x, killer_y = int(killer_xs[i]), int(killer_ys[i])
                 if event['true_killer_id'] == player_id:
                     # Player's kill
                     draw.line((killer_x, killer_y, deceased_x, deceased_y), fill="green", width=2)
@@ -3,14 +3,17 @@ import os
 import json
 import io
 import base64
-import requests
 from collections import defaultdict
 import boto3
 from botocore.exceptions import ClientError
 from PIL import Image, ImageDraw, ImageFont
 from db_connection import get_db_connection
-from get_last_game_map import get_map_data, transform_coordinates
+from get_last_game_map import get_map_data
+from map_assets import map_assets
+from map_transform import transform_coordinates_array
+from map_heatmap import render_heatmap, KILL_HEAT_COLOR, DEATH_HEAT_COLOR
 import colorsys
+import numpy as np
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -20,9 +23,12 @@ S3_REGION = "us-east-1"
 
 s3_client = boto3.client('s3', region_name=S3_REGION)
 
-def get_tournament_map_visualizations(player_id, event_type='both'):
+def get_tournament_map_visualizations(player_id, event_type='both', render_mode='markers'):
     try:
-        cached_data = get_cached_tournament_data(player_id)
+        if render_mode not in ('markers', 'heatmap'):
+            return {"error": f"Unknown render mode: {render_mode}"}
+
+        cached_data = get_cached_tournament_data(player_id, render_mode)
         if cached_data:
             logger.info(f"Returning cached data for player {player_id}")
             return cached_data
@@ -39,6 +45,9 @@ def get_tournament_map_visualizations(player_id, event_type='both'):
         for game in games:
             games_by_map[game['map']].append(game)
 
+        # Two queries for the whole tournament instead of one per game for events and acronyms
+        events_by_game, team_acronyms = get_tournament_render_data(player_id, games, event_type)
+
         colors = get_distinct_colors(len(games))
         map_visualizations = {}
 
@@ -48,14 +57,28 @@ def get_tournament_map_visualizations(player_id, event_type='both'):
                 logger.warning(f"Map data not found for {map_url}")
                 continue
 
-            img_attacking = Image.open(io.BytesIO(requests.get(map_data['displayIcon']).content))
-            img_defending = Image.open(io.BytesIO(requests.get(map_data['displayIcon']).content))
+            if render_mode == 'heatmap':
+                for i, game in enumerate(map_games):
+                    game['color'] = colors[i]
+                img_attacking, img_defending = plot_heatmaps(map_games, player_id, map_data, events_by_game)
+                map_visualizations[map_url] = {
+                    'image_attacking': img_attacking,
+                    'image_defending': img_defending,
+                    'games': map_games,
+                    'display_name': map_data['displayName']
+                }
+                continue
+
+            img_attacking = map_assets.get_minimap(map_data['displayIcon'])
+            img_defending = map_assets.get_minimap(map_data['displayIcon'])
             draw_attacking = ImageDraw.Draw(img_attacking)
             draw_defending = ImageDraw.Draw(img_defending)
 
             for i, game in enumerate(map_games):
                 game['color'] = colors[i]
-                game['attacker_kills'], game['defender_kills'], game['attacker_deaths'], game['defender_deaths'] = plot_game_events(draw_attacking, draw_defending, game, player_id, map_data, event_type)
+                game['attacker_kills'], game['defender_kills'], game['attacker_deaths'], game['defender_deaths'] = plot_game_events(
+                    draw_attacking, draw_defending, game, player_id, map_data, event_type, events_by_game.get(game['platform_game_id'], [])
+                )
 
             map_visualizations[map_url] = {
                 'image_attacking': img_attacking,
@@ -72,16 +95,22 @@ def get_tournament_map_visualizations(player_id, event_type='both'):
             "league_name": tournament_info['league_name'],
             "league_region": tournament_info['league_region'],
             "event_type": event_type,
+            "render_mode": render_mode,
             "maps": {}
         }
 
         for map_url, map_viz in map_visualizations.items():
-            img_attacking_with_legend = add_legend(map_viz['image_attacking'], map_viz['games'], event_type, "Attacking")
-            img_defending_with_legend = add_legend(map_viz['image_defending'], map_viz['games'], event_type, "Defending")
+            if render_mode == 'heatmap':
+                img_attacking_with_legend = add_heatmap_legend(map_viz['image_attacking'], map_viz['games'], event_type, "Attacking")
+                img_defending_with_legend = add_heatmap_legend(map_viz['image_defending'], map_viz['games'], event_type, "Defending")
+            else:
+                img_attacking_with_legend = add_legend(map_viz['image_attacking'], map_viz['games'], event_type, "Attacking", team_acronyms)
+                img_defending_with_legend = add_legend(map_viz['image_defending'], map_viz['games'], event_type, "Defending", team_acronyms)
             
             map_directory = f"{player_id}_last_tournament/{map_viz['display_name']}"
-            file_name_attacking = f"{map_directory}/attacking_{tournament_info['tournament_id']}.png"
-            file_name_defending = f"{map_directory}/defending_{tournament_info['tournament_id']}.png"
+            prefix = 'heatmap_' if render_mode == 'heatmap' else ''
+            file_name_attacking = f"{map_directory}/{prefix}attacking_{tournament_info['tournament_id']}.png"
+            file_name_defending = f"{map_directory}/{prefix}defending_{tournament_info['tournament_id']}.png"
             
             img_buffer_attacking = io.BytesIO()
             img_attacking_with_legend.save(img_buffer_attacking, format='PNG')
@@ -116,7 +145,7 @@ def get_tournament_map_visualizations(player_id, event_type='both'):
             else:
                 logger.error(f"Failed to upload images to S3 for map: {map_viz['display_name']}")
 
-        cache_tournament_data(player_id, result)
+        cache_tournament_data(player_id, result, render_mode)
 
         return result
 
@@ -124,18 +153,23 @@ def get_tournament_map_visualizations(player_id, event_type='both'):
         logger.error(f"Error in get_tournament_map_visualizations: {str(e)}", exc_info=True)
         return {"error": str(e)}
 
-def plot_game_events(draw_attacking, draw_defending, game, player_id, map_data, event_type):
-    events = get_game_events(game['platform_game_id'], player_id, event_type)
+def plot_game_events(draw_attacking, draw_defending, game, player_id, map_data, event_type, events):
     image_width, image_height = draw_attacking.im.size
     color = game['color']
     
     attacker_kills, defender_kills, attacker_deaths, defender_deaths = 0, 0, 0, 0
-    
-    for event in events:
-        deceased_x, deceased_y = transform_coordinates(event['deceased_x'], event['deceased_y'], map_data, image_width, image_height)
-        killer_x, killer_y = transform_coordinates(event['killer_x'], event['killer_y'], map_data, image_width, image_height)
-        
-        if all(coord is not None for coord in [killer_x, killer_y, deceased_x, deceased_y]):
+    if not events:
+        return attacker_kills, defender_kills, attacker_deaths, defender_deaths
+
+    deceased_xs, deceased_ys, deceased_valid = transform_coordinates_array(
+        [event['deceased_x'] for event in events], [event['deceased_y'] for event in events], map_data, image_width, image_height)
+    killer_xs, killer_ys, killer_valid = transform_coordinates_array(
+        [event['killer_x'] for event in events], [event['killer_y'] for event in events], map_data, image_width, image_height)
+
+    for i, event in enumerate(events):
+        if deceased_valid[i] and killer_valid[i]:
+            deceased_x, deceased_y = int(deceased_xs[i]), int(deceased_ys[i])
+            killer_x, killer_y = int(killer_xs[i]), int(killer_ys[i])
             if event['true_killer_id'] == player_id and (event_type in ['kills', 'both']):
                 if event['killer_is_attacking']:
                     draw_attacking.ellipse((killer_x - 5, killer_y - 5, killer_x + 5, killer_y + 5), fill=color)
@@ -159,11 +193,57 @@ def plot_game_events(draw_attacking, draw_defending, game, player_id, map_data,
     
     return attacker_kills, defender_kills, attacker_deaths, defender_deaths
 
+def plot_heatmaps(games, player_id, map_data, events_by_game):
+    """
+    Kill/death density heatmaps over all of the games, one per side. Fills in the same per-game
+    attacker/defender counts as plot_game_events.
+    """
+    events, game_index = [], []
+    for i, game in enumerate(games):
+        game_events = events_by_game.get(game['platform_game_id'], [])
+        events.extend(game_events)
+        game_index.extend([i] * len(game_events))
+
+    minimap = map_assets.get_minimap(map_data['displayIcon'])
+    image_width, image_height = minimap.size
+
+    if events:
+        killer_xs, killer_ys, killer_valid = transform_coordinates_array(
+            [event['killer_x'] for event in events], [event['killer_y'] for event in events], map_data, image_width, image_height)
+        deceased_xs, deceased_ys, deceased_valid = transform_coordinates_array(
+            [event['deceased_x'] for event in events], [event['deceased_y'] for event in events], map_data, image_width, image_height)
+    else:
+        killer_xs = killer_ys = deceased_xs = deceased_ys = np.empty(0, dtype=np.int64)
+        killer_valid = deceased_valid = np.empty(0, dtype=bool)
+
+    game_index = np.array(game_index, dtype=np.int64)
+    is_kill = np.array([event['true_killer_id'] == player_id for event in events], dtype=bool) & killer_valid
+    is_death = np.array([event['true_deceased_id'] == player_id for event in events], dtype=bool) & ~is_kill & deceased_valid
+    killer_attacking = np.array([bool(event['killer_is_attacking']) for event in events], dtype=bool)
+    deceased_attacking = np.array([bool(event['deceased_is_attacking']) for event in events], dtype=bool)
+
+    images = []
+    for attacking in (True, False):
+        kills = is_kill & (killer_attacking == attacking)
+        deaths = is_death & (deceased_attacking == attacking)
+        side = 'attacker' if attacking else 'defender'
+        kill_counts = np.bincount(game_index[kills], minlength=len(games))
+        death_counts = np.bincount(game_index[deaths], minlength=len(games))
+        for i, game in enumerate(games):
+            game[f'{side}_kills'] = int(kill_counts[i])
+            game[f'{side}_deaths'] = int(death_counts[i])
+        images.append(render_heatmap(minimap, [
+            (killer_xs[kills], killer_ys[kills], KILL_HEAT_COLOR),
+            (deceased_xs[deaths], deceased_ys[deaths], DEATH_HEAT_COLOR),
+        ]))
+
+    return images[0], images[1]
+
 def draw_x(draw, x, y, size, fill):
     draw.line((x - size, y - size, x + size, y + size), fill=fill, width=2)
     draw.line((x - size, y + size, x + size, y - size), fill=fill, width=2)
 
-def add_legend(img, games, event_type, side):
+def add_legend(img, games, event_type, side, team_acronyms):
     legend_width = 300
     new_img = Image.new('RGB', (img.width + legend_width, img.height), color='white')
     new_img.paste(img, (0, 0))
@@ -176,7 +256,7 @@ def add_legend(img, games, event_type, side):
     y += 30
     
     for i, game in enumerate(games):
-        team1, team2 = get_team_acronyms(game['match_id'])
+        team1, team2 = team_acronyms.get(game['match_id'], ('TBD', 'TBD'))
         match_text = f"Game {i+1}: {team1} vs {team2}"
         color = game['color']
         draw.rectangle([x, y, x+20, y+20], fill=color, outline="black")
@@ -205,9 +285,43 @@ def add_legend(img, games, event_type, side):
     
     return new_img
 
-def get_cached_tournament_data(player_id):
+def add_heatmap_legend(img, games, event_type, side):
+    legend_width = 300
+    new_img = Image.new('RGB', (img.width + legend_width, img.height), color='white')
+    new_img.paste(img, (0, 0))
+
+    draw = ImageDraw.Draw(new_img)
+    font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 14)
+
+    x, y = img.width + 10, 10
+    draw.text((x, y), f"Legend ({side}):", fill="black", font=font)
+    y += 30
+
+    side_key = 'attacker' if side == 'Attacking' else 'defender'
+    kills = sum(game[f'{side_key}_kills'] for game in games)
+    deaths = sum(game[f'{side_key}_deaths'] for game in games)
+    draw.text((x, y), f"{len(games)} games", fill="black", font=font)
+    y += 30
+
+    if event_type in ['kills', 'both']:
+        draw.rectangle([x, y, x+20, y+20], fill=KILL_HEAT_COLOR, outline="black")
+        draw.text((x + 30, y + 3), f"Player's kills ({kills})", fill="black", font=font)
+        y += 30
+    if event_type in ['deaths', 'both']:
+        draw.rectangle([x, y, x+20, y+20], fill=DEATH_HEAT_COLOR, outline="black")
+        draw.text((x + 30, y + 3), f"Player's deaths ({deaths})", fill="black", font=font)
+        y += 30
+
+    draw.text((x, y), "Brighter areas: more events", fill="black", font=font)
+    return new_img
+
+def get_cache_file(player_id, render_mode='markers'):
+    prefix = 'heatmap_' if render_mode == 'heatmap' else ''
+    return f"{player_id}_last_tournament/{prefix}cache.json"
+
+def get_cached_tournament_data(player_id, render_mode='markers'):
     try:
-        cache_file = f"{player_id}_last_tournament/cache.json"
+        cache_file = get_cache_file(player_id, render_mode)
         response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=cache_file)
         cached_data = json.loads(response['Body'].read().decode('utf-8'))
         return cached_data
@@ -218,9 +332,9 @@ def get_cached_tournament_data(player_id):
             logger.error(f"Error retrieving cached data: {str(e)}")
             return None
 
-def cache_tournament_data(player_id, data):
+def cache_tournament_data(player_id, data, render_mode='markers'):
     try:
-        cache_file = f"{player_id}_last_tournament/cache.json"
+        cache_file = get_cache_file(player_id, render_mode)
         s3_client.put_object(
             Bucket=S3_BUCKET_NAME,
             Key=cache_file,
@@ -290,60 +404,73 @@ def get_tournament_games(player_id, tournament_id, tournament_type):
     
     return games
 
-def get_game_events(platform_game_id, player_id, event_type):
+def get_tournament_render_data(player_id, games, event_type):
+    """
+    Fetch the player's events for every game and the team acronyms for every match in one query each.
+    Returns ({platform_game_id: [events]}, {match_id: (team1, team2)}).
+    """
+    conn = get_db_connection()
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = """
-            SELECT 
-                deceased_x, deceased_y, killer_x, killer_y,
-                true_deceased_id, true_killer_id, killer_is_attacking, deceased_is_attacking
-            FROM player_died
-            WHERE platform_game_id = %s 
-            AND (true_deceased_id = %s OR true_killer_id = %s)
-        """
-        cursor.execute(query, (platform_game_id, player_id, player_id))
-        events = cursor.fetchall()
-
-        cursor.close()
+        events_by_game = get_events_for_games(conn, [game['platform_game_id'] for game in games], player_id, event_type)
+        team_acronyms = get_team_acronyms_for_matches(conn, list({game['match_id'] for game in games}))
+        return events_by_game, team_acronyms
+    finally:
         conn.close()
 
-        if event_type == 'kills':
-            return [e for e in events if e['true_killer_id'] == player_id]
-        elif event_type == 'deaths':
-            return [e for e in events if e['true_deceased_id'] == player_id]
-        else:
-            return events
+def get_events_for_games(conn, platform_game_ids, player_id, event_type):
+    cursor = conn.cursor()
 
-    except Exception as e:
-        logger.error(f"Error in get_game_events: {str(e)}", exc_info=True)
-        raise
+    query = """
+        SELECT 
+            platform_game_id, deceased_x, deceased_y, killer_x, killer_y,
+            true_deceased_id, true_killer_id, killer_is_attacking, deceased_is_attacking
+        FROM player_died
+        WHERE platform_game_id = ANY(%s)
+        AND (true_deceased_id = %s OR true_killer_id = %s)
+    """
+    cursor.execute(query, (platform_game_ids, player_id, player_id))
+    events = cursor.fetchall()
+    cursor.close()
 
-def get_team_acronyms(match_id):
-    conn = get_db_connection()
+    events_by_game = defaultdict(list)
+    for event in events:
+        if event_type == 'kills' and event['true_killer_id'] != player_id:
+            continue
+        if event_type == 'deaths' and event['true_deceased_id'] != player_id:
+            continue
+        events_by_game[event['platform_game_id']].append(event)
+    return events_by_game
+
+def get_team_acronyms_for_matches(conn, match_ids):
     cursor = conn.cursor()
     
     query = """
-    SELECT DISTINCT t.acronym
+    SELECT DISTINCT gm.match_id, t.acronym
     FROM game_mapping gm
     JOIN team_mapping tm ON gm.platform_game_id = tm.platform_game_id
     JOIN teams t ON tm.team_id = t.team_id
-    WHERE gm.match_id = %s
+    WHERE gm.match_id = ANY(%s)
+    ORDER BY gm.match_id, t.acronym
     """
     
-    cursor.execute(query, (match_id,))
+    cursor.execute(query, (match_ids,))
     results = cursor.fetchall()
-    
     cursor.close()
-    conn.close()
-    
-    if len(results) == 2:
-        return results[0]['acronym'], results[1]['acronym']
-    elif len(results) == 1:
-        return results[0]['acronym'], 'TBD'
-    else:
-        return 'TBD', 'TBD'
+
+    acronyms_by_match = defaultdict(list)
+    for row in results:
+        acronyms_by_match[row['match_id']].append(row['acronym'])
+
+    team_acronyms = {}
+    for match_id in match_ids:
+        acronyms = acronyms_by_match.get(match_id, [])
+        if len(acronyms) == 2:
+            team_acronyms[match_id] = (acronyms[0], acronyms[1])
+        elif len(acronyms) == 1:
+            team_acronyms[match_id] = (acronyms[0], 'TBD')
+        else:
+            team_acronyms[match_id] = ('TBD', 'TBD')
+    return team_acronyms
 
 def get_distinct_colors(n):
     hue_start = 0.0
@@ -0,0 +1,62 @@
+import numpy as np
+from PIL import Image, ImageFilter
+
+# Histogram cell size in pixels and blur radius applied to the upscaled density
+HEATMAP_BIN_SIZE = 8
+HEATMAP_BLUR_RADIUS = 12
+HEATMAP_MAX_ALPHA = 200
+
+KILL_HEAT_COLOR = (0, 200, 83)
+DEATH_HEAT_COLOR = (229, 57, 53)
+
+def density_grid(pixel_xs, pixel_ys, image_width, image_height, bin_size=HEATMAP_BIN_SIZE):
+    """Count points per bin_size x bin_size cell; rows are image y, columns image x"""
+    bins_y = max(1, image_height // bin_size)
+    bins_x = max(1, image_width // bin_size)
+    grid, _, _ = np.histogram2d(
+        np.asarray(pixel_ys, dtype=np.float64), np.asarray(pixel_xs, dtype=np.float64),
+        bins=(bins_y, bins_x), range=((0, image_height), (0, image_width))
+    )
+    return grid
+
+def density_overlay(grid, image_size, color, blur_radius=HEATMAP_BLUR_RADIUS, max_alpha=HEATMAP_MAX_ALPHA):
+    """
+    Turn a density grid into a transparent RGBA layer of one color whose opacity follows the
+    (log-scaled) density, so a few hot spots do not wash out everything else.
+    """
+    if not grid.any():
+        return Image.new('RGBA', image_size, color + (0,))
+
+    intensity = np.log1p(grid)
+    intensity = (intensity / intensity.max() * 255).astype(np.uint8)
+    alpha = Image.fromarray(intensity, mode='L').resize(image_size, Image.BILINEAR)
+    if blur_radius:
+        alpha = alpha.filter(ImageFilter.GaussianBlur(blur_radius))
+        # Blurring spreads the peaks out; stretch back to the full range
+        peak = alpha.getextrema()[1]
+        if peak:
+            alpha = alpha.point(lambda value: value * max_alpha // peak)
+    else:
+        alpha = alpha.point(lambda value: value * max_alpha // 255)
+
+    layer = Image.new('RGBA', image_size, color + (0,))
+    layer.putalpha(alpha)
+    return layer
+
+def render_heatmap(base_image, layers, bin_size=HEATMAP_BIN_SIZE, blur_radius=HEATMAP_BLUR_RADIUS):
+    """
+    Draw density layers over a minimap with a single alpha composite.
+
+    Args:
+        base_image (Image): Minimap to draw on (not modified)
+        layers (list): (pixel_xs, pixel_ys, color) per layer, e.g. kills and deaths
+
+    Returns:
+        RGB image of the minimap with all layers composited
+    """
+    image_width, image_height = base_image.size
+    overlay = Image.new('RGBA', base_image.size, (0, 0, 0, 0))
+    for pixel_xs, pixel_ys, color in layers:
+        grid = density_grid(pixel_xs, pixel_ys, image_width, image_height, bin_size)
+        overlay = Image.alpha_composite(overlay, density_overlay(grid, base_image.size, color, blur_radius))
+    return Image.alpha_composite(base_image.convert('RGBA'), overlay).convert('RGB')
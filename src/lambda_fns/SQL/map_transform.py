@@ -0,0 +1,59 @@
+import logging
+from decimal import Decimal
+import numpy as np
+
+logger = logging.getLogger()
+
+# float64 pixel values closer than this to a .5 rounding tie are recomputed with Decimal,
+# so results match the exact (Decimal) transform pixel for pixel
+TIE_TOLERANCE = 1e-6
+
+def _decimal_pixel(value, multiplier, scalar_to_add, size) -> int:
+    norm = (Decimal(str(value)) * Decimal(str(multiplier))) + Decimal(str(scalar_to_add))
+    return int((norm * Decimal(str(size))).to_integral_value())
+
+def transform_coordinates_array(xs, ys, map_data, image_width, image_height):
+    """
+    Transform arrays of game coordinates to image coordinates in one vectorized pass.
+    Game x maps to the image's vertical axis and game y to its horizontal axis.
+
+    Args:
+        xs, ys: Sequences of game coordinates (None/NaN marks a missing position)
+        map_data (dict): maps.json entry with x/yMultiplier and x/yScalarToAdd
+        image_width (int), image_height (int): Minimap size in pixels
+
+    Returns:
+        (pixel_x, pixel_y, valid): int64 arrays of pixel coordinates and a boolean mask of
+        entries that had both coordinates
+    """
+    x = np.array(xs, dtype=np.float64)
+    y = np.array(ys, dtype=np.float64)
+
+    raw_x = (y * float(map_data['xMultiplier']) + float(map_data['xScalarToAdd'])) * image_width
+    raw_y = (x * float(map_data['yMultiplier']) + float(map_data['yScalarToAdd'])) * image_height
+    valid = np.isfinite(raw_x) & np.isfinite(raw_y)
+
+    # np.rint rounds half to even, like Decimal.to_integral_value under the default context
+    pixel_x = np.where(valid, np.rint(raw_x), 0).astype(np.int64)
+    pixel_y = np.where(valid, np.rint(raw_y), 0).astype(np.int64)
+
+    for raw, pixel, values, multiplier, scalar_to_add, size in (
+        (raw_x, pixel_x, ys, map_data['xMultiplier'], map_data['xScalarToAdd'], image_width),
+        (raw_y, pixel_y, xs, map_data['yMultiplier'], map_data['yScalarToAdd'], image_height),
+    ):
+        near_tie = valid & (np.abs(np.abs(raw - np.floor(raw)) - 0.5) < TIE_TOLERANCE)
+        for i in np.flatnonzero(near_tie):
+            pixel[i] = _decimal_pixel(values[i], multiplier, scalar_to_add, size)
+
+    return pixel_x, pixel_y, valid
+
+def transform_coordinates(x, y, map_data, image_width, image_height):
+    """Transform a single game coordinate to image coordinates; (None, None) if it cannot be placed"""
+    try:
+        pixel_x, pixel_y, valid = transform_coordinates_array([x], [y], map_data, image_width, image_height)
+    except (ValueError, KeyError, TypeError) as e:
+        logger.error(f"Error in transform_coordinates: {str(e)}")
+        return None, None
+    if not valid[0]:
+        return None, None
+    return int(pixel_x[0]), int(pixel_y[0])
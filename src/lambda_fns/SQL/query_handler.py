@@ -0,0 +1,43 @@
+"""
+Light handler for the SQL-only functions. Deploy with handler query_handler.lambda_handler to keep
+PIL, NumPy, requests and boto3 out of the cold start; each function's module is imported on first use.
+"""
+import logging
+from action_group import handle_event
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+def run_get_player_info(parameters):
+    from get_player_info import get_player_info_wrapper
+
+    handle = parameters.get('handle')
+    first_name = parameters.get('first_name')
+    last_name = parameters.get('last_name')
+    logger.info(f"Calling get_player_info_wrapper with handle={handle}, first_name={first_name}, last_name={last_name}")
+    return get_player_info_wrapper(handle=handle, first_name=first_name, last_name=last_name)
+
+def run_get_top_agents_for_player(parameters):
+    from get_top_agents_for_player import get_top_agents_for_player
+
+    player_id = parameters.get('player_id')
+    limit = parameters.get('limit', 5)
+    return get_top_agents_for_player(player_id, limit)
+
+def run_get_top_players_by_role(parameters):
+    from get_top_players_by_role import get_top_players_by_role
+
+    role = parameters.get('role')
+    vct_international = int(parameters.get('vct_international', 0))
+    vct_challenger = int(parameters.get('vct_challenger', 0))
+    game_changers = int(parameters.get('game_changers', 0))
+    return get_top_players_by_role(role, vct_international, vct_challenger, game_changers)
+
+QUERY_FUNCTIONS = {
+    'get_player_info': run_get_player_info,
+    'get_top_agents_for_player': run_get_top_agents_for_player,
+    'get_top_players_by_role': run_get_top_players_by_role,
+}
+
+def lambda_handler(event, context):
+    return handle_event(event, QUERY_FUNCTIONS)
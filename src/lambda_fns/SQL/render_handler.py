@@ -0,0 +1,31 @@
+"""
+Heavy handler for the map rendering functions (PIL, NumPy, requests, boto3). Deploy with handler
+render_handler.lambda_handler; the render modules are imported on first use.
+"""
+import logging
+from action_group import handle_event
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+def run_get_map_visualization(parameters):
+    from get_last_game_map import get_map_visualization
+
+    player_id = parameters.get('player_id')
+    return get_map_visualization(player_id)
+
+def run_get_last_tournament_map(parameters):
+    from get_last_tour_map import get_tournament_map_visualizations
+
+    player_id = parameters.get('player_id')
+    event_type = parameters.get('event_type', 'both')
+    render_mode = parameters.get('render_mode', 'markers')
+    return get_tournament_map_visualizations(player_id, event_type, render_mode)
+
+RENDER_FUNCTIONS = {
+    'get_map_visualization': run_get_map_visualization,
+    'get_last_tournament_map': run_get_last_tournament_map,
+}
+
+def lambda_handler(event, context):
+    return handle_event(event, RENDER_FUNCTIONS)
@@ -0,0 +1,72 @@
+"""
+Connection manager tests against a local Postgres:
+    TEST_DATABASE_URL=postgresql://postgres@localhost/postgres python -m pytest test_db_connection.py
+"""
+import os
+import psycopg2
+import pytest
+from db_connection import ConnectionManager
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+def backend_pid(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_backend_pid() AS pid")
+        return cur.fetchone()['pid']
+
+def test_helpers_share_one_connection():
+    manager = ConnectionManager(TEST_DATABASE_URL)
+    first = manager.get()
+    pid = backend_pid(first)
+    first.close()
+
+    with manager.get() as second:
+        assert backend_pid(second) == pid
+    assert manager.connects == 1
+    manager.reset()
+
+def test_close_ends_the_transaction_but_keeps_the_connection():
+    manager = ConnectionManager(TEST_DATABASE_URL)
+    conn = manager.get()
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE uncommitted (id int)")
+    conn.close()
+
+    conn = manager.get()
+    assert not conn.closed
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('pg_temp.uncommitted') AS name")
+        assert cur.fetchone()['name'] is None
+    manager.reset()
+
+def test_reconnects_after_the_server_drops_the_connection():
+    manager = ConnectionManager(TEST_DATABASE_URL, validate_after_seconds=0)
+    pid = backend_pid(manager.get())
+    manager.release()
+
+    admin = psycopg2.connect(TEST_DATABASE_URL)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute("SELECT pg_terminate_backend(%s)", (pid,))
+    admin.close()
+
+    conn = manager.get()
+    assert backend_pid(conn) != pid
+    assert manager.connects == 2
+    manager.reset()
+
+def test_failed_transaction_is_rolled_back_before_reuse():
+    manager = ConnectionManager(TEST_DATABASE_URL)
+    conn = manager.get()
+    with pytest.raises(psycopg2.Error):
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM table_that_does_not_exist")
+
+    conn = manager.get()
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1 AS one")
+        assert cur.fetchone()['one'] == 1
+    assert manager.connects == 1
+    manager.reset()
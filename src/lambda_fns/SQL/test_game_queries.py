@@ -0,0 +1,98 @@
+"""
+Batched game queries against the per-pair ones, on temporary tables in a local Postgres:
+    TEST_DATABASE_URL=postgresql://postgres@localhost/postgres python -m pytest test_game_queries.py
+"""
+import os
+import pytest
+import db_connection
+from db_connection import ConnectionManager
+from game_queries import (get_damage_stats, get_assists, get_deaths, get_damage_stats_batch, get_assists_batch,
+                          get_deaths_batch, get_game_breakdowns)
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+DAMAGE = [
+    ('g1', 'p1', 'p6', 'head', 150.0, True),
+    ('g1', 'p1', 'p7', 'BODY', 40.0, False),
+    ('g1', 'p1', 'p7', 'body', 110.0, True),
+    ('g1', 'p2', 'p6', 'LEG', 20.0, False),
+    ('g2', 'p1', 'p8', 'HEAD', 160.0, True),
+]
+ASSISTS = [('g1', 'p1'), ('g1', 'p2'), ('g1', 'p2'), ('g2', 'p3')]
+DEATHS = [('g1', 'p1', 'p6', 'vandal'), ('g1', 'p2', 'p7', 'phantom'), ('g2', 'p2', 'p8', 'operator')]
+# p3 dealt no damage in g2 and nobody took part in g3
+PAIRS = [('g1', 'p1'), ('g1', 'p2'), ('g2', 'p1'), ('g2', 'p2'), ('g2', 'p3'), ('g3', 'p1')]
+
+@pytest.fixture(scope='module', autouse=True)
+def event_tables():
+    """Temporary tables on the shared connection shadow the real ones for the queries under test"""
+    manager = ConnectionManager(TEST_DATABASE_URL)
+    previous, db_connection.connection_manager = db_connection.connection_manager, manager
+    with manager.get() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+            CREATE TEMP TABLE damage_event (platform_game_id varchar, causer_id varchar, victim_id varchar,
+                                            location varchar, damage_amount float, kill_event boolean);
+            CREATE TEMP TABLE player_assists (platform_game_id varchar, assister_id varchar);
+            CREATE TEMP TABLE player_died (platform_game_id varchar, deceased_id varchar, killer_id varchar,
+                                           weapon_guid varchar);
+            """)
+            cur.executemany("INSERT INTO damage_event VALUES (%s, %s, %s, %s, %s, %s)", DAMAGE)
+            cur.executemany("INSERT INTO player_assists VALUES (%s, %s)", ASSISTS)
+            cur.executemany("INSERT INTO player_died VALUES (%s, %s, %s, %s)", DEATHS)
+    yield
+    db_connection.connection_manager = previous
+    manager.reset()
+
+def rows_key(rows):
+    return sorted(tuple(sorted(row.items())) for row in rows)
+
+@pytest.mark.parametrize("batch, single", [
+    (get_damage_stats_batch, get_damage_stats),
+    (get_assists_batch, get_assists),
+    (get_deaths_batch, get_deaths),
+])
+def test_batch_matches_per_pair_queries(batch, single):
+    grouped = batch(PAIRS + [('g1', 'p1')])
+    assert set(grouped) == set(PAIRS)
+    for game_id, player_id in PAIRS:
+        assert rows_key(grouped[(game_id, player_id)]) == rows_key(single(game_id, player_id))
+
+def test_batch_of_no_pairs_runs_no_query():
+    assert get_damage_stats_batch([]) == {}
+    assert get_game_breakdowns([]) == {}
+
+def breakdown_from_per_pair_queries(game_id, player_id):
+    damage = get_damage_stats(game_id, player_id)
+    total_hits = len(damage)
+    locations = {}
+    for row in damage:
+        location = locations.setdefault(row['location'].upper(), {'damage': 0.0, 'hits': 0, 'kills': 0})
+        location['damage'] += row['damage_amount']
+        location['hits'] += 1
+        location['kills'] += int(row['kill_event'])
+    for location in locations.values():
+        location['hit_share'] = location['hits'] / total_hits
+    return {
+        'total_damage': sum(row['damage_amount'] for row in damage),
+        'total_hits': total_hits,
+        'kills_from_damage': sum(int(row['kill_event']) for row in damage),
+        'headshot_ratio': locations['HEAD']['hits'] / total_hits if 'HEAD' in locations else 0.0,
+        'assists': len(get_assists(game_id, player_id)),
+        'deaths': len(get_deaths(game_id, player_id)),
+        'locations': locations
+    }
+
+def test_game_breakdowns_match_per_pair_queries():
+    breakdowns = get_game_breakdowns(PAIRS)
+    assert set(breakdowns) == set(PAIRS)
+    for game_id, player_id in PAIRS:
+        breakdown = dict(breakdowns[(game_id, player_id)])
+        expected = breakdown_from_per_pair_queries(game_id, player_id)
+        locations, expected_locations = breakdown.pop('locations'), expected.pop('locations')
+        assert breakdown == pytest.approx(expected)
+        assert set(locations) == set(expected_locations)
+        for location, values in locations.items():
+            assert values == pytest.approx(expected_locations[location])
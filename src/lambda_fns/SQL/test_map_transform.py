@@ -0,0 +1,145 @@
+"""
+Checks the vectorized map transform against the original Decimal implementation for every map in maps.json.
+Run from this directory: python -m pytest test_map_transform.py
+"""
+import json
+import random
+from decimal import Context, Decimal, Inexact
+from pathlib import Path
+import numpy as np
+from PIL import Image, ImageDraw
+from map_transform import transform_coordinates, transform_coordinates_array
+from map_heatmap import density_grid, render_heatmap
+
+HERE = Path(__file__).parent
+IMAGE_SIZE = 1024
+
+def load_maps():
+    with open(HERE / 'maps.json', 'r') as f:
+        maps_data = json.load(f)
+    # Same string conversion get_map_data applies
+    return [
+        dict(map_data, **{key: str(map_data[key]) for key in ('xMultiplier', 'yMultiplier', 'xScalarToAdd', 'yScalarToAdd')})
+        for map_data in maps_data
+    ]
+
+def decimal_transform(x, y, map_data, image_width, image_height):
+    """The per-point Decimal transform the renderers used before"""
+    x, y = Decimal(str(x)), Decimal(str(y))
+    norm_x = (y * Decimal(map_data['xMultiplier'])) + Decimal(map_data['xScalarToAdd'])
+    norm_y = (x * Decimal(map_data['yMultiplier'])) + Decimal(map_data['yScalarToAdd'])
+    return (int((norm_x * Decimal(str(image_width))).to_integral_value()),
+            int((norm_y * Decimal(str(image_height))).to_integral_value()))
+
+def on_map_coordinates(map_data, count, rng):
+    """Game coordinates that land on (or just around) the minimap, with the precision the events table stores"""
+    xs, ys = [], []
+    for _ in range(count):
+        # Maps without minimap calibration (all zeros) just get raw game-unit coordinates
+        if float(map_data['xMultiplier']) == 0 or float(map_data['yMultiplier']) == 0:
+            x, y = rng.uniform(-15000, 15000), rng.uniform(-15000, 15000)
+        else:
+            px, py = rng.uniform(-0.05, 1.05), rng.uniform(-0.05, 1.05)
+            y = (px - float(map_data['xScalarToAdd'])) / float(map_data['xMultiplier'])
+            x = (py - float(map_data['yScalarToAdd'])) / float(map_data['yMultiplier'])
+        decimals = rng.choice([0, 1, 2, 3, 6])
+        xs.append(round(x, decimals))
+        ys.append(round(y, decimals))
+    return xs, ys
+
+def tie_coordinates(map_data, multiplier_key, scalar_key):
+    """
+    Game coordinates whose pixel value sits on a .5 rounding tie: exact ties (as Decimal, like NUMERIC
+    columns) where the division terminates, plus float coordinates rounded to 4 decimals just around them
+    """
+    multiplier, scalar = Decimal(map_data[multiplier_key]), Decimal(map_data[scalar_key])
+    context = Context(prec=50)
+    ties = []
+    if multiplier == 0:
+        return ties
+    for k in range(0, IMAGE_SIZE, 3):
+        target = (Decimal(k) + Decimal('0.5')) / IMAGE_SIZE
+        context.clear_flags()
+        value = context.divide(target - scalar, multiplier)
+        if not context.flags[Inexact]:
+            ties.append(value.normalize())
+        ties.append(float(round(value, 4)))
+    return ties
+
+def test_matches_decimal_for_every_map():
+    rng = random.Random(2024)
+    for map_data in load_maps():
+        xs, ys = on_map_coordinates(map_data, 5000, rng)
+        grid = [float(v) for v in range(-15000, 15001, 250)]
+        xs += grid
+        ys += grid[::-1]
+
+        pixel_xs, pixel_ys, valid = transform_coordinates_array(xs, ys, map_data, IMAGE_SIZE, IMAGE_SIZE)
+        assert valid.all()
+        for x, y, pixel_x, pixel_y in zip(xs, ys, pixel_xs.tolist(), pixel_ys.tolist()):
+            assert (pixel_x, pixel_y) == decimal_transform(x, y, map_data, IMAGE_SIZE, IMAGE_SIZE), (map_data['displayName'], x, y)
+
+def test_matches_decimal_on_rounding_ties():
+    exact_ties = 0
+    for map_data in load_maps():
+        tie_ys = tie_coordinates(map_data, 'xMultiplier', 'xScalarToAdd')
+        tie_xs = tie_coordinates(map_data, 'yMultiplier', 'yScalarToAdd')
+        count = min(len(tie_xs), len(tie_ys))
+        xs = [tie_xs[i % len(tie_xs)] for i in range(count)]
+        ys = [tie_ys[i % len(tie_ys)] for i in range(count)]
+
+        pixel_xs, pixel_ys, _ = transform_coordinates_array(xs, ys, map_data, IMAGE_SIZE, IMAGE_SIZE)
+        for x, y, pixel_x, pixel_y in zip(xs, ys, pixel_xs.tolist(), pixel_ys.tolist()):
+            assert (pixel_x, pixel_y) == decimal_transform(x, y, map_data, IMAGE_SIZE, IMAGE_SIZE), (map_data['displayName'], x, y)
+        exact_ties += sum(isinstance(value, Decimal) for value in tie_xs + tie_ys)
+    assert exact_ties > 0
+
+def test_rendered_markers_are_pixel_identical():
+    rng = random.Random(7)
+    for map_data in load_maps():
+        xs, ys = on_map_coordinates(map_data, 300, rng)
+        pixel_xs, pixel_ys, _ = transform_coordinates_array(xs, ys, map_data, IMAGE_SIZE, IMAGE_SIZE)
+
+        expected = Image.new('RGB', (IMAGE_SIZE, IMAGE_SIZE))
+        actual = Image.new('RGB', (IMAGE_SIZE, IMAGE_SIZE))
+        expected_draw, actual_draw = ImageDraw.Draw(expected), ImageDraw.Draw(actual)
+        for x, y, pixel_x, pixel_y in zip(xs, ys, pixel_xs.tolist(), pixel_ys.tolist()):
+            ex, ey = decimal_transform(x, y, map_data, IMAGE_SIZE, IMAGE_SIZE)
+            expected_draw.ellipse((ex - 2, ey - 2, ex + 2, ey + 2), fill='red')
+            expected_draw.line((IMAGE_SIZE // 2, IMAGE_SIZE // 2, ex, ey), fill='green', width=1)
+            actual_draw.ellipse((pixel_x - 2, pixel_y - 2, pixel_x + 2, pixel_y + 2), fill='red')
+            actual_draw.line((IMAGE_SIZE // 2, IMAGE_SIZE // 2, pixel_x, pixel_y), fill='green', width=1)
+
+        assert np.array_equal(np.asarray(expected), np.asarray(actual)), map_data['displayName']
+
+def test_missing_coordinates_are_masked():
+    map_data = load_maps()[0]
+    pixel_xs, pixel_ys, valid = transform_coordinates_array([100.0, None, float('nan')], [200.0, 5.0, 5.0], map_data, IMAGE_SIZE, IMAGE_SIZE)
+    assert valid.tolist() == [True, False, False]
+    assert transform_coordinates(None, 5.0, map_data, IMAGE_SIZE, IMAGE_SIZE) == (None, None)
+    assert transform_coordinates(100.0, 200.0, map_data, IMAGE_SIZE, IMAGE_SIZE) == decimal_transform(100.0, 200.0, map_data, IMAGE_SIZE, IMAGE_SIZE)
+
+def test_heatmap_bins_every_point_and_keeps_image_size():
+    pixel_xs = np.array([0, 5, 1023, 512, 512])
+    pixel_ys = np.array([0, 5, 1023, 512, 513])
+    grid = density_grid(pixel_xs, pixel_ys, IMAGE_SIZE, IMAGE_SIZE, bin_size=8)
+    assert grid.shape == (128, 128)
+    assert grid.sum() == len(pixel_xs)
+    assert grid[0, 0] == 2 and grid[64, 64] == 2 and grid[127, 127] == 1
+
+    base = Image.new('RGBA', (IMAGE_SIZE, IMAGE_SIZE), (0, 0, 0, 255))
+    heatmap = render_heatmap(base, [(pixel_xs, pixel_ys, (255, 0, 0))])
+    assert heatmap.size == base.size
+    assert heatmap.getpixel((515, 515))[0] > heatmap.getpixel((300, 300))[0]
+
+def test_deployable_copies_are_identical():
+    repo_root = HERE.parents[2]
+    copies = {
+        'map_transform.py': (repo_root / 'frontend' / 'agents', repo_root / 'src' / 'event_locations'),
+        'map_heatmap.py': (repo_root / 'frontend' / 'agents',),
+        'map_assets.py': (repo_root / 'frontend' / 'agents', repo_root / 'src' / 'event_locations'),
+    }
+    for file_name, directories in copies.items():
+        source = (HERE / file_name).read_text()
+        for directory in directories:
+            assert (directory / file_name).read_text() == source, directory / file_name